@@ -0,0 +1,816 @@
+"""
+Fake IB Gateway for load testing
+
+Speaks enough of the TWS API socket protocol for the ib_async calls the IB
+server makes: connect/startApi, contract details (qualify), option params,
+market data (streaming and snapshot), historical bars, orders, positions,
+account updates/summary, PnL and reqCurrentTime.
+
+Deterministic: contract ids, option expirations/strikes, prices and injected
+latency all derive from the symbol, the clock and --seed, so two runs with the
+same flags see the same market. Faults are opt-in:
+- Latency per response (--latency-ms + --jitter-ms)
+- Historical pacing (60 requests / 10 min, identical requests within 15s)
+- Message rate (IB error 100 above --max-msg-rate per second per client)
+- Market data line limit (IB error 101 above --max-lines)
+- Quiet contracts that never tick (--quiet-pct)
+- Periodic disconnects of every client (--disconnect-every / --down-for)
+
+Counters are served as JSON on --stats-port (GET /stats, GET /reset) so the
+benchmark runner can report pacing violations.
+
+Usage:
+    python3 fake_gateway.py --port 4002 --latency-ms 20 --jitter-ms 30
+"""
+import os
+import math
+import json
+import time
+import struct
+import zlib
+import random
+import asyncio
+import logging
+import argparse
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("fake-gateway")
+
+SERVER_VERSION = 176  # Inside ib_async's supported range (157..178); fixes the message layouts below
+ACCOUNT = os.getenv("FAKE_IB_ACCOUNT", "DU1234567")
+
+# Incoming message ids (client -> gateway)
+REQ_MKT_DATA = 1
+CANCEL_MKT_DATA = 2
+PLACE_ORDER = 3
+CANCEL_ORDER = 4
+REQ_OPEN_ORDERS = 5
+REQ_ACCOUNT_UPDATES = 6
+REQ_EXECUTIONS = 7
+REQ_IDS = 8
+REQ_CONTRACT_DETAILS = 9
+REQ_ALL_OPEN_ORDERS = 16
+REQ_MANAGED_ACCTS = 17
+REQ_HISTORICAL_DATA = 20
+REQ_CURRENT_TIME = 49
+REQ_MARKET_DATA_TYPE = 59
+REQ_POSITIONS = 61
+REQ_ACCOUNT_SUMMARY = 62
+START_API = 71
+REQ_ACCOUNT_UPDATES_MULTI = 76
+REQ_SEC_DEF_OPT_PARAMS = 78
+REQ_PNL = 92
+REQ_COMPLETED_ORDERS = 99
+
+# Tick types
+BID, ASK, LAST, CLOSE = 1, 2, 4, 9
+BID_SIZE, ASK_SIZE, LAST_SIZE, VOLUME = 0, 3, 5, 8
+MODEL_OPTION = 13
+
+
+# ============================================================================
+# Deterministic Market
+# ============================================================================
+
+def _crc(text: str) -> int:
+    return zlib.crc32(text.encode()) & 0x7FFFFFFF
+
+
+@dataclass
+class FakeContract:
+    """A contract the fake gateway knows about (registered on first qualify)"""
+    con_id: int
+    symbol: str
+    sec_type: str
+    expiry: str = ""
+    strike: float = 0.0
+    right: str = ""
+    multiplier: str = ""
+    currency: str = "USD"
+
+    @property
+    def local_symbol(self) -> str:
+        if self.sec_type != "OPT":
+            return self.symbol
+        return f"{self.symbol:<6}{self.expiry[2:]}{self.right}{int(round(self.strike * 1000)):08d}"
+
+    def fields(self, exchange: str = "SMART") -> List[Any]:
+        """Contract fields as position and execution messages carry them"""
+        return [
+            self.con_id, self.symbol, self.sec_type, self.expiry, self.strike if self.strike else "",
+            self.right, self.multiplier, exchange, self.currency, self.local_symbol, self.symbol
+        ]
+
+
+class FakeMarket:
+    """
+    Prices as pure functions of (symbol, time): overlapping historical requests
+    return identical bars and every client sees the same quote at the same time.
+    """
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        self.contracts: Dict[int, FakeContract] = {}
+
+    def base_price(self, symbol: str) -> float:
+        return 20.0 + (_crc(f"{self.seed}:{symbol}") % 48000) / 100.0
+
+    def spot(self, symbol: str, t: Optional[float] = None) -> float:
+        t = time.time() if t is None else t
+        phase = (_crc(symbol) % 628) / 100.0
+        wave = 0.01 * math.sin(t / 900.0 + phase) + 0.002 * math.sin(t / 41.0 + 2 * phase)
+        return round(self.base_price(symbol) * (1 + wave), 2)
+
+    def stock(self, symbol: str) -> FakeContract:
+        con_id = _crc(f"STK:{symbol}")
+        contract = self.contracts.get(con_id)
+        if contract is None:
+            contract = self.contracts[con_id] = FakeContract(con_id, symbol, "STK")
+        return contract
+
+    def expirations(self, symbol: str) -> List[str]:
+        """Eight weekly Fridays, then four monthly third Fridays"""
+        today = datetime.now(timezone.utc).date()
+        friday = today + timedelta(days=(4 - today.weekday()) % 7)
+        weeklies = [friday + timedelta(weeks=i) for i in range(8)]
+        monthlies = []
+        month = (weeklies[-1].replace(day=1) + timedelta(days=32)).replace(day=1)
+        while len(monthlies) < 4:
+            first_friday = month + timedelta(days=(4 - month.weekday()) % 7)
+            monthlies.append(first_friday + timedelta(weeks=2))
+            month = (month + timedelta(days=32)).replace(day=1)
+        return [d.strftime("%Y%m%d") for d in weeklies + monthlies]
+
+    def strikes(self, symbol: str) -> List[float]:
+        base = self.base_price(symbol)
+        step = 1.0 if base < 50 else 2.5 if base < 200 else 5.0
+        low = math.floor(base * 0.5 / step) * step
+        return [round(low + i * step, 2) for i in range(int(base / step) + 1)]
+
+    def option(self, symbol: str, expiry: str, strike: float, right: str) -> Optional[FakeContract]:
+        right = right[:1].upper()
+        if expiry not in self.expirations(symbol) or strike not in self.strikes(symbol) or right not in ("C", "P"):
+            return None
+        con_id = _crc(f"OPT:{symbol}:{expiry}:{strike}:{right}")
+        contract = self.contracts.get(con_id)
+        if contract is None:
+            contract = self.contracts[con_id] = FakeContract(con_id, symbol, "OPT", expiry, strike, right, "100")
+        return contract
+
+    def option_quote(self, contract: FakeContract, t: Optional[float] = None) -> Dict[str, float]:
+        """Black-Scholes price and greeks on a smile, greeks in IB units"""
+        t = time.time() if t is None else t
+        spot = self.spot(contract.symbol, t)
+        expiry = datetime.strptime(contract.expiry, "%Y%m%d").replace(hour=20, tzinfo=timezone.utc)
+        years = max((expiry.timestamp() - t) / (365 * 86400), 1.0 / (365 * 24))
+        moneyness = math.log(contract.strike / spot)
+        vol = 0.22 + 0.6 * moneyness * moneyness - 0.08 * moneyness
+        sqrt_t = math.sqrt(years)
+        d1 = (math.log(spot / contract.strike) + 0.5 * vol * vol * years) / (vol * sqrt_t)
+        d2 = d1 - vol * sqrt_t
+        cdf = lambda x: 0.5 * (1 + math.erf(x / math.sqrt(2)))
+        pdf = math.exp(-0.5 * d1 * d1) / math.sqrt(2 * math.pi)
+        if contract.right == "C":
+            price, delta = spot * cdf(d1) - contract.strike * cdf(d2), cdf(d1)
+        else:
+            price, delta = contract.strike * cdf(-d2) - spot * cdf(-d1), cdf(d1) - 1
+        price = max(price, 0.01)
+        spread = max(0.01, round(price * 0.02, 2))
+        return {
+            "bid": round(max(price - spread / 2, 0.01), 2),
+            "ask": round(price + spread / 2, 2),
+            "price": price,
+            "iv": vol,
+            "delta": delta,
+            "gamma": pdf / (spot * vol * sqrt_t),
+            "vega": spot * pdf * sqrt_t / 100,
+            "theta": -spot * pdf * vol / (2 * sqrt_t) / 365,
+            "spot": spot
+        }
+
+    def bar(self, symbol: str, start: int, seconds: int) -> Tuple[float, float, float, float, int]:
+        """OHLCV for [start, start + seconds) sampled from the price function"""
+        samples = [self.spot(symbol, start + seconds * i / 4) for i in range(5)]
+        volume = 100 + _crc(f"{symbol}:{start}") % 5000
+        return samples[0], max(samples), min(samples), samples[-1], volume
+
+
+# ============================================================================
+# Wire Protocol
+# ============================================================================
+
+def encode(*fields: Any) -> bytes:
+    """Length-prefixed, NUL-terminated fields (same framing as ib_async's client)"""
+    payload = "".join(f"{'' if f is None else f}\0" for f in fields).encode()
+    return struct.pack(">I", len(payload)) + payload
+
+
+def parse_duration(duration: str) -> int:
+    count, unit = duration.split()
+    return int(count) * {"S": 1, "D": 86400, "W": 7 * 86400, "M": 30 * 86400, "Y": 365 * 86400}[unit.upper()]
+
+
+def parse_bar_size(bar_size: str) -> int:
+    count, unit = bar_size.split()[:2]
+    unit = unit.lower().rstrip("s")
+    return int(count) * {"sec": 1, "min": 60, "hour": 3600, "day": 86400, "week": 7 * 86400, "month": 30 * 86400}[unit]
+
+
+def parse_end(end: str) -> float:
+    if not end:
+        return time.time()
+    parts = end.replace("-", " ").split()
+    stamp = datetime.strptime(" ".join(parts[:2]), "%Y%m%d %H:%M:%S")
+    return stamp.replace(tzinfo=timezone.utc).timestamp()
+
+
+# ============================================================================
+# Gateway
+# ============================================================================
+
+@dataclass
+class GatewayConfig:
+    port: int = 4002
+    seed: int = 1
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    tick_interval: float = 0.25
+    max_lines: int = 100
+    max_msg_rate: int = 50
+    hist_max_requests: int = 60
+    hist_window: float = 600.0
+    hist_identical_spacing: float = 15.0
+    quiet_pct: float = 0.0
+    fill_delay: float = 0.2
+    disconnect_every: float = 0.0
+    down_for: float = 0.0
+
+
+@dataclass
+class Subscription:
+    req_id: int
+    contract: FakeContract
+    task: Optional[asyncio.Task] = None
+
+
+class GatewayConnection:
+    """One API client socket"""
+
+    def __init__(self, gateway: "FakeGateway", reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.gateway = gateway
+        self.reader = reader
+        self.writer = writer
+        self.client_id: Optional[int] = None
+        self.subs: Dict[int, Subscription] = {}
+        self.sent_times: Deque[float] = deque()
+        self.tasks: Set[asyncio.Task] = set()
+
+    def send(self, *fields: Any):
+        if not self.writer.is_closing():
+            self.writer.write(encode(*fields))
+
+    def error(self, req_id: int, code: int, message: str):
+        self.send(4, 2, req_id, code, message, "")
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run(self):
+        try:
+            header = await self.reader.readexactly(4)
+            if header != b"API\0":
+                return
+            size = struct.unpack(">I", await self.reader.readexactly(4))[0]
+            await self.reader.readexactly(size)  # "v157..178" version range
+            self.send(SERVER_VERSION, datetime.now(timezone.utc).strftime("%Y%m%d %H:%M:%S UTC"))
+            while True:
+                size = struct.unpack(">I", await self.reader.readexactly(4))[0]
+                payload = await self.reader.readexactly(size)
+                fields = payload.decode(errors="replace").split("\0")[:-1]
+                if fields:
+                    self.handle(fields)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        for sub in self.subs.values():
+            if sub.task:
+                sub.task.cancel()
+        self.gateway.release_lines(len(self.subs))
+        self.subs.clear()
+        for task in list(self.tasks):
+            task.cancel()
+        if self.client_id is not None:
+            self.gateway.client_ids.discard(self.client_id)
+        self.gateway.connections.discard(self)
+        if not self.writer.is_closing():
+            self.writer.close()
+
+    def handle(self, fields: List[str]):
+        msg_id = int(fields[0])
+        stats = self.gateway.stats
+        stats["messages"][msg_id] = stats["messages"].get(msg_id, 0) + 1
+
+        # IB's API limit is 50 messages/second per client
+        now = time.monotonic()
+        self.sent_times.append(now)
+        while self.sent_times and now - self.sent_times[0] > 1.0:
+            self.sent_times.popleft()
+        if len(self.sent_times) > self.gateway.config.max_msg_rate:
+            stats["violations"]["message_rate"] += 1
+            by_client = stats["message_rate_by_client"]
+            by_client[self.client_id] = by_client.get(self.client_id, 0) + 1
+            self.error(-1, 100, f"Max rate of messages per second has been exceeded:max={self.gateway.config.max_msg_rate} rec={len(self.sent_times)}")
+
+        handler = self.HANDLERS.get(msg_id)
+        if handler is None:
+            return
+        self.spawn(handler(self, fields))
+
+    # ------------------------------------------------------------------
+    # Session
+    # ------------------------------------------------------------------
+
+    async def start_api(self, fields: List[str]):
+        client_id = int(fields[2])
+        if client_id in self.gateway.client_ids:
+            self.error(-1, 326, "Unable to connect as the client id is already in use. Retry with a unique client id.")
+            self.close()
+            return
+        self.client_id = client_id
+        self.gateway.client_ids.add(client_id)
+        self.send(9, 1, self.gateway.next_order_id)
+        self.send(15, 1, ACCOUNT)
+
+    async def req_ids(self, fields: List[str]):
+        self.send(9, 1, self.gateway.next_order_id)
+
+    async def req_managed_accts(self, fields: List[str]):
+        self.send(15, 1, ACCOUNT)
+
+    async def req_current_time(self, fields: List[str]):
+        await self.gateway.delay()
+        self.send(49, 1, int(time.time()))
+
+    async def ignore(self, fields: List[str]):
+        pass
+
+    # ------------------------------------------------------------------
+    # Account
+    # ------------------------------------------------------------------
+
+    async def req_positions(self, fields: List[str]):
+        await self.gateway.delay()
+        for contract, quantity, cost in self.gateway.positions():
+            self.send(61, 3, ACCOUNT, *contract.fields(), quantity, cost)
+        self.send(62, 1)
+
+    async def req_account_updates(self, fields: List[str]):
+        if fields[2] != "1":
+            return
+        await self.gateway.delay()
+        for tag, value in self.gateway.account_values().items():
+            self.send(6, 2, tag, value, "USD", ACCOUNT)
+            self.send(6, 2, tag, value, "BASE", ACCOUNT)
+        market = self.gateway.market
+        for contract, quantity, cost in self.gateway.positions():
+            price = market.spot(contract.symbol) if contract.sec_type == "STK" else market.option_quote(contract)["price"]
+            mult = float(contract.multiplier or 1)
+            # Portfolio updates carry the primary exchange in place of the exchange
+            self.send(7, 8, *contract.fields("NASDAQ" if contract.sec_type == "STK" else ""),
+                      quantity, price, price * quantity * mult, cost,
+                      (price * mult - cost) * quantity, 0.0, ACCOUNT)
+        self.send(8, 1, datetime.now().strftime("%H:%M"))
+        self.send(54, 1, ACCOUNT)
+
+    async def req_account_updates_multi(self, fields: List[str]):
+        req_id = int(fields[2])
+        await self.gateway.delay()
+        for tag, value in self.gateway.account_values().items():
+            self.send(73, 1, req_id, ACCOUNT, "", tag, value, "USD")
+        self.send(74, 1, req_id)
+
+    async def req_account_summary(self, fields: List[str]):
+        req_id = int(fields[2])
+        await self.gateway.delay()
+        for tag, value in self.gateway.account_values().items():
+            self.send(63, 1, req_id, ACCOUNT, tag, value, "USD")
+        self.send(64, 1, req_id)
+
+    async def req_pnl(self, fields: List[str]):
+        req_id = int(fields[1])
+        await self.gateway.delay()
+        self.send(94, req_id, 125.5, 310.25, 0.0)
+
+    async def req_open_orders(self, fields: List[str]):
+        await self.gateway.delay()
+        self.send(53, 1)
+
+    async def req_completed_orders(self, fields: List[str]):
+        await self.gateway.delay()
+        self.send(102)
+
+    async def req_executions(self, fields: List[str]):
+        await self.gateway.delay()
+        self.send(55, 1, int(fields[2]))
+
+    # ------------------------------------------------------------------
+    # Contracts
+    # ------------------------------------------------------------------
+
+    def resolve(self, fields: List[str], start: int) -> Optional[FakeContract]:
+        """Contract from the 12 TWS contract fields beginning at `start`"""
+        con_id, symbol, sec_type, expiry, strike, right = fields[start:start + 6]
+        market = self.gateway.market
+        if con_id and int(con_id) in market.contracts:
+            return market.contracts[int(con_id)]
+        symbol = symbol.upper()
+        if sec_type == "STK" and symbol:
+            return market.stock(symbol)
+        if sec_type == "OPT" and symbol and expiry and strike and right:
+            return market.option(symbol, expiry[:8], float(strike), right)
+        return None
+
+    async def req_contract_details(self, fields: List[str]):
+        req_id = int(fields[2])
+        await self.gateway.delay()
+        contract = self.resolve(fields, 3)
+        if contract is None:
+            self.error(req_id, 200, "No security definition has been found for the request")
+            return
+        c = contract
+        under_con_id = self.gateway.market.stock(c.symbol).con_id if c.sec_type == "OPT" else 0
+        self.send(
+            10, req_id, c.symbol, c.sec_type, c.expiry, c.strike if c.strike else "", c.right, "SMART", c.currency,
+            c.local_symbol, c.symbol, c.symbol, c.con_id, 0.01, c.multiplier, "LMT,MKT,STP", "SMART,NASDAQ,CBOE",
+            1, under_con_id,
+            f"{c.symbol} FAKE", "NASDAQ" if c.sec_type == "STK" else "", c.expiry[:6], "", "", "",
+            "US/Eastern", "", "", "", "", 0, 1, c.symbol if c.sec_type == "OPT" else "",
+            "STK" if c.sec_type == "OPT" else "", "26", c.expiry, "COMMON" if c.sec_type == "STK" else "", 1, 1, 1
+        )
+        self.send(52, 1, req_id)
+
+    async def req_sec_def_opt_params(self, fields: List[str]):
+        req_id, symbol = int(fields[1]), fields[2].upper()
+        await self.gateway.delay()
+        market = self.gateway.market
+        expirations, strikes = market.expirations(symbol), market.strikes(symbol)
+        self.send(75, req_id, "SMART", market.stock(symbol).con_id, symbol, "100",
+                  len(expirations), *expirations, len(strikes), *strikes)
+        self.send(76, req_id)
+
+    # ------------------------------------------------------------------
+    # Market Data
+    # ------------------------------------------------------------------
+
+    async def req_mkt_data(self, fields: List[str]):
+        req_id = int(fields[2])
+        contract = self.resolve(fields, 3)
+        snapshot = fields[17] == "1"  # after the contract fields and the delta-neutral flag (no BAG legs)
+        if contract is None:
+            self.error(req_id, 200, "No security definition has been found for the request")
+            return
+        if not snapshot:
+            if not self.gateway.take_line():
+                self.gateway.stats["violations"]["market_data_lines"] += 1
+                self.error(req_id, 101, "Max number of tickers has been reached")
+                return
+            sub = self.subs[req_id] = Subscription(req_id, contract)
+        await self.gateway.delay()
+        if self.gateway.is_quiet(contract):
+            if snapshot:
+                self.send(57, 1, req_id)
+            return
+        self.send_quote(req_id, contract)
+        if snapshot:
+            self.send(57, 1, req_id)
+        elif req_id in self.subs:
+            sub.task = asyncio.create_task(self.stream(sub))
+
+    def send_quote(self, req_id: int, contract: FakeContract):
+        market = self.gateway.market
+        if contract.sec_type == "OPT":
+            q = market.option_quote(contract)
+            self.send(1, 6, req_id, BID, q["bid"], 10, 0)
+            self.send(1, 6, req_id, ASK, q["ask"], 12, 0)
+            self.send(1, 6, req_id, LAST, round(q["price"], 2), 1, 0)
+            self.send(21, req_id, MODEL_OPTION, 1, q["iv"], q["delta"], q["price"], 0.0,
+                      q["gamma"], q["vega"], q["theta"], q["spot"])
+        else:
+            spot = market.spot(contract.symbol)
+            self.send(1, 6, req_id, BID, round(spot - 0.01, 2), 300, 0)
+            self.send(1, 6, req_id, ASK, round(spot + 0.01, 2), 200, 0)
+            self.send(1, 6, req_id, LAST, spot, 100, 0)
+            self.send(1, 6, req_id, CLOSE, round(market.base_price(contract.symbol), 2), 0, 0)
+            self.send(2, 6, req_id, VOLUME, 1000 + _crc(contract.symbol) % 90000)
+
+    async def stream(self, sub: Subscription):
+        interval = self.gateway.config.tick_interval
+        while sub.req_id in self.subs:
+            await asyncio.sleep(interval)
+            self.send_quote(sub.req_id, sub.contract)
+
+    async def cancel_mkt_data(self, fields: List[str]):
+        sub = self.subs.pop(int(fields[2]), None)
+        if sub is not None:
+            if sub.task:
+                sub.task.cancel()
+            self.gateway.release_lines(1)
+
+    # ------------------------------------------------------------------
+    # Historical Data
+    # ------------------------------------------------------------------
+
+    async def req_historical_data(self, fields: List[str]):
+        req_id = int(fields[1])
+        contract = self.resolve(fields, 2)
+        end_text, bar_size, duration, use_rth, what, format_date = fields[15:21]
+        if contract is None:
+            self.error(req_id, 200, "No security definition has been found for the request")
+            return
+        if not self.gateway.take_historical((contract.con_id, end_text, bar_size, duration, what, use_rth)):
+            self.gateway.stats["violations"]["historical_pacing"] += 1
+            self.error(req_id, 162, "Historical Market Data Service error message:API historical data query cancelled: pacing violation")
+            return
+        await self.gateway.delay()
+
+        step = parse_bar_size(bar_size)
+        end = parse_end(end_text)
+        start = end - parse_duration(duration)
+        first = int(start // step * step + step)
+        market = self.gateway.market
+        rows: List[Any] = []
+        count = 0
+        for t in range(first, int(end), step):
+            if step >= 86400:
+                date = datetime.fromtimestamp(t, timezone.utc).strftime("%Y%m%d")
+            elif format_date == "2":
+                date = str(t)
+            else:
+                date = datetime.fromtimestamp(t, timezone.utc).strftime("%Y%m%d %H:%M:%S UTC")
+            o, h, l, c, v = market.bar(contract.symbol, t, step)
+            rows += [date, o, h, l, c, v, round((o + c) / 2, 4), max(v // 100, 1)]
+            count += 1
+        fmt = lambda ts: datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%d %H:%M:%S UTC")
+        self.send(17, req_id, fmt(start), fmt(end), count, *rows)
+
+    # ------------------------------------------------------------------
+    # Orders
+    # ------------------------------------------------------------------
+
+    async def place_order(self, fields: List[str]):
+        order_id = int(fields[1])
+        contract = self.resolve(fields, 2)
+        action, quantity, order_type, limit = fields[16], float(fields[17]), fields[18], fields[19]
+        if contract is None:
+            self.error(order_id, 200, "No security definition has been found for the request")
+            return
+        gateway = self.gateway
+        gateway.next_order_id = max(gateway.next_order_id, order_id + 1)
+        perm_id = gateway.next_perm_id
+        gateway.next_perm_id += 1
+        gateway.orders[order_id] = {"client_id": self.client_id, "perm_id": perm_id, "cancelled": False}
+        gateway.stats["orders"] += 1
+
+        def status(state: str, filled: float = 0.0, price: float = 0.0):
+            self.send(3, order_id, state, filled, quantity - filled, price, perm_id, 0, price, self.client_id, "", 0.0)
+
+        await gateway.delay()
+        status("PreSubmitted")
+        await asyncio.sleep(0.01)
+        status("Submitted")
+
+        market = gateway.market
+        if contract.sec_type == "OPT":
+            q = market.option_quote(contract)
+            bid, ask = q["bid"], q["ask"]
+        else:
+            spot = market.spot(contract.symbol)
+            bid, ask = spot - 0.01, spot + 0.01
+        buy = action.upper() == "BUY"
+        marketable = order_type == "MKT" or (limit and (float(limit) >= ask if buy else float(limit) <= bid))
+        if not marketable:
+            return
+        await asyncio.sleep(gateway.config.fill_delay)
+        if gateway.orders[order_id]["cancelled"]:
+            return
+        price = round(ask if buy else bid, 2)
+        exec_id = f"0000fake.{order_id:08d}.01"
+        self.send(
+            11, -1, order_id, *contract.fields(), exec_id, datetime.now(timezone.utc).strftime("%Y%m%d %H:%M:%S UTC"),
+            ACCOUNT, "SMART", "BOT" if buy else "SLD", quantity, price, perm_id, self.client_id, 0,
+            quantity, price, "", "", "", "", 1
+        )
+        self.send(59, 1, exec_id, 1.0, "USD", "", "", "")
+        status("Filled", quantity, price)
+        gateway.orders[order_id]["filled"] = True
+
+    async def cancel_order(self, fields: List[str]):
+        order_id = int(fields[2])
+        order = self.gateway.orders.get(order_id)
+        await self.gateway.delay()
+        if order is None or order.get("filled"):
+            self.error(order_id, 10148, f"OrderId {order_id} that needs to be cancelled cannot be cancelled")
+            return
+        order["cancelled"] = True
+        self.error(order_id, 202, "Order Canceled - reason:")
+        self.send(3, order_id, "Cancelled", 0.0, 0.0, 0.0, order["perm_id"], 0, 0.0, order["client_id"], "", 0.0)
+
+    HANDLERS = {
+        START_API: start_api,
+        REQ_IDS: req_ids,
+        REQ_MANAGED_ACCTS: req_managed_accts,
+        REQ_CURRENT_TIME: req_current_time,
+        REQ_MARKET_DATA_TYPE: ignore,
+        REQ_POSITIONS: req_positions,
+        REQ_ACCOUNT_UPDATES: req_account_updates,
+        REQ_ACCOUNT_UPDATES_MULTI: req_account_updates_multi,
+        REQ_ACCOUNT_SUMMARY: req_account_summary,
+        REQ_PNL: req_pnl,
+        REQ_OPEN_ORDERS: req_open_orders,
+        REQ_ALL_OPEN_ORDERS: req_open_orders,
+        REQ_COMPLETED_ORDERS: req_completed_orders,
+        REQ_EXECUTIONS: req_executions,
+        REQ_CONTRACT_DETAILS: req_contract_details,
+        REQ_SEC_DEF_OPT_PARAMS: req_sec_def_opt_params,
+        REQ_MKT_DATA: req_mkt_data,
+        CANCEL_MKT_DATA: cancel_mkt_data,
+        REQ_HISTORICAL_DATA: req_historical_data,
+        PLACE_ORDER: place_order,
+        CANCEL_ORDER: cancel_order,
+    }
+
+
+class FakeGateway:
+    """Listener, shared market/pacing state and fault injection"""
+
+    def __init__(self, config: GatewayConfig):
+        self.config = config
+        self.market = FakeMarket(config.seed)
+        self.rng = random.Random(config.seed)
+        self.connections: Set[GatewayConnection] = set()
+        self.client_ids: Set[int] = set()
+        self.lines_used = 0
+        self.hist_times: Deque[float] = deque()
+        self.hist_recent: Dict[tuple, float] = {}
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.next_order_id = 1
+        self.next_perm_id = 100000
+        self.down_until = 0.0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats: Dict[str, Any] = {
+            "started_at": time.time(),
+            "connections": 0,
+            "refused": 0,
+            "disconnects": 0,
+            "orders": 0,
+            "historical_requests": 0,
+            "messages": {},
+            "violations": {"historical_pacing": 0, "message_rate": 0, "market_data_lines": 0},
+            "message_rate_by_client": {}
+        }
+
+    async def delay(self):
+        cfg = self.config
+        if cfg.latency_ms or cfg.jitter_ms:
+            await asyncio.sleep((cfg.latency_ms + self.rng.random() * cfg.jitter_ms) / 1000)
+
+    def is_quiet(self, contract: FakeContract) -> bool:
+        return (_crc(f"{self.config.seed}:{contract.con_id}") % 10000) < self.config.quiet_pct * 100
+
+    def take_line(self) -> bool:
+        if self.lines_used >= self.config.max_lines:
+            return False
+        self.lines_used += 1
+        return True
+
+    def release_lines(self, count: int):
+        self.lines_used = max(self.lines_used - count, 0)
+
+    def take_historical(self, key: tuple) -> bool:
+        """IB's historical pacing rules; False means the request is a violation"""
+        now = time.monotonic()
+        cfg = self.config
+        while self.hist_times and now - self.hist_times[0] > cfg.hist_window:
+            self.hist_times.popleft()
+        last = self.hist_recent.get(key)
+        self.stats["historical_requests"] += 1
+        if len(self.hist_times) >= cfg.hist_max_requests or (last and now - last < cfg.hist_identical_spacing):
+            return False
+        self.hist_times.append(now)
+        self.hist_recent[key] = now
+        return True
+
+    def positions(self) -> List[Tuple[FakeContract, float, float]]:
+        """A small fixed book: two stocks and a short call"""
+        market = self.market
+        aapl, msft = market.stock("AAPL"), market.stock("MSFT")
+        expiry = market.expirations("AAPL")[3]
+        strikes = market.strikes("AAPL")
+        call = market.option("AAPL", expiry, strikes[len(strikes) * 2 // 3], "C")
+        return [(aapl, 100.0, market.base_price("AAPL") * 0.95), (msft, 50.0, market.base_price("MSFT")),
+                (call, -2.0, 150.0)]
+
+    def account_values(self) -> Dict[str, str]:
+        return {
+            "NetLiquidation": "250000.00",
+            "TotalCashValue": "120000.00",
+            "BuyingPower": "480000.00",
+            "AvailableFunds": "118000.00",
+            "ExcessLiquidity": "119000.00",
+            "InitMarginReq": "60000.00",
+            "MaintMarginReq": "52000.00",
+            "GrossPositionValue": "130000.00",
+            "UnrealizedPnL": "310.25",
+            "RealizedPnL": "0.00",
+            "AccountType": "INDIVIDUAL",
+        }
+
+    async def on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if time.monotonic() < self.down_until:
+            self.stats["refused"] += 1
+            writer.close()
+            return
+        self.stats["connections"] += 1
+        conn = GatewayConnection(self, reader, writer)
+        self.connections.add(conn)
+        await conn.run()
+
+    async def disconnect_loop(self):
+        """Drop every client periodically, optionally refusing reconnects for a while (gateway restart)"""
+        while True:
+            await asyncio.sleep(self.config.disconnect_every)
+            logger.info(f"Injecting disconnect of {len(self.connections)} clients (down {self.config.down_for}s)")
+            self.stats["disconnects"] += 1
+            self.down_until = time.monotonic() + self.config.down_for
+            for conn in list(self.connections):
+                conn.close()
+
+    async def on_stats(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP: GET /stats returns counters, GET /reset zeroes them"""
+        try:
+            request = (await reader.readline()).decode().split()
+            while (await reader.readline()).strip():
+                pass
+            if len(request) >= 2 and request[1].startswith("/reset"):
+                self.reset_stats()
+            body = json.dumps({**self.stats, "lines_used": self.lines_used, "clients": sorted(self.client_ids)}).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n"
+                         b"Connection: close\r\n\r\n" % len(body) + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, stats_port: int = 0):
+        server = await asyncio.start_server(self.on_client, "0.0.0.0", self.config.port)
+        logger.info(f"Fake IB gateway listening on :{self.config.port} (server version {SERVER_VERSION}, seed {self.config.seed})")
+        if stats_port:
+            await asyncio.start_server(self.on_stats, "0.0.0.0", stats_port)
+            logger.info(f"Stats on http://0.0.0.0:{stats_port}/stats")
+        if self.config.disconnect_every > 0:
+            asyncio.create_task(self.disconnect_loop())
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic fake IB gateway for load testing")
+    parser.add_argument("--port", type=int, default=int(os.getenv("FAKE_IB_PORT", "4002")))
+    parser.add_argument("--stats-port", type=int, default=int(os.getenv("FAKE_IB_STATS_PORT", "4080")))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base delay before each response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform extra delay on top of --latency-ms")
+    parser.add_argument("--tick-interval", type=float, default=0.25, help="Seconds between streaming quote updates")
+    parser.add_argument("--max-lines", type=int, default=100, help="Market data lines before error 101")
+    parser.add_argument("--max-msg-rate", type=int, default=50, help="Messages/second per client before error 100")
+    parser.add_argument("--hist-max-requests", type=int, default=60)
+    parser.add_argument("--hist-window", type=float, default=600.0)
+    parser.add_argument("--hist-identical-spacing", type=float, default=15.0)
+    parser.add_argument("--quiet-pct", type=float, default=0.0, help="Percent of contracts that never tick")
+    parser.add_argument("--fill-delay", type=float, default=0.2, help="Seconds before marketable orders fill")
+    parser.add_argument("--disconnect-every", type=float, default=0.0, help="Seconds between forced disconnects (0 = never)")
+    parser.add_argument("--down-for", type=float, default=0.0, help="Seconds to refuse connections after a disconnect")
+    args = parser.parse_args()
+
+    config = GatewayConfig(**{k: v for k, v in vars(args).items() if k != "stats_port"})
+    try:
+        asyncio.run(FakeGateway(config).serve(args.stats_port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
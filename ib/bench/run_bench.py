@@ -0,0 +1,312 @@
+"""
+Load-test runner for the IB server
+
+Drives /mcp and /options/* at a fixed concurrency for a fixed duration (or
+request count) with a weighted scenario mix, then reports p50/p95/p99
+latency, throughput, errors and pacing violations per scenario. Pacing
+violations are counted from responses and, with --gateway-stats, from the
+fake gateway's counters (see fake_gateway.py).
+
+Usage:
+    python3 run_bench.py --url http://localhost:8000 --concurrency 20 --duration 30 \\
+        --mix quote=4,expirations=2,chain=1,mcp=2,history=1 --symbols AAPL,MSFT,SPY \\
+        --gateway-stats http://localhost:4080/stats --fail-p95-ms 2000
+
+Requires httpx (pip install httpx).
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+
+# ============================================================================
+# Scenarios
+# ============================================================================
+
+def _mcp_call(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": name, "arguments": arguments}}
+
+
+# name -> builder(symbol, expiration) returning (method, path, json body)
+SCENARIOS: Dict[str, Callable[[str, str], Tuple[str, str, Optional[Dict[str, Any]]]]] = {
+    "quote": lambda sym, exp: ("GET", f"/options/quote/{sym}", None),
+    "expirations": lambda sym, exp: ("GET", f"/options/expirations/{sym}", None),
+    "chain": lambda sym, exp: ("GET", f"/options/chain/{sym}/{exp}?strikes=10", None),
+    "mcp": lambda sym, exp: ("POST", "/mcp", _mcp_call("get_account_summary", {})),
+    "history": lambda sym, exp: ("POST", "/mcp", _mcp_call(
+        "get_historical_data", {"symbol": sym, "duration": "1 D", "bar_size": "5 mins"}
+    )),
+    "health": lambda sym, exp: ("GET", "/health", None),
+}
+
+
+def response_error(status: int, body: Any) -> Optional[str]:
+    """Error text for a failed call: HTTP status, top-level "error", or MCP isError"""
+    if status >= 400:
+        return f"HTTP {status}"
+    if isinstance(body, dict):
+        if body.get("error"):
+            error = body["error"]
+            return error.get("message", str(error)) if isinstance(error, dict) else str(error)
+        result = body.get("result")
+        if isinstance(result, dict) and result.get("isError"):
+            content = result.get("content") or [{}]
+            return str(content[0].get("text", "MCP tool error"))
+    return None
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+@dataclass
+class ScenarioStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    pacing: int = 0
+    error_samples: List[str] = field(default_factory=list)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class BenchRunner:
+    def __init__(
+        self,
+        url: str,
+        concurrency: int,
+        duration: float,
+        requests: int,
+        mix: Dict[str, float],
+        symbols: List[str],
+        timeout: float,
+        seed: int
+    ):
+        self.url = url.rstrip("/")
+        self.concurrency = concurrency
+        self.duration = duration
+        self.requests = requests
+        self.mix = mix
+        self.symbols = symbols
+        self.timeout = timeout
+        self.seed = seed
+        self.stats: Dict[str, ScenarioStats] = {name: ScenarioStats() for name in mix}
+        self.expirations: Dict[str, str] = {}
+        self.issued = 0
+
+    async def prepare(self, client: httpx.AsyncClient):
+        """Nearest expiration per symbol for chain requests (not timed)"""
+        if "chain" not in self.mix:
+            return
+        for symbol in self.symbols:
+            try:
+                resp = await client.get(f"/options/expirations/{symbol}")
+                expirations = resp.json().get("expirations") or []
+                if expirations:
+                    self.expirations[symbol] = str(expirations[0])
+            except Exception as e:
+                print(f"Could not load expirations for {symbol}: {e}", file=sys.stderr)
+        missing = [s for s in self.symbols if s not in self.expirations]
+        if missing:
+            print(f"No expirations for {missing}; chain requests will use the others", file=sys.stderr)
+
+    async def worker(self, client: httpx.AsyncClient, worker_id: int, deadline: float):
+        rng = random.Random(self.seed * 1000 + worker_id)
+        names = list(self.mix)
+        weights = [self.mix[n] for n in names]
+        while time.monotonic() < deadline:
+            if self.requests and self.issued >= self.requests:
+                return
+            self.issued += 1
+            name = rng.choices(names, weights)[0]
+            symbols = [s for s in self.symbols if s in self.expirations] if name == "chain" else self.symbols
+            if not symbols:
+                continue
+            symbol = rng.choice(symbols)
+            method, path, body = SCENARIOS[name](symbol, self.expirations.get(symbol, ""))
+            stats = self.stats[name]
+            start = time.perf_counter()
+            try:
+                resp = await client.request(method, path, json=body)
+                elapsed = time.perf_counter() - start
+                try:
+                    payload = resp.json()
+                except ValueError:
+                    payload = resp.text
+                error = response_error(resp.status_code, payload)
+            except httpx.HTTPError as e:
+                elapsed = time.perf_counter() - start
+                error = f"{type(e).__name__}: {e}"
+            stats.latencies.append(elapsed * 1000)
+            if error:
+                stats.errors += 1
+                if "pacing" in error.lower():
+                    stats.pacing += 1
+                if len(stats.error_samples) < 5:
+                    stats.error_samples.append(error[:200])
+
+    async def run(self) -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.url, timeout=self.timeout, limits=limits) as client:
+            await self.prepare(client)
+            started = time.monotonic()
+            deadline = started + self.duration if self.duration else float("inf")
+            await asyncio.gather(*[self.worker(client, i, deadline) for i in range(self.concurrency)])
+            wall = time.monotonic() - started
+        return self.report(wall)
+
+    def report(self, wall: float) -> Dict[str, Any]:
+        scenarios = {}
+        everything: List[float] = []
+        for name, stats in self.stats.items():
+            values = sorted(stats.latencies)
+            everything.extend(values)
+            scenarios[name] = {
+                "requests": len(values),
+                "errors": stats.errors,
+                "pacing_violations": stats.pacing,
+                "throughput": round(len(values) / wall, 2) if wall else 0.0,
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2) if values else 0.0,
+                "error_samples": stats.error_samples
+            }
+        everything.sort()
+        return {
+            "config": {
+                "url": self.url,
+                "concurrency": self.concurrency,
+                "duration": self.duration,
+                "requests": self.requests,
+                "mix": self.mix,
+                "symbols": self.symbols,
+                "seed": self.seed
+            },
+            "wall_seconds": round(wall, 3),
+            "total": {
+                "requests": len(everything),
+                "errors": sum(s["errors"] for s in scenarios.values()),
+                "pacing_violations": sum(s["pacing_violations"] for s in scenarios.values()),
+                "throughput": round(len(everything) / wall, 2) if wall else 0.0,
+                "p50_ms": round(percentile(everything, 50), 2),
+                "p95_ms": round(percentile(everything, 95), 2),
+                "p99_ms": round(percentile(everything, 99), 2)
+            },
+            "scenarios": scenarios
+        }
+
+
+async def fetch_json(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            return (await client.get(url)).json()
+    except Exception as e:
+        print(f"Could not fetch {url}: {e}", file=sys.stderr)
+        return None
+
+
+def gateway_violations(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+    if not before or not after:
+        return None
+    return {k: after["violations"].get(k, 0) - before["violations"].get(k, 0) for k in after["violations"]}
+
+
+def print_table(report: Dict[str, Any]):
+    header = f"{'scenario':<12} {'reqs':>7} {'err':>5} {'pace':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["scenarios"].items()) + [("TOTAL", {**report["total"], "max_ms": 0.0})]
+    for name, s in rows:
+        print(f"{name:<12} {s['requests']:>7} {s['errors']:>5} {s['pacing_violations']:>5} {s['throughput']:>8.1f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}")
+    if report.get("gateway_violations") is not None:
+        print(f"gateway violations: {report['gateway_violations']}")
+    for name, s in report["scenarios"].items():
+        for sample in s["error_samples"]:
+            print(f"  {name}: {sample}")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r} (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the IB server's /mcp and /options endpoints")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (0 = until --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = no limit)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("quote=4,expirations=2,chain=1,mcp=2,history=1"))
+    parser.add_argument("--symbols", default="AAPL,MSFT,SPY,QQQ,NVDA")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--gateway-stats", default="", help="Fake gateway stats URL, e.g. http://localhost:4080/stats")
+    parser.add_argument("--json", dest="json_path", default="", help="Also write the report as JSON to this path")
+    parser.add_argument("--fail-p95-ms", type=float, default=0.0, help="Exit 1 if overall p95 exceeds this")
+    parser.add_argument("--fail-error-rate", type=float, default=0.0, help="Exit 1 if errors/requests exceeds this")
+    parser.add_argument("--fail-on-pacing", action="store_true", help="Exit 1 on any pacing violation")
+    args = parser.parse_args()
+    if not args.duration and not args.requests:
+        parser.error("Set --duration or --requests")
+
+    runner = BenchRunner(
+        url=args.url,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        requests=args.requests,
+        mix=args.mix,
+        symbols=[s.strip().upper() for s in args.symbols.split(",") if s.strip()],
+        timeout=args.timeout,
+        seed=args.seed
+    )
+
+    async def run():
+        before = await fetch_json(args.gateway_stats) if args.gateway_stats else None
+        report = await runner.run()
+        after = await fetch_json(args.gateway_stats) if args.gateway_stats else None
+        report["gateway_violations"] = gateway_violations(before, after)
+        report["server_health"] = await fetch_json(f"{runner.url}/health")
+        return report
+
+    report = asyncio.run(run())
+    print_table(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    total = report["total"]
+    failures = []
+    if args.fail_p95_ms and total["p95_ms"] > args.fail_p95_ms:
+        failures.append(f"p95 {total['p95_ms']}ms > {args.fail_p95_ms}ms")
+    if args.fail_error_rate and total["requests"] and total["errors"] / total["requests"] > args.fail_error_rate:
+        failures.append(f"error rate {total['errors'] / total['requests']:.3f} > {args.fail_error_rate}")
+    gateway = report["gateway_violations"] or {}
+    if args.fail_on_pacing and (total["pacing_violations"] or any(gateway.values())):
+        failures.append(f"pacing violations: responses={total['pacing_violations']} gateway={gateway}")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,18 +12,38 @@ Enhanced with:
 - Retry with exponential backoff
 - Gateway control (login/logout) for TWS session management
 - Direct ib_async connection for options data (reqSecDefOptParams)
+- Shared, reference-counted market data subscriptions (no per-quote sleep)
+- Central governor for IB message rate, market data lines and historical pacing
+- Native in-process hot MCP tools with structured JSON (worker pool as fallback)
+- Local columnar historical bar store (only missing ranges go to IB)
+- Vectorized Black-Scholes IV and greeks for chains without IB modelGreeks
+- Event-driven account/portfolio snapshot and shared reqCurrentTime liveness probe
+- Portfolio risk: position greeks and price/vol shock grid in one array pass
+- Async Docker Engine API client; gateway container state pushed from /events
+- Watchlist cache pre-warming (contracts, option params, near-ATM lines) at startup and on a schedule
+- Versioned chain snapshots: since=<version> polls return only changed strikes
+- Opt-in columnar chain payloads (parallel arrays) via orjson or MessagePack
+- Bulk multi-symbol quotes: one qualify batch, one wait, historical fallback for stragglers
 """
 import os
 import json
+import math
+import copy
 import asyncio
 import time
 import socket
+import sqlite3
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional, Union, List
+from typing import Dict, Any, Optional, Union, List, Callable, Deque
+from collections import deque
+from urllib.parse import quote
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import logging
+import numpy as np
 import ib_async as ib
 
 logging.basicConfig(level=logging.INFO)
@@ -37,15 +57,1303 @@ IB_CLIENT_ID_BASE = int(os.getenv("IB_CLIENT_ID", "1"))
 POOL_SIZE = int(os.getenv("IB_POOL_SIZE", "3"))
 HEALTH_CHECK_INTERVAL = int(os.getenv("HEALTH_CHECK_INTERVAL", "30"))
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "2"))
+WORKER_MAX_INFLIGHT = int(os.getenv("WORKER_MAX_INFLIGHT", "8"))  # Concurrent JSON-RPC calls per worker
+
+# Worker pool autoscaling (IB_POOL_SIZE is the starting size)
+IB_POOL_MIN = int(os.getenv("IB_POOL_MIN", "1"))
+IB_POOL_MAX = int(os.getenv("IB_POOL_MAX", str(max(POOL_SIZE, 6))))
+SCALE_INTERVAL = float(os.getenv("SCALE_INTERVAL", "15"))  # Seconds between scaling decisions
+SCALE_UP_WAIT_MS = float(os.getenv("SCALE_UP_WAIT_MS", "250"))  # p95 slot wait that triggers scale-up
+SCALE_UP_P95_MS = float(os.getenv("SCALE_UP_P95_MS", "5000"))  # p95 call latency that triggers scale-up when busy
+SCALE_DOWN_IDLE = float(os.getenv("SCALE_DOWN_IDLE", "600"))  # Seconds of low load before removing a worker
+SCALE_DRAIN_TIMEOUT = float(os.getenv("SCALE_DRAIN_TIMEOUT", "60"))  # Max seconds to drain a worker
+CLIENT_ID_QUARANTINE = float(os.getenv("CLIENT_ID_QUARANTINE", "10"))  # Seconds before a freed client id is reused
+IB_POOL_SPARES = int(os.getenv("IB_POOL_SPARES", "1"))  # Initialized hot-spare workers kept outside the pool
+WORKER_RESTART_WAIT = float(os.getenv("WORKER_RESTART_WAIT", "5"))  # Max seconds a request waits on a worker restart
 
 # Options-specific configuration (longer timeouts for options data)
 OPTIONS_TIMEOUT = int(os.getenv("OPTIONS_TIMEOUT", "120"))  # 2 minutes for options chains
 OPTIONS_CLIENT_ID = int(os.getenv("OPTIONS_CLIENT_ID", "99"))  # Dedicated client ID for options
 
 # Gateway control configuration
-# Uses Docker to control the gateway container
+# Uses the Docker Engine API (unix socket) to control the gateway container
 GATEWAY_CONTAINER = os.getenv("GATEWAY_CONTAINER", "mcp-ib-gateway")
-DOCKER_SOCKET = "/var/run/docker.sock"
+DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+DOCKER_API_VERSION = os.getenv("DOCKER_API_VERSION", "v1.41")  # Docker Engine 20.10+
+DOCKER_STOP_TIMEOUT = int(os.getenv("DOCKER_STOP_TIMEOUT", "10"))  # Seconds Docker waits before killing on stop/restart
+
+# Shared market data subscriptions (see MarketDataManager)
+MKT_DATA_TTL = float(os.getenv("MKT_DATA_TTL", "120"))  # Idle seconds before a line is cancelled
+MKT_DATA_MAX_LINES = int(os.getenv("MKT_DATA_MAX_LINES", "90"))  # Stay under IB's default 100 lines
+MKT_DATA_LINE_WAIT = float(os.getenv("MKT_DATA_LINE_WAIT", "30"))  # Max seconds to queue for free lines
+MKT_DATA_WARMUP = float(os.getenv("MKT_DATA_WARMUP", "2"))  # Max seconds to wait for a new subscription to fill
+CHAIN_DATA_TIMEOUT = float(os.getenv("CHAIN_DATA_TIMEOUT", "3"))  # Default per-request chain data deadline
+CHAIN_SNAPSHOT_MAX = int(os.getenv("CHAIN_SNAPSHOT_MAX", "256"))  # Chains tracked for since=<version> deltas
+
+# Contract qualification cache (see ContractCache)
+CONTRACT_CACHE_PATH = os.getenv("CONTRACT_CACHE_PATH", "/app/config/contracts.db")  # Empty = memory only
+CONTRACT_CACHE_MAX_AGE = float(os.getenv("CONTRACT_CACHE_MAX_AGE", "7")) * 86400  # Days before re-qualifying
+
+# Option chain parameter cache: seconds, or "session" to keep until the next 09:30 ET open
+OPTION_PARAMS_TTL = os.getenv("OPTION_PARAMS_TTL", "session")
+OPTION_PARAMS_PREOPEN = float(os.getenv("OPTION_PARAMS_PREOPEN", "900"))  # Session fetches this close to the open count for it
+
+# Watchlist cache pre-warming (see CacheWarmer)
+WARM_SYMBOLS = os.getenv("WARM_SYMBOLS", "")  # Comma-separated watchlist, e.g. "SPY,QQQ,AAPL"
+WARM_WATCHLIST_PATH = os.getenv("WARM_WATCHLIST_PATH", "/app/config/watchlist.json")  # Used instead when the file exists
+WARM_EXPIRY_DAYS = int(os.getenv("WARM_EXPIRY_DAYS", "45"))  # Qualify expirations up to this many days out
+WARM_STRIKES = int(os.getenv("WARM_STRIKES", "10"))  # Strikes on each side of ATM to qualify
+WARM_TIMES = os.getenv("WARM_TIMES", "09:25")  # Comma-separated HH:MM America/New_York on weekdays (plus startup)
+WARM_LINE_SHARE = float(os.getenv("WARM_LINE_SHARE", "0.5"))  # Fraction of market data lines warming may open
+WARM_HOLD = float(os.getenv("WARM_HOLD", "900"))  # Seconds pre-subscribed idle lines outlive MKT_DATA_TTL
+
+# Option pricing engine (local IV/greeks when IB sends no modelGreeks)
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.04"))  # Annual, continuously compounded
+DIVIDEND_YIELD = float(os.getenv("DIVIDEND_YIELD", "0"))  # Annual continuous yield
+SURFACE_TTL = float(os.getenv("SURFACE_TTL", "30"))  # Seconds an IV surface is shared between consumers
+RISK_IV_TTL = float(os.getenv("RISK_IV_TTL", "60"))  # Seconds portfolio risk reuses solved IVs while prices move
+
+# Account state: seconds a successful reqCurrentTime liveness probe is reused
+LIVENESS_PROBE_TTL = float(os.getenv("LIVENESS_PROBE_TTL", "5"))
+
+# Order tracking
+ORDER_ACK_TIMEOUT = float(os.getenv("ORDER_ACK_TIMEOUT", "1"))  # Default max wait for IB to acknowledge an order
+ORDER_EVENTS_MAX = int(os.getenv("ORDER_EVENTS_MAX", "1000"))  # Order events kept for long-poll/SSE catch-up
+
+# Request coalescing: identical concurrent reads share one call; optional result reuse
+COALESCE_TTL = float(os.getenv("COALESCE_TTL", "0"))  # Seconds to reuse a result (0 = in-flight only)
+
+# Historical bar store configuration
+BAR_STORE_PATH = os.getenv("BAR_STORE_PATH", "/app/config/bars")  # Empty = memory only
+HIST_REQUEST_TIMEOUT = float(os.getenv("HIST_REQUEST_TIMEOUT", "60"))  # Seconds before a bar fetch counts as failed
+
+# IB request governor (see IBGovernor) - IB allows ~50 msgs/s and 60 historical requests per 10 min
+IB_MSG_RATE = float(os.getenv("IB_MSG_RATE", "45"))  # Sustained messages per second
+IB_MSG_BURST = float(os.getenv("IB_MSG_BURST", "45"))  # Bucket size
+HIST_MAX_REQUESTS = int(os.getenv("HIST_MAX_REQUESTS", "60"))  # Historical requests per window
+HIST_WINDOW = float(os.getenv("HIST_WINDOW", "600"))  # Historical pacing window (seconds)
+HIST_IDENTICAL_SPACING = float(os.getenv("HIST_IDENTICAL_SPACING", "15"))  # Min gap between identical requests
+
+
+# ============================================================================
+# IB Request Governor
+# Message-rate, market-data-line and historical-pacing budgets shared by
+# every IB call path (options client, orders client, worker pool)
+# ============================================================================
+
+class WaitStats:
+    """Queue depth and wait-time accounting for a governor budget"""
+
+    def __init__(self):
+        self.waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float) -> None:
+        self.acquired += 1
+        if waited > 0.001:
+            self.delayed += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "avg_wait_ms": round(1000 * self.total_wait / self.delayed, 1) if self.delayed else 0.0,
+            "max_wait_ms": round(1000 * self.max_wait, 1)
+        }
+
+
+class TokenBucket:
+    """
+    Token bucket for IB's message rate limit.
+
+    Requests larger than the bucket are allowed once it is full and leave it
+    in debt, so a 50-contract qualification batch is paced rather than refused.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.stats = WaitStats()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, n: float = 1) -> None:
+        """Wait until `n` messages may be sent"""
+        start = time.monotonic()
+        self.stats.waiting += 1
+        try:
+            async with self._lock:  # FIFO: one waiter drains the bucket at a time
+                self._refill()
+                need = min(n, self.burst)
+                if self._tokens < need:
+                    await asyncio.sleep((need - self._tokens) / self.rate)
+                    self._refill()
+                self._tokens -= n
+        finally:
+            self.stats.waiting -= 1
+        self.stats.record(time.monotonic() - start)
+
+    def consume(self, n: float = 1) -> None:
+        """Account for messages sent from synchronous code (e.g. cancelMktData)"""
+        self._refill()
+        self._tokens -= n
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {"rate": self.rate, "tokens": round(self._tokens, 1), **self.stats.get_stats()}
+
+
+class LineBudget:
+    """
+    Semaphore-style budget for concurrent market data lines.
+
+    Reservations are all-or-nothing and served FIFO. When the budget is full,
+    registered reclaimers are asked to cancel idle lines (rotation) before a
+    request is queued until lines are released.
+    """
+
+    def __init__(self, max_lines: int):
+        self.max_lines = max_lines
+        self.in_use = 0
+        self._waiters: Deque[tuple] = deque()
+        self._reclaimers: List[Callable[[int], None]] = []
+        self._waking = False
+        self.stats = WaitStats()
+
+    def add_reclaimer(self, reclaimer: Callable[[int], None]) -> None:
+        """Register a callback that cancels up to n idle lines (calling release)"""
+        self._reclaimers.append(reclaimer)
+
+    def _try_take(self, n: int) -> bool:
+        free = self.max_lines - self.in_use
+        if free < n:
+            for reclaimer in self._reclaimers:
+                reclaimer(n - (self.max_lines - self.in_use))
+                if self.max_lines - self.in_use >= n:
+                    break
+        if self.max_lines - self.in_use >= n:
+            self.in_use += n
+            return True
+        return False
+
+    async def reserve(self, n: int, timeout: Optional[float] = None) -> None:
+        """Reserve `n` lines, queueing until they are free"""
+        if n > self.max_lines:
+            raise ValueError(f"Cannot reserve {n} market data lines (budget {self.max_lines})")
+        start = time.monotonic()
+        if not self._waiters and self._try_take(n):
+            self.stats.record(0)
+            return
+
+        entry = (n, asyncio.get_running_loop().create_future())
+        self._waiters.append(entry)
+        self.stats.waiting += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(entry[1]), timeout=timeout)
+        except BaseException:
+            if entry[1].done() and not entry[1].cancelled():
+                self.release(n)  # Granted just as we gave up
+            else:
+                entry[1].cancel()
+                self._wake()
+            raise
+        finally:
+            self.stats.waiting -= 1
+        self.stats.record(time.monotonic() - start)
+
+    def release(self, n: int = 1) -> None:
+        """Return lines to the budget and wake queued reservations"""
+        self.in_use = max(0, self.in_use - n)
+        self._wake()
+
+    def notify_idle(self) -> None:
+        """Lines became idle (reclaimable); let queued reservations rotate them out"""
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._waking:
+            return  # Reclaimers release lines from inside _try_take
+        self._waking = True
+        try:
+            while self._waiters:
+                n, future = self._waiters[0]
+                if future.done():
+                    self._waiters.popleft()
+                    continue
+                if not self._try_take(n):
+                    break
+                self._waiters.popleft()
+                future.set_result(True)
+        finally:
+            self._waking = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"max_lines": self.max_lines, "in_use": self.in_use, **self.stats.get_stats()}
+
+
+class HistoricalPacer:
+    """
+    IB historical data pacing: at most `max_requests` per `window` seconds and
+    no identical request within `identical_spacing` seconds. Requests queue
+    FIFO until they can go out without a pacing violation.
+    """
+
+    def __init__(self, max_requests: int, window: float, identical_spacing: float):
+        self.max_requests = max_requests
+        self.window = window
+        self.identical_spacing = identical_spacing
+        self._sent: Deque[float] = deque()
+        self._last_identical: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self.stats = WaitStats()
+
+    async def acquire(self, key: str) -> None:
+        """Wait until a historical request identified by `key` may be sent"""
+        start = time.monotonic()
+        self.stats.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    while self._sent and now - self._sent[0] >= self.window:
+                        self._sent.popleft()
+                    delay = 0.0
+                    if len(self._sent) >= self.max_requests:
+                        delay = self._sent[0] + self.window - now
+                    last = self._last_identical.get(key)
+                    if last is not None:
+                        delay = max(delay, last + self.identical_spacing - now)
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self._sent.append(now)
+                self._last_identical[key] = now
+                # Forget identical-request stamps that no longer matter
+                if len(self._last_identical) > 4 * self.max_requests:
+                    cutoff = now - self.identical_spacing
+                    self._last_identical = {k: t for k, t in self._last_identical.items() if t >= cutoff}
+        finally:
+            self.stats.waiting -= 1
+        self.stats.record(time.monotonic() - start)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        recent = sum(1 for t in self._sent if now - t < self.window)
+        return {
+            "window_requests": recent,
+            "max_requests": self.max_requests,
+            "window": self.window,
+            **self.stats.get_stats()
+        }
+
+
+class IBGovernor:
+    """Central IB budgets: message rate, market data lines, historical pacing"""
+
+    def __init__(self):
+        self.messages = TokenBucket(IB_MSG_RATE, IB_MSG_BURST)
+        self.lines = LineBudget(MKT_DATA_MAX_LINES)
+        self.historical = HistoricalPacer(HIST_MAX_REQUESTS, HIST_WINDOW, HIST_IDENTICAL_SPACING)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages.get_stats(),
+            "market_data_lines": self.lines.get_stats(),
+            "historical": self.historical.get_stats()
+        }
+
+
+# Global governor shared by every IB call path
+governor = IBGovernor()
+
+
+# ============================================================================
+# Request Coalescing
+# Identical concurrent read-only requests share one in-flight call
+# ============================================================================
+
+class RequestCoalescer:
+    """
+    Single-flight execution keyed by normalized method + arguments.
+
+    Callers with the same key while a call is in flight await that call's
+    result instead of starting another. With `ttl` > 0, successful results
+    are also reused for that many seconds. Dict/list results are copied per
+    caller so one caller's changes never leak into another's response.
+    """
+
+    def __init__(self, ttl: float = COALESCE_TTL, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._results: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.by_method: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key_for(method: str, *args: Any) -> str:
+        return json.dumps([method, *args], sort_keys=True, default=str)
+
+    @property
+    def inflight_count(self) -> int:
+        """Number of distinct calls currently in flight"""
+        return len(self._inflight)
+
+    def _count(self, method: str, outcome: str) -> None:
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        counts = self.by_method.setdefault(method, {"hits": 0, "misses": 0, "coalesced": 0})
+        counts[outcome] += 1
+
+    async def run(
+        self,
+        method: str,
+        args: tuple,
+        factory: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda result: not (isinstance(result, dict) and "error" in result)
+    ) -> Any:
+        """Await `factory()` once per key; `cacheable(result)` decides whether the TTL applies"""
+        key = self.key_for(method, *args)
+        if self.ttl > 0:
+            cached = self._results.get(key)
+            if cached is not None and time.monotonic() < cached[0]:
+                self._count(method, "hits")
+                return copy.deepcopy(cached[1]) if isinstance(cached[1], (dict, list)) else cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._count(method, "misses")
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+
+            def done(t: asyncio.Task) -> None:
+                self._inflight.pop(key, None)
+                if self.ttl > 0 and not t.cancelled() and t.exception() is None and cacheable(t.result()):
+                    if len(self._results) >= self.max_entries:
+                        now = time.monotonic()
+                        self._results = {k: v for k, v in self._results.items() if v[0] > now}
+                    self._results[key] = (time.monotonic() + self.ttl, t.result())
+
+            task.add_done_callback(done)
+        else:
+            self._count(method, "coalesced")
+        # Shield so one caller giving up doesn't cancel the call for the others
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result) if isinstance(result, (dict, list)) else result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ttl": self.ttl,
+            "inflight": self.inflight_count,
+            "cached": len(self._results),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "by_method": self.by_method
+        }
+
+
+# Global coalescer for OptionsClient reads and MCP tool calls
+coalescer = RequestCoalescer()
+
+
+# ============================================================================
+# Shared Market Data Subscriptions
+# Reference-counted, TTL-evicted live tickers keyed by conId
+# ============================================================================
+
+@dataclass
+class MarketDataSubscription:
+    """A single streaming reqMktData line shared between callers"""
+    contract: ib.Contract
+    ticker: ib.Ticker
+    subscribed_at: float
+    refcount: int = 0
+    last_used: float = 0
+    keep_until: float = 0  # Pre-warmed lines skip the idle TTL until then
+
+
+class MarketDataManager:
+    """
+    Shares live market data subscriptions between requests.
+
+    Each qualified contract (keyed by conId) gets at most one streaming
+    reqMktData line. Callers acquire it for the duration of a request and
+    release it afterwards; the line is only cancelled once nobody holds it
+    and it has been idle for `ttl` seconds. Repeated or concurrent quotes for
+    the same contract are answered from the in-memory Ticker without a new
+    subscription or warm-up wait.
+    """
+
+    def __init__(self, ttl: float = MKT_DATA_TTL, warmup: float = MKT_DATA_WARMUP):
+        self.ttl = ttl
+        self.warmup = warmup
+        self._ib: Optional[ib.IB] = None
+        self._subs: Dict[int, MarketDataSubscription] = {}
+        self._sweep_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Idle lines are rotated out when the shared line budget runs short
+        governor.lines.add_reclaimer(self._reclaim)
+
+    @property
+    def max_lines(self) -> int:
+        return governor.lines.max_lines
+
+    def bind(self, ib_conn: ib.IB) -> None:
+        """Attach to a (re)connected IB instance. Old lines died with the old socket."""
+        if ib_conn is self._ib:
+            return
+        dropped = len(self._subs)
+        self._subs.clear()
+        self._ib = ib_conn
+        if dropped:
+            governor.lines.release(dropped)
+        # Market data type 4 = delayed frozen data (available without subscription)
+        self._ib.reqMarketDataType(4)
+
+    async def acquire_many(self, contracts: List[ib.Contract]) -> List[ib.Ticker]:
+        """Get live tickers for qualified contracts, subscribing within the line budget"""
+        unique = {c.conId: c for c in contracts}
+        if len(unique) > governor.lines.max_lines:
+            raise ValueError(f"Cannot hold {len(unique)} market data lines at once (budget {governor.lines.max_lines})")
+
+        # Reserve lines for the missing contracts before pinning anything: pinned
+        # lines can't be reclaimed, so queueing while holding them could wait on
+        # our own lines. If some of our lines were rotated out while we queued,
+        # give the reservation back and queue again for the larger count.
+        deadline = time.monotonic() + MKT_DATA_LINE_WAIT
+        reserved = 0
+        while True:
+            now = time.time()
+            for con_id in unique:
+                sub = self._subs.get(con_id)
+                if sub is not None:
+                    sub.last_used = now  # Rotation prefers other idle lines while we queue
+            needed = sum(1 for con_id in unique if con_id not in self._subs)
+            if needed == 0:
+                break
+            await governor.lines.reserve(needed, timeout=max(0.0, deadline - time.monotonic()))
+            if sum(1 for con_id in unique if con_id not in self._subs) <= needed:
+                reserved = needed
+                break
+            governor.lines.release(needed)
+
+        pinned = []
+        new = []
+        for con_id, contract in unique.items():
+            sub = self._subs.get(con_id)
+            if sub is not None:
+                sub.refcount += 1
+                self.hits += 1
+                pinned.append(contract)
+            else:
+                new.append(contract)
+        if reserved > len(new):
+            governor.lines.release(reserved - len(new))  # Subscribed by a concurrent request while we queued
+
+        if new:
+            try:
+                await governor.messages.acquire(len(new))
+            except BaseException:
+                governor.lines.release(len(new))
+                self.release_many(pinned)
+                raise
+            now = time.time()
+            for contract in new:
+                sub = self._subs.get(contract.conId)
+                if sub is not None:
+                    # Subscribed by a concurrent request while we queued
+                    governor.lines.release(1)
+                    self.hits += 1
+                else:
+                    ticker = self._ib.reqMktData(contract, '', False, False)
+                    sub = MarketDataSubscription(contract=contract, ticker=ticker, subscribed_at=now)
+                    self._subs[contract.conId] = sub
+                    self.misses += 1
+                sub.refcount += 1
+
+        now = time.time()
+        for con_id in unique:
+            self._subs[con_id].last_used = now
+        return [self._subs[c.conId].ticker for c in contracts]
+
+    async def prewarm(self, contracts: List[ib.Contract], hold: float) -> List[ib.Ticker]:
+        """
+        Open lines ahead of demand without competing with live requests.
+
+        Only lines that are free right now are used: warming never queues for
+        the budget or rotates out idle lines. The new lines are left idle, so
+        rotation can take them back for a live request at any time, but the
+        TTL sweep keeps them for `hold` seconds. Returns the tickers of the
+        contracts that are streaming afterwards (already subscribed included).
+        """
+        if self._ib is None:
+            return []
+        budget = governor.lines
+        free = 0 if budget.stats.waiting else budget.max_lines - budget.in_use
+        warm = []
+        for con_id, contract in {c.conId: c for c in contracts}.items():
+            if con_id in self._subs:
+                warm.append(contract)
+            elif free > 0:
+                warm.append(contract)
+                free -= 1
+        if not warm:
+            return []
+
+        tickers = await self.acquire_many(warm)
+        keep_until = time.time() + hold
+        for contract in warm:
+            sub = self._subs[contract.conId]
+            sub.keep_until = max(sub.keep_until, keep_until)
+        self.release_many(warm)
+        return tickers
+
+    def is_streaming(self, con_id: int) -> bool:
+        """Whether a line is currently open for the contract"""
+        return con_id in self._subs
+
+    def release_many(self, contracts: List[ib.Contract]) -> None:
+        """Drop references; lines stay open until the TTL sweep or rotation evicts them"""
+        now = time.time()
+        became_idle = False
+        for con_id in {c.conId for c in contracts}:
+            sub = self._subs.get(con_id)
+            if sub is None:
+                continue
+            sub.refcount = max(0, sub.refcount - 1)
+            sub.last_used = now
+            became_idle = became_idle or sub.refcount == 0
+        if became_idle:
+            governor.lines.notify_idle()
+
+    @asynccontextmanager
+    async def subscribe(
+        self,
+        contracts: List[ib.Contract],
+        ready: Optional[Callable[[ib.Ticker], bool]] = None,
+        timeout: Optional[float] = None,
+        on_settled: Optional[Callable[[ib.Ticker], None]] = None
+    ):
+        """
+        Hold live tickers for the given contracts.
+
+        Waits until every ticker satisfies `ready` (default: has a price) or
+        `timeout` seconds pass. Tickers that are already ready return
+        immediately; tickers that have been streaming longer than `timeout`
+        without becoming ready are quiet contracts and are not waited on again.
+        `on_settled` is called with each ticker as soon as it is ready or
+        known to be quiet; tickers that hit the deadline are not reported.
+
+        Requests wider than the line budget are rotated through it in chunks:
+        each chunk is read and released before the next one subscribes, so
+        the earlier tickers hold their last values rather than streaming.
+        """
+        timeout = self.warmup if timeout is None else timeout
+        chunk_size = governor.lines.max_lines
+        chunks = [contracts[i:i + chunk_size] for i in range(0, len(contracts), chunk_size)]
+        tickers: List[ib.Ticker] = []
+        held: List[ib.Contract] = []
+        try:
+            for i, chunk in enumerate(chunks):
+                chunk_tickers = await self.acquire_many(chunk)
+                held = chunk
+                now = time.time()
+                waiting = []
+                for c, t in zip(chunk, chunk_tickers):
+                    sub = self._subs.get(c.conId)
+                    if sub is not None and now - sub.subscribed_at < timeout:
+                        waiting.append(t)
+                    elif on_settled:
+                        on_settled(t)
+                await self.wait_until_ready(waiting, ready or has_price, timeout, on_settled)
+                tickers.extend(chunk_tickers)
+                if i < len(chunks) - 1:
+                    self.release_many(chunk)
+                    held = []
+            yield tickers
+        finally:
+            self.release_many(held)
+
+    async def wait_until_ready(
+        self,
+        tickers: List[ib.Ticker],
+        ready: Callable[[ib.Ticker], bool],
+        timeout: float,
+        on_ready: Optional[Callable[[ib.Ticker], None]] = None
+    ) -> List[ib.Ticker]:
+        """
+        Wait for tickers to satisfy `ready`, driven by pendingTickersEvent.
+
+        Calls `on_ready` with each ticker as it becomes ready (or right away if
+        it already is). Returns the tickers that were still not ready when the
+        deadline passed.
+        """
+        pending = {}
+        for t in tickers:
+            if not ready(t):
+                pending[id(t)] = t
+            elif on_ready:
+                on_ready(t)
+        if not pending or timeout <= 0 or self._ib is None:
+            return list(pending.values())
+
+        done = asyncio.get_running_loop().create_future()
+
+        def on_pending_tickers(updated):
+            for t in updated:
+                if id(t) in pending and ready(t):
+                    del pending[id(t)]
+                    if on_ready:
+                        on_ready(t)
+            if not pending and not done.done():
+                done.set_result(True)
+
+        self._ib.pendingTickersEvent += on_pending_tickers
+        try:
+            await asyncio.wait_for(done, timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._ib.pendingTickersEvent -= on_pending_tickers
+        return list(pending.values())
+
+    def _cancel(self, con_id: int) -> None:
+        sub = self._subs.pop(con_id, None)
+        if sub is None:
+            return
+        self.evictions += 1
+        try:
+            if self._ib and self._ib.isConnected():
+                governor.messages.consume(1)
+                self._ib.cancelMktData(sub.contract)
+        except Exception as e:
+            logger.debug(f"cancelMktData failed for conId={con_id}: {e}")
+        governor.lines.release(1)
+
+    def _reclaim(self, needed: int) -> None:
+        """Cancel up to `needed` least-recently-used idle lines for the line budget"""
+        idle = sorted(
+            (s for s in self._subs.values() if s.refcount == 0),
+            key=lambda s: s.last_used
+        )
+        for sub in idle[:needed]:
+            self._cancel(sub.contract.conId)
+
+    def evict_idle(self) -> int:
+        """Cancel lines that nobody holds and have been idle longer than the TTL"""
+        now = time.time()
+        cutoff = now - self.ttl
+        stale = [
+            con_id for con_id, s in self._subs.items()
+            if s.refcount == 0 and s.last_used < cutoff and s.keep_until < now
+        ]
+        for con_id in stale:
+            self._cancel(con_id)
+        return len(stale)
+
+    async def start(self) -> None:
+        """Start the background TTL sweep"""
+        if self._sweep_task is None or self._sweep_task.done():
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        """Stop the sweep and cancel every line"""
+        if self._sweep_task and not self._sweep_task.done():
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+        for con_id in list(self._subs):
+            self._cancel(con_id)
+
+    async def _sweep_loop(self) -> None:
+        interval = max(1.0, min(self.ttl / 2, 30.0))
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                evicted = self.evict_idle()
+                if evicted:
+                    logger.debug(f"Market data sweep evicted {evicted} idle lines")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Market data sweep error: {e!r}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get subscription statistics"""
+        return {
+            "lines": len(self._subs),
+            "lines_in_use": sum(1 for s in self._subs.values() if s.refcount > 0),
+            "max_lines": governor.lines.max_lines,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+def _has_value(value: Optional[float]) -> bool:
+    """True if a ticker field has been filled (ib_async defaults to NaN)"""
+    return value is not None and value == value
+
+
+def has_price(ticker: ib.Ticker) -> bool:
+    """Readiness predicate for quotes"""
+    return ticker_price(ticker) is not None
+
+
+def has_option_quote(ticker: ib.Ticker) -> bool:
+    """Readiness predicate for chain rows: bid, ask and model greeks all arrived"""
+    return _has_value(ticker.bid) and _has_value(ticker.ask) and ticker.modelGreeks is not None
+
+
+def _number(value: Any) -> Optional[float]:
+    """Float for finite IB numbers, None for unset/NaN values"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if _has_value(value) else None
+
+
+def ticker_price(ticker: ib.Ticker) -> Optional[float]:
+    """Best available price from a ticker: last, then close, then bid/ask midpoint"""
+    price = ticker.last
+    if not price or price <= 0:
+        price = ticker.close
+    if not price or price <= 0:
+        if ticker.bid and ticker.ask and ticker.bid > 0 and ticker.ask > 0:
+            price = (ticker.bid + ticker.ask) / 2
+    return float(price) if price and price > 0 else None
+
+
+# ============================================================================
+# Contract Qualification Cache
+# conId index persisted to SQLite so known contracts skip qualifyContracts
+# ============================================================================
+
+# Contract fields needed to rebuild a qualified contract without asking IB
+_CONTRACT_FIELDS = (
+    "conId", "symbol", "secType", "lastTradeDateOrContractMonth", "strike", "right",
+    "multiplier", "exchange", "primaryExchange", "currency", "localSymbol", "tradingClass"
+)
+
+
+class ContractCache:
+    """
+    Cache of qualified contracts keyed by (symbol, secType, expiry, strike, right, exchange).
+
+    Held in memory and written through to a local SQLite file so it survives
+    restarts. Option entries are dropped once their expiry has passed; every
+    entry is re-qualified after CONTRACT_CACHE_MAX_AGE.
+    """
+
+    def __init__(self, path: str = CONTRACT_CACHE_PATH, max_age: float = CONTRACT_CACHE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._entries: Dict[tuple, tuple] = {}  # key -> (contract, cached_at)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(contract: ib.Contract) -> tuple:
+        """Cache key from an (unqualified) request contract"""
+        return (
+            (contract.symbol or "").upper(),
+            contract.secType or "",
+            contract.lastTradeDateOrContractMonth or "",
+            float(contract.strike or 0.0),
+            (contract.right or "").upper()[:1],
+            contract.exchange or ""
+        )
+
+    def _is_valid(self, contract: ib.Contract, cached_at: float) -> bool:
+        if time.time() - cached_at > self.max_age:
+            return False
+        expiry = contract.lastTradeDateOrContractMonth
+        if expiry and expiry[:8] < datetime.now().strftime("%Y%m%d"):
+            return False
+        return True
+
+    def get(self, contract: ib.Contract) -> Optional[ib.Contract]:
+        """Look up a qualified contract for a request contract"""
+        key = self.key_for(contract)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        cached, cached_at = entry
+        if not self._is_valid(cached, cached_at):
+            del self._entries[key]
+            return None
+        return cached
+
+    def _put(self, key: tuple, contract: ib.Contract, cached_at: float) -> None:
+        self._entries[key] = (contract, cached_at)
+
+    async def qualify(
+        self,
+        ib_conn: ib.IB,
+        contracts: List[ib.Contract],
+        timeout: float = 30,
+        batch_size: int = 50
+    ) -> List[Optional[ib.Contract]]:
+        """
+        Qualify contracts, asking IB only for the ones not already cached.
+
+        Returns a list aligned with `contracts`; unknown or failed contracts are None.
+        """
+        results: List[Optional[ib.Contract]] = [None] * len(contracts)
+        missing = []
+        for i, contract in enumerate(contracts):
+            cached = self.get(contract)
+            if cached is not None:
+                results[i] = cached
+                self.hits += 1
+            else:
+                missing.append((i, self.key_for(contract), contract))
+                self.misses += 1
+
+        new_rows = []
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            # One reqContractDetails message per contract
+            await governor.messages.acquire(len(batch))
+            try:
+                qualified = await asyncio.wait_for(
+                    ib_conn.qualifyContractsAsync(*[c for _, _, c in batch]),
+                    timeout=timeout
+                )
+            except Exception as e:
+                logger.warning(f"Batch qualification failed: {e}")
+                continue
+            now = time.time()
+            for (i, key, _), contract in zip(batch, qualified):
+                if isinstance(contract, ib.Contract) and contract.conId:
+                    results[i] = contract
+                    self._put(key, contract, now)
+                    new_rows.append((key, contract, now))
+
+        if new_rows and self.path:
+            try:
+                await asyncio.to_thread(self._persist, new_rows)
+            except Exception as e:
+                logger.warning(f"Contract cache persist failed: {e}")
+        return results
+
+    def _connect_db(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS contracts ("
+            "key TEXT PRIMARY KEY, con_id INTEGER, data TEXT, cached_at REAL)"
+        )
+        return db
+
+    def _persist(self, rows: List[tuple]) -> None:
+        db = self._connect_db()
+        try:
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO contracts (key, con_id, data, cached_at) VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            json.dumps(key),
+                            contract.conId,
+                            json.dumps({f: getattr(contract, f) for f in _CONTRACT_FIELDS}),
+                            cached_at
+                        )
+                        for key, contract, cached_at in rows
+                    ]
+                )
+        finally:
+            db.close()
+
+    def _load(self) -> int:
+        db = self._connect_db()
+        try:
+            rows = db.execute("SELECT key, data, cached_at FROM contracts").fetchall()
+            stale = []
+            for key_json, data, cached_at in rows:
+                contract = ib.Contract.create(**json.loads(data))
+                if self._is_valid(contract, cached_at):
+                    self._put(tuple(json.loads(key_json)), contract, cached_at)
+                else:
+                    stale.append((key_json,))
+            if stale:
+                with db:
+                    db.executemany("DELETE FROM contracts WHERE key = ?", stale)
+            return len(stale)
+        finally:
+            db.close()
+
+    async def load(self) -> None:
+        """Load the persisted snapshot, dropping expired entries"""
+        if not self.path:
+            return
+        try:
+            dropped = await asyncio.to_thread(self._load)
+            logger.info(f"Contract cache loaded {len(self._entries)} contracts from {self.path} ({dropped} expired)")
+        except Exception as e:
+            logger.warning(f"Contract cache load failed ({self.path}), continuing in memory: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "persisted": bool(self.path)
+        }
+
+
+# Global contract cache shared by the options and orders clients
+contract_cache = ContractCache()
+
+
+# ============================================================================
+# Option Chain Parameter Cache
+# reqSecDefOptParams results per underlying, shared by expirations and chains
+# ============================================================================
+
+try:
+    from zoneinfo import ZoneInfo
+    _MARKET_TZ = ZoneInfo("America/New_York")
+except Exception:  # tzdata missing - fixed EST offset is close enough for a cache TTL
+    _MARKET_TZ = timezone(timedelta(hours=-5))
+
+
+def next_session_open(now: Optional[datetime] = None) -> datetime:
+    """Next 09:30 America/New_York on a weekday, strictly after `now`"""
+    now = now or datetime.now(_MARKET_TZ)
+    candidate = now.astimezone(_MARKET_TZ).replace(hour=9, minute=30, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+@dataclass
+class OptionParams:
+    """Option chain parameters for one underlying (from reqSecDefOptParams)"""
+    symbol: str
+    underlying_con_id: int
+    exchange: str
+    trading_class: str
+    multiplier: str
+    expirations: List[str]
+    strikes: List[float]
+    fetched_at: float
+    expires_at: float
+
+
+class OptionParamsCache:
+    """
+    Per-underlying cache of reqSecDefOptParams results with single-flight fetches.
+
+    Concurrent requests for the same underlying share one in-flight IB call;
+    results are kept until the configured TTL (seconds, or "session" for the
+    next market open).
+    """
+
+    def __init__(self, ttl: str = OPTION_PARAMS_TTL):
+        self.ttl = ttl
+        self._entries: Dict[int, OptionParams] = {}
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _expires_at(self, now: float) -> float:
+        if self.ttl == "session":
+            # A pre-open fetch (e.g. cache warming) already lists the coming session's expirations
+            lead = datetime.now(_MARKET_TZ) + timedelta(seconds=OPTION_PARAMS_PREOPEN)
+            return next_session_open(lead).timestamp()
+        return now + float(self.ttl)
+
+    async def get(self, ib_conn: ib.IB, stock: ib.Contract) -> Optional[OptionParams]:
+        """Get option params for a qualified underlying, fetching at most once concurrently"""
+        entry = self._entries.get(stock.conId)
+        if entry is not None and time.time() < entry.expires_at:
+            self.hits += 1
+            return entry
+
+        task = self._inflight.get(stock.conId)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fetch(ib_conn, stock))
+            self._inflight[stock.conId] = task
+            task.add_done_callback(lambda _: self._inflight.pop(stock.conId, None))
+        else:
+            self.coalesced += 1
+        # Shield so one caller timing out doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    def peek(self, con_id: int) -> Optional[OptionParams]:
+        """Cached params for an underlying if still valid (never fetches)"""
+        entry = self._entries.get(con_id)
+        if entry is not None and time.time() < entry.expires_at:
+            return entry
+        return None
+
+    async def _fetch(self, ib_conn: ib.IB, stock: ib.Contract) -> Optional[OptionParams]:
+        logger.info(f"Requesting option params for {stock.symbol} (conId={stock.conId})")
+
+        # Use reqSecDefOptParams - this is the proper way to get options chain params
+        # It returns expirations and strikes without throttling
+        await governor.messages.acquire()
+        chains = await asyncio.wait_for(
+            ib_conn.reqSecDefOptParamsAsync(
+                underlyingSymbol=stock.symbol,
+                futFopExchange="",  # Empty for stocks
+                underlyingSecType=stock.secType,
+                underlyingConId=stock.conId
+            ),
+            timeout=OPTIONS_TIMEOUT
+        )
+        if not chains:
+            return None
+
+        # Get the SMART exchange chain (most liquid), fall back to first available
+        chain = next((c for c in chains if c.exchange == "SMART"), chains[0])
+        now = time.time()
+        params = OptionParams(
+            symbol=stock.symbol,
+            underlying_con_id=stock.conId,
+            exchange=chain.exchange,
+            trading_class=chain.tradingClass,
+            multiplier=chain.multiplier,
+            expirations=sorted(chain.expirations),
+            strikes=sorted(chain.strikes),
+            fetched_at=now,
+            expires_at=self._expires_at(now)
+        )
+        self._entries[stock.conId] = params
+        return params
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced
+        }
+
+
+# ============================================================================
+# Account State Cache
+# Account values, portfolio, positions and PnL kept current from IB events
+# ============================================================================
+
+class AccountState:
+    """
+    Always-current account snapshot on an in-process ib_async connection.
+
+    ib_async subscribes to account updates and positions on connect; this
+    component follows accountValueEvent/updatePortfolioEvent/positionEvent/
+    pnlEvent so reads are served from memory. It also provides a cheap
+    reqCurrentTime liveness probe shared by every health check.
+    """
+
+    def __init__(self, probe_ttl: float = LIVENESS_PROBE_TTL):
+        self._ib: Optional[ib.IB] = None
+        self.values: Dict[tuple, ib.AccountValue] = {}
+        self.portfolio: Dict[tuple, ib.PortfolioItem] = {}
+        self.positions: Dict[tuple, ib.Position] = {}
+        self.pnl: Dict[str, ib.PnL] = {}
+        self.updated_at = 0.0
+        self.updates = 0
+        self.probe_ttl = probe_ttl
+        self._probe_ok_at = 0.0
+        self._probe_task: Optional[asyncio.Task] = None
+        self.probes = 0
+
+    def bind(self, ib_conn: ib.IB) -> None:
+        """Follow a (new) IB connection, seeding the snapshot from what it already holds"""
+        if self._ib is not None:
+            self._ib.accountValueEvent -= self._on_value
+            self._ib.updatePortfolioEvent -= self._on_portfolio
+            self._ib.positionEvent -= self._on_position
+            self._ib.pnlEvent -= self._on_pnl
+        self._ib = ib_conn
+        self.values.clear()
+        self.portfolio.clear()
+        self.positions.clear()
+        self.pnl.clear()
+        for value in ib_conn.accountValues():
+            self._on_value(value)
+        for item in ib_conn.portfolio():
+            self._on_portfolio(item)
+        for position in ib_conn.positions():
+            self._on_position(position)
+        ib_conn.accountValueEvent += self._on_value
+        ib_conn.updatePortfolioEvent += self._on_portfolio
+        ib_conn.positionEvent += self._on_position
+        ib_conn.pnlEvent += self._on_pnl
+        for account in ib_conn.managedAccounts():
+            try:
+                governor.messages.consume(1)
+                ib_conn.reqPnL(account)
+            except Exception as e:
+                logger.warning(f"reqPnL failed for {account}: {e}")
+
+    def _touch(self) -> None:
+        self.updated_at = time.time()
+        self.updates += 1
+
+    def _on_value(self, value: ib.AccountValue) -> None:
+        self.values[(value.account, value.tag, value.currency, value.modelCode)] = value
+        self._touch()
+
+    def _on_portfolio(self, item: ib.PortfolioItem) -> None:
+        key = (item.account, item.contract.conId)
+        if item.position:
+            self.portfolio[key] = item
+        else:
+            self.portfolio.pop(key, None)
+        self._touch()
+
+    def _on_position(self, position: ib.Position) -> None:
+        key = (position.account, position.contract.conId)
+        if position.position:
+            self.positions[key] = position
+        else:
+            self.positions.pop(key, None)
+        self._touch()
+
+    def _on_pnl(self, pnl: ib.PnL) -> None:
+        self.pnl[pnl.account] = pnl
+        self._touch()
+
+    @property
+    def ready(self) -> bool:
+        return self._ib is not None and self._ib.isConnected() and bool(self.values)
+
+    def account_summary(self, account: str = "") -> Dict[str, Any]:
+        """Account values per account and tag (base-currency entry preferred over per-currency ones)"""
+        accounts: Dict[str, Dict[str, Any]] = {}
+        for value in self.values.values():
+            if value.modelCode or (account and value.account != account):
+                continue
+            tags = accounts.setdefault(value.account, {})
+            if value.tag in tags and value.currency != "BASE":
+                continue
+            number = _number(value.value)
+            tags[value.tag] = {
+                "value": number if number is not None else value.value,
+                "currency": value.currency or None
+            }
+        return {"accounts": accounts, "updated_at": self.updated_at}
+
+    def portfolio_items(self, account: str = "") -> Dict[str, Any]:
+        return {
+            "positions": [{
+                "account": item.account,
+                "contract": _contract_json(item.contract),
+                "position": item.position,
+                "market_price": _number(item.marketPrice),
+                "market_value": _number(item.marketValue),
+                "average_cost": _number(item.averageCost),
+                "unrealized_pnl": _number(item.unrealizedPNL),
+                "realized_pnl": _number(item.realizedPNL)
+            } for item in self.portfolio.values() if not account or item.account == account],
+            "updated_at": self.updated_at
+        }
+
+    def position_list(self, account: str = "") -> Dict[str, Any]:
+        return {
+            "positions": [{
+                "account": p.account,
+                "contract": _contract_json(p.contract),
+                "position": p.position,
+                "average_cost": _number(p.avgCost)
+            } for p in self.positions.values() if not account or p.account == account],
+            "updated_at": self.updated_at
+        }
+
+    def pnl_summary(self, account: str = "") -> Dict[str, Any]:
+        return {
+            "pnl": {
+                acct: {
+                    "daily": _number(p.dailyPnL),
+                    "unrealized": _number(p.unrealizedPnL),
+                    "realized": _number(p.realizedPnL)
+                }
+                for acct, p in self.pnl.items() if not account or acct == account
+            },
+            "updated_at": self.updated_at
+        }
+
+    async def probe(self) -> bool:
+        """
+        Gateway liveness via reqCurrentTime.
+
+        A success is reused for `probe_ttl` seconds and concurrent callers
+        share one request, so N health checks cost at most one IB message.
+        """
+        if self._ib is None or not self._ib.isConnected():
+            return False
+        if time.time() - self._probe_ok_at < self.probe_ttl:
+            return True
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.ensure_future(self._probe())
+        return await asyncio.shield(self._probe_task)
+
+    async def _probe(self) -> bool:
+        self.probes += 1
+        try:
+            await governor.messages.acquire()
+            await asyncio.wait_for(self._ib.reqCurrentTimeAsync(), timeout=5)
+        except Exception as e:
+            logger.warning(f"Liveness probe failed: {e!r}")
+            return False
+        self._probe_ok_at = time.time()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "accounts": sorted({key[0] for key in self.values}),
+            "values": len(self.values),
+            "portfolio": len(self.portfolio),
+            "positions": len(self.positions),
+            "updates": self.updates,
+            "updated_at": self.updated_at,
+            "probes": self.probes
+        }
+
+
+def _contract_json(contract: ib.Contract) -> Dict[str, Any]:
+    return {
+        "con_id": contract.conId,
+        "symbol": contract.symbol,
+        "sec_type": contract.secType,
+        "expiry": contract.lastTradeDateOrContractMonth or None,
+        "strike": contract.strike or None,
+        "right": contract.right or None,
+        "exchange": contract.exchange or contract.primaryExchange,
+        "currency": contract.currency,
+        "local_symbol": contract.localSymbol
+    }
 
 
 # ============================================================================
@@ -53,396 +1361,2346 @@ DOCKER_SOCKET = "/var/run/docker.sock"
 # Uses reqSecDefOptParams for proper options chain data (no throttling)
 # ============================================================================
 
-class OptionsClient:
+class OptionsClient:
+    """
+    Dedicated IB client for options data using ib_async directly.
+    Uses reqSecDefOptParams which doesn't have the throttling limitations
+    of reqContractDetails for options.
+    """
+
+    def __init__(self, host: str, port: int, client_id: int):
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self._ib: Optional[ib.IB] = None
+        self._lock = asyncio.Lock()
+        self._connected = False
+        self._monitor_task: Optional[asyncio.Task] = None
+        self.market_data = MarketDataManager()
+        self.option_params = OptionParamsCache()
+        self.account = AccountState()
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the IB connection is up, without trying to reconnect"""
+        return bool(self._connected and self._ib and self._ib.isConnected())
+
+    @property
+    def connection(self) -> Optional[ib.IB]:
+        """The shared ib_async connection (None before the first connect)"""
+        return self._ib
+
+    async def connect(self) -> bool:
+        """Connect to IB Gateway"""
+        async with self._lock:
+            if self.is_connected:
+                return True
+
+            try:
+                self._ib = ib.IB()
+                await self._ib.connectAsync(
+                    self.host,
+                    self.port,
+                    clientId=self.client_id,
+                    readonly=True,
+                    timeout=30
+                )
+                self.market_data.bind(self._ib)
+                self.account.bind(self._ib)
+                self._connected = True
+                logger.info(f"Options client connected to IB at {self.host}:{self.port}")
+                return True
+            except Exception as e:
+                logger.error(f"Options client failed to connect: {e}")
+                self._connected = False
+                return False
+
+    async def disconnect(self):
+        """Disconnect from IB Gateway"""
+        async with self._lock:
+            if self._ib:
+                self._ib.disconnect()
+                self._connected = False
+                logger.info("Options client disconnected")
+
+    async def ensure_connected(self) -> bool:
+        """Ensure connection is active, reconnect if needed"""
+        if not self.is_connected:
+            return await self.connect()
+        return True
+
+    async def start_health_monitor(self) -> None:
+        """Start background liveness monitor (mirrors worker pool's pattern)."""
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._health_monitor_loop())
+            logger.info(f"OptionsClient health monitor started (interval: {HEALTH_CHECK_INTERVAL}s)")
+
+    async def stop_health_monitor(self) -> None:
+        if self._monitor_task and not self._monitor_task.done():
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _health_monitor_loop(self) -> None:
+        """Periodic liveness check via reqCurrentTime; reconnect on silent failure."""
+        consecutive_failures = 0
+        while True:
+            try:
+                await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+                healthy = False
+                if self.is_connected:
+                    try:
+                        await governor.messages.acquire()
+                        await asyncio.wait_for(self._ib.reqCurrentTimeAsync(), timeout=10)
+                        healthy = True
+                        consecutive_failures = 0
+                    except Exception as e:
+                        logger.warning(f"OptionsClient liveness ping failed: {e!r}; forcing reconnect")
+                        self._connected = False
+                        if self._ib:
+                            try:
+                                self._ib.disconnect()
+                            except Exception:
+                                pass
+
+                if not healthy:
+                    consecutive_failures += 1
+                    backoff = min(5 * (2 ** (consecutive_failures - 1)), 60)
+                    logger.info(f"OptionsClient: reconnect attempt #{consecutive_failures} (next backoff {backoff}s if fails)")
+                    ok = await self.connect()
+                    if ok:
+                        consecutive_failures = 0
+                        logger.info("OptionsClient reconnected")
+                    else:
+                        await asyncio.sleep(backoff)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"OptionsClient monitor unexpected error: {e!r}")
+                await asyncio.sleep(5)
+
+    async def get_stock_contract(self, symbol: str) -> Optional[ib.Stock]:
+        """Get qualified stock contract"""
+        if not await self.ensure_connected():
+            return None
+
+        try:
+            stock = ib.Stock(symbol.upper(), "SMART", "USD")
+            contracts = await contract_cache.qualify(self._ib, [stock])
+            if contracts:
+                return contracts[0] if isinstance(contracts[0], ib.Contract) else None
+            return None
+        except Exception as e:
+            logger.error(f"Failed to get stock contract for {symbol}: {e}")
+            return None
+
+    async def get_stock_ticker(self, symbol: str) -> Optional[ib.Ticker]:
+        """
+        Get the shared live ticker for a stock.
+
+        The first call subscribes and waits for the warm-up period; later
+        calls within the TTL read the already-streaming ticker immediately.
+        """
+        symbol = symbol.upper()
+        return await coalescer.run(
+            "get_stock_ticker", (symbol,), lambda: self._get_stock_ticker(symbol),
+            cacheable=lambda ticker: ticker is not None
+        )
+
+    async def _get_stock_ticker(self, symbol: str) -> Optional[ib.Ticker]:
+        if not await self.ensure_connected():
+            return None
+
+        stock = await self.get_stock_contract(symbol)
+        if not stock:
+            return None
+
+        async with self.market_data.subscribe([stock]) as tickers:
+            return tickers[0]
+
+    async def get_stock_price(self, symbol: str) -> Optional[float]:
+        """Get current stock price from the shared market data subscription"""
+        try:
+            ticker = await self.get_stock_ticker(symbol)
+            if not ticker:
+                return None
+            return ticker_price(ticker)
+        except Exception as e:
+            logger.error(f"Failed to get price for {symbol}: {e}")
+            return None
+
+    async def get_stock_quotes(
+        self,
+        symbols: List[str],
+        data_timeout: float = MKT_DATA_WARMUP,
+        fallback_timeout: float = 10
+    ) -> Dict[str, Any]:
+        """
+        Quotes for many stocks in one pass.
+
+        Qualifies every symbol in one batch, holds shared tickers for all of
+        them (rotated through the line budget in chunks if wider) and waits
+        once, up to `data_timeout`, for their prices. Symbols still without a
+        price fall back to the latest cached historical bar.
+
+        Returns {"quotes": {symbol: quote dict}} in request order
+        """
+        symbols = list(dict.fromkeys(sym.upper() for sym in symbols))
+        return await coalescer.run(
+            "get_stock_quotes", (symbols, data_timeout, fallback_timeout),
+            lambda: self._get_stock_quotes(symbols, data_timeout, fallback_timeout)
+        )
+
+    async def _get_stock_quotes(
+        self,
+        symbols: List[str],
+        data_timeout: float,
+        fallback_timeout: float
+    ) -> Dict[str, Any]:
+        if not await self.ensure_connected():
+            return {"error": "Not connected to IB"}
+
+        stocks = await contract_cache.qualify(self._ib, [ib.Stock(sym, "SMART", "USD") for sym in symbols])
+        quotes: Dict[str, Dict[str, Any]] = {}
+        qualified = []
+        for sym, stock in zip(symbols, stocks):
+            if stock:
+                qualified.append((sym, stock))
+            else:
+                quotes[sym] = {"symbol": sym, "error": f"Could not qualify stock contract for {sym}"}
+
+        stragglers = []
+        if qualified:
+            async with self.market_data.subscribe(
+                [stock for _, stock in qualified], ready=has_price, timeout=data_timeout
+            ) as tickers:
+                for (sym, stock), ticker in zip(qualified, tickers):
+                    if ticker_price(ticker):
+                        quotes[sym] = quote_from_ticker(sym, ticker)
+                    else:
+                        stragglers.append((sym, stock))
+
+        async def fallback(sym: str, stock: ib.Contract) -> Dict[str, Any]:
+            try:
+                bar = await asyncio.wait_for(bar_store.tail(self._ib, stock), timeout=fallback_timeout)
+            except Exception as e:
+                logger.warning(f"Bar store quote failed for {sym}: {e!r}")
+                bar = None
+            if bar:
+                return quote_from_bar(sym, bar)
+            return {"symbol": sym, "price": None, "error": "No live or historical price"}
+
+        if stragglers:
+            logger.info(f"Bulk quotes: {len(stragglers)}/{len(symbols)} symbols falling back to historical bars")
+            for (sym, _), fallback_quote in zip(stragglers, await asyncio.gather(*[fallback(*s) for s in stragglers])):
+                quotes[sym] = fallback_quote
+        return {"quotes": {sym: quotes[sym] for sym in symbols}}
+
+    async def get_option_expirations(self, symbol: str) -> List[str]:
+        """
+        Get available option expiration dates using reqSecDefOptParams.
+        This is the proper way to get options data - no throttling.
+
+        Returns list of expiration dates in YYYYMMDD format.
+        """
+        symbol = symbol.upper()
+        return await coalescer.run(
+            "get_option_expirations", (symbol,), lambda: self._get_option_expirations(symbol),
+            cacheable=bool
+        )
+
+    async def _get_option_expirations(self, symbol: str) -> List[str]:
+        if not await self.ensure_connected():
+            return []
+
+        try:
+            stock = await self.get_stock_contract(symbol)
+            if not stock:
+                logger.error(f"Could not qualify stock contract for {symbol}")
+                return []
+
+            params = await self.option_params.get(self._ib, stock)
+            if not params:
+                logger.warning(f"No option chains returned for {symbol}")
+                return []
+
+            expirations = list(params.expirations)
+            logger.info(f"Found {len(expirations)} expirations for {symbol}")
+            return expirations
+
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout getting option expirations for {symbol}")
+            return []
+        except Exception as e:
+            logger.error(f"Failed to get option expirations for {symbol}: {e}")
+            return []
+
+    async def get_option_chain(
+        self,
+        symbol: str,
+        expiration: str,
+        strikes_range: int = 20,
+        data_timeout: float = CHAIN_DATA_TIMEOUT
+    ) -> Dict[str, Any]:
+        """
+        Get options chain with market data for a specific expiration.
+
+        Args:
+            symbol: Stock symbol
+            expiration: Expiration date in YYYYMMDD format
+            strikes_range: Number of strikes on each side of ATM
+            data_timeout: Max seconds to wait for bid/ask/greeks on each contract
+
+        Returns dict with underlying_price, calls, puts, and the strikes
+        whose data did not arrive before the deadline (timed_out)
+        """
+        symbol = symbol.upper()
+        return await coalescer.run(
+            "get_option_chain", (symbol, expiration, strikes_range, data_timeout),
+            lambda: self._get_option_chain(symbol, expiration, strikes_range, data_timeout)
+        )
+
+    async def _get_option_chain(
+        self,
+        symbol: str,
+        expiration: str,
+        strikes_range: int,
+        data_timeout: float
+    ) -> Dict[str, Any]:
+        try:
+            plan = await self._plan_chain(symbol, expiration, strikes_range)
+            if "error" in plan:
+                return plan
+            return await self._read_chain(
+                symbol, expiration, plan["chain"], plan["underlying_price"], plan["qualified"], data_timeout
+            )
+
+        except asyncio.TimeoutError:
+            return {"error": f"Timeout getting option chain for {symbol}"}
+        except Exception as e:
+            logger.error(f"Failed to get option chain for {symbol}: {e}")
+            return {"error": str(e)}
+
+    async def _plan_chain(self, symbol: str, expiration: str, strikes_range: int) -> Dict[str, Any]:
+        """Resolve price, option params and qualified contracts for one chain (or an error dict)"""
+        if not await self.ensure_connected():
+            return {"error": "Not connected to IB"}
+
+        stock = await self.get_stock_contract(symbol)
+        if not stock:
+            return {"error": f"Could not qualify stock contract for {symbol}"}
+
+        # Current price and (cached) option chain parameters in parallel
+        underlying_price, chain = await asyncio.gather(
+            self.get_stock_price(symbol),
+            self.option_params.get(self._ib, stock)
+        )
+        if not underlying_price:
+            logger.warning(f"Could not get underlying price for {symbol}, using last close")
+
+        if not chain:
+            return {"error": f"No option chains found for {symbol}"}
+
+        # Verify expiration exists
+        if expiration not in chain.expirations:
+            return {"error": f"Expiration {expiration} not found for {symbol}"}
+
+        strikes = select_strikes(chain.strikes, underlying_price, strikes_range)
+        logger.info(f"Getting {len(strikes)} strikes for {symbol} {expiration}")
+
+        # Qualify contracts (cached ones skip IB; the rest go in paced batches)
+        all_contracts = self.chain_contracts(symbol, expiration, chain, strikes)
+        qualified = [c for c in await contract_cache.qualify(self._ib, all_contracts) if c]
+        return {
+            "chain": chain,
+            "underlying_price": underlying_price,
+            "strikes": strikes,
+            "qualified": qualified
+        }
+
+    def chain_contracts(
+        self,
+        symbol: str,
+        expiration: str,
+        chain: OptionParams,
+        strikes: List[float]
+    ) -> List[ib.Option]:
+        """Build unqualified call and put contracts for the selected strikes"""
+        return [
+            ib.Option(symbol, expiration, strike, right, "SMART", tradingClass=chain.trading_class)
+            for right in ("C", "P")
+            for strike in strikes
+        ]
+
+    async def _read_chain(
+        self,
+        symbol: str,
+        expiration: str,
+        chain: OptionParams,
+        underlying_price: Optional[float],
+        qualified: List[ib.Contract],
+        data_timeout: float
+    ) -> Dict[str, Any]:
+        """Subscribe to qualified chain contracts and build the chain response"""
+        if not qualified:
+            return {
+                "symbol": symbol,
+                "expiration": expiration,
+                "underlying_price": underlying_price,
+                "calls": [],
+                "puts": [],
+                "note": "No contracts qualified - may need market data subscription"
+            }
+
+        # Hold shared tickers for all qualified contracts and wait until each
+        # has bid/ask/greeks or the deadline passes; strikes already streaming
+        # from an earlier request need no new line or wait
+        wait_start = time.time()
+        async with self.market_data.subscribe(
+            qualified, ready=has_option_quote, timeout=data_timeout
+        ) as ticker_list:
+            tickers = list(zip(qualified, ticker_list))
+        data_wait = round(time.time() - wait_start, 3)
+
+        calls = []
+        puts = []
+        timed_out = []
+
+        # Process tickers
+        for contract, ticker in tickers:
+            contract_data = chain_row(contract, ticker)
+
+            if contract.right == "C":
+                calls.append(contract_data)
+            else:
+                puts.append(contract_data)
+
+            if not has_option_quote(ticker):
+                timed_out.append({"strike": contract.strike, "right": contract.right})
+
+        # Sort by strike
+        calls.sort(key=lambda x: x["strike"])
+        puts.sort(key=lambda x: x["strike"])
+
+        return {
+            "symbol": symbol,
+            "expiration": expiration,
+            "underlying_price": underlying_price,
+            "calls": calls,
+            "puts": puts,
+            "trading_class": chain.trading_class,
+            "multiplier": chain.multiplier,
+            "data_wait": data_wait,
+            "timed_out": sorted(timed_out, key=lambda x: (x["strike"], x["right"]))
+        }
+
+    async def stream_option_chain(
+        self,
+        symbol: str,
+        expiration: str,
+        strikes_range: int = 20,
+        data_timeout: float = CHAIN_DATA_TIMEOUT
+    ):
+        """
+        Stream one chain as it is read.
+
+        Yields a "meta" event (underlying price, strikes) as soon as the
+        contracts are qualified, a "row" event per contract as its ticker
+        settles, and a final "summary" event with the strikes whose data did
+        not arrive before the deadline. Failures yield an "error" event.
+        """
+        start = time.time()
+        try:
+            plan = await self._plan_chain(symbol, expiration, strikes_range)
+        except Exception as e:
+            logger.error(f"Failed to plan option chain for {symbol}: {e}")
+            plan = {"error": str(e)}
+        if "error" in plan:
+            yield {"type": "error", "symbol": symbol, "expiration": expiration, **plan}
+            return
+
+        chain, qualified = plan["chain"], plan["qualified"]
+        yield {
+            "type": "meta",
+            "symbol": symbol,
+            "expiration": expiration,
+            "underlying_price": plan["underlying_price"],
+            "trading_class": chain.trading_class,
+            "multiplier": chain.multiplier,
+            "strikes": plan["strikes"],
+            "contracts": len(qualified)
+        }
+
+        # Settled tickers arrive via the queue; None marks the end of the read
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def read():
+            async with self.market_data.subscribe(
+                qualified, ready=has_option_quote, timeout=data_timeout, on_settled=queue.put_nowait
+            ) as tickers:
+                return tickers
+
+        reader = asyncio.ensure_future(read())
+        reader.add_done_callback(lambda _: queue.put_nowait(None))
+        sent = set()
+        try:
+            while (ticker := await queue.get()) is not None:
+                if id(ticker) not in sent:
+                    sent.add(id(ticker))
+                    yield {"type": "row", "right": ticker.contract.right, **chain_row(ticker.contract, ticker)}
+
+            timed_out = []
+            for contract, ticker in zip(qualified, reader.result()):
+                if id(ticker) not in sent:
+                    sent.add(id(ticker))
+                    yield {"type": "row", "right": contract.right, **chain_row(contract, ticker)}
+                if not has_option_quote(ticker):
+                    timed_out.append({"strike": contract.strike, "right": contract.right})
+
+            yield {
+                "type": "summary",
+                "symbol": symbol,
+                "expiration": expiration,
+                "rows": len(sent),
+                "elapsed": round(time.time() - start, 3),
+                "timed_out": sorted(timed_out, key=lambda x: (x["strike"], x["right"]))
+            }
+        finally:
+            reader.cancel()
+
+    async def iter_option_chains(
+        self,
+        symbols: List[str],
+        expirations: Optional[List[str]] = None,
+        max_expirations: int = 6,
+        strikes_range: int = 20,
+        data_timeout: float = CHAIN_DATA_TIMEOUT
+    ):
+        """
+        Fetch many chains as one job, yielding each chain as it completes.
+
+        Plans symbols x expirations globally: stocks are qualified in one
+        batch, price and option params are fetched once per underlying, and
+        every option contract across all chains is qualified together in
+        maximal batches. Chains are then read concurrently, as many at a
+        time as fit in the market data line budget.
+
+        Args:
+            symbols: Stock symbols
+            expirations: Expirations in YYYYMMDD format (default: nearest max_expirations)
+            max_expirations: Number of nearest expirations when none are given
+            strikes_range: Number of strikes on each side of ATM
+            data_timeout: Max seconds to wait for bid/ask/greeks on each contract
+
+        Yields chain dicts (same shape as get_option_chain) or error dicts
+        """
+        if not await self.ensure_connected():
+            yield {"error": "Not connected to IB"}
+            return
+
+        symbols = list(dict.fromkeys(sym.upper() for sym in symbols))
+        stocks = await contract_cache.qualify(self._ib, [ib.Stock(sym, "SMART", "USD") for sym in symbols])
+
+        # Price and option params once per underlying
+        underlyings = [(sym, stock) for sym, stock in zip(symbols, stocks) if stock]
+        for sym, stock in zip(symbols, stocks):
+            if not stock:
+                yield {"symbol": sym, "error": f"Could not qualify stock contract for {sym}"}
+        fetched = await asyncio.gather(
+            *[
+                asyncio.gather(self.get_stock_price(sym), self.option_params.get(self._ib, stock))
+                for sym, stock in underlyings
+            ],
+            return_exceptions=True
+        )
+
+        # Plan every (symbol, expiration) chain and collect all contracts
+        jobs = []
+        all_contracts = []
+        for (sym, stock), result in zip(underlyings, fetched):
+            if isinstance(result, BaseException):
+                yield {"symbol": sym, "error": f"Failed to get option params for {sym}: {result!r}"}
+                continue
+            underlying_price, chain = result
+            if not chain:
+                yield {"symbol": sym, "error": f"No option chains found for {sym}"}
+                continue
+            wanted = expirations if expirations else chain.expirations[:max_expirations]
+            strikes = select_strikes(chain.strikes, underlying_price, strikes_range)
+            for expiration in wanted:
+                if expiration not in chain.expirations:
+                    yield {"symbol": sym, "expiration": expiration, "error": f"Expiration {expiration} not found for {sym}"}
+                    continue
+                contracts = self.chain_contracts(sym, expiration, chain, strikes)
+                jobs.append((sym, expiration, chain, underlying_price, len(all_contracts), len(contracts)))
+                all_contracts.extend(contracts)
+
+        if not jobs:
+            return
+        logger.info(f"Chain batch: {len(jobs)} chains, {len(all_contracts)} contracts for {len(underlyings)} symbols")
+
+        qualified_all = await contract_cache.qualify(self._ib, all_contracts)
+
+        # Read as many chains at once as fit in the market data line budget
+        per_chain = max(n for *_, n in jobs)
+        slots = asyncio.Semaphore(max(1, governor.lines.max_lines // max(1, per_chain)))
+
+        async def read(sym, expiration, chain, underlying_price, offset, count):
+            qualified = [c for c in qualified_all[offset:offset + count] if c]
+            async with slots:
+                try:
+                    return await self._read_chain(sym, expiration, chain, underlying_price, qualified, data_timeout)
+                except Exception as e:
+                    logger.error(f"Failed to get option chain for {sym} {expiration}: {e}")
+                    return {"symbol": sym, "expiration": expiration, "error": str(e)}
+
+        tasks = [asyncio.ensure_future(read(*job)) for job in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def chain_row(contract: ib.Contract, ticker: ib.Ticker) -> Dict[str, Any]:
+    """One strike row of a chain response from its ticker"""
+    contract_data = {
+        "strike": contract.strike,
+        "bid": ticker.bid if ticker.bid and ticker.bid > 0 else None,
+        "ask": ticker.ask if ticker.ask and ticker.ask > 0 else None,
+        "last": ticker.last if ticker.last and ticker.last > 0 else None,
+        "volume": _number(ticker.volume) or None,
+        "open_interest": None,  # Requires separate request
+        "iv": None,  # Will be calculated
+        "greeks": None
+    }
+
+    # Add Greeks if available
+    if ticker.modelGreeks:
+        contract_data["greeks"] = {
+            "delta": ticker.modelGreeks.delta,
+            "gamma": ticker.modelGreeks.gamma,
+            "theta": ticker.modelGreeks.theta,
+            "vega": ticker.modelGreeks.vega,
+            "iv": ticker.modelGreeks.impliedVol
+        }
+        contract_data["iv"] = ticker.modelGreeks.impliedVol
+    return contract_data
+
+
+def select_strikes(all_strikes: List[float], underlying_price: Optional[float], strikes_range: int) -> List[float]:
+    """Pick `strikes_range` strikes on each side of ATM (or of the middle if no price)"""
+    all_strikes = sorted(all_strikes)
+    if not all_strikes:
+        return []
+    if underlying_price:
+        # Find ATM strike
+        atm_idx = min(range(len(all_strikes)),
+                     key=lambda i: abs(all_strikes[i] - underlying_price))
+        start_idx = max(0, atm_idx - strikes_range)
+        end_idx = min(len(all_strikes), atm_idx + strikes_range + 1)
+        return all_strikes[start_idx:end_idx]
+    # Take middle strikes if no price
+    mid = len(all_strikes) // 2
+    return all_strikes[max(0, mid-strikes_range):mid+strikes_range+1]
+
+
+def quote_from_ticker(symbol: str, ticker: ib.Ticker) -> Dict[str, Any]:
+    """Stock quote from a live ticker"""
+    return {
+        "symbol": symbol,
+        "price": ticker_price(ticker),
+        "bid": float(ticker.bid) if ticker.bid and ticker.bid > 0 else None,
+        "ask": float(ticker.ask) if ticker.ask and ticker.ask > 0 else None,
+        "last": float(ticker.last) if ticker.last and ticker.last > 0 else None,
+        "volume": int(ticker.volume) if _has_value(ticker.volume) and ticker.volume else None,
+        "source": "market_data"
+    }
+
+
+def quote_from_bar(symbol: str, bar: Dict[str, Any]) -> Dict[str, Any]:
+    """Stock quote from the most recent historical bar"""
+    return {
+        "symbol": symbol,
+        "price": bar["close"],
+        "open": bar["open"],
+        "high": bar["high"],
+        "low": bar["low"],
+        "volume": int(bar["volume"]) if bar["volume"] is not None else None,
+        "timestamp": bar["date"],
+        "source": "historical"
+    }
+
+
+# Global options client instance
+options_client: Optional[OptionsClient] = None
+
+
+# ============================================================================
+# Option Pricing Engine
+# Vectorized Black-Scholes IV and greeks for whole chains in one array pass
+# ============================================================================
+
+GREEKS_MODES = ("ib", "fill", "model")  # IB only / model where IB sent none / model for every row
+
+
+def _norm_cdf(x: np.ndarray) -> np.ndarray:
+    # Abramowitz & Stegun 7.1.26 erf (|error| < 1.5e-7); numpy has no erf
+    z = np.abs(x) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def _norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / math.sqrt(2.0 * math.pi)
+
+
+def bs_price(S, K, T, r, q, sigma, is_call) -> np.ndarray:
+    """Black-Scholes-Merton price (continuous dividend yield q)"""
+    vol_t = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / vol_t
+    d2 = d1 - vol_t
+    df_r, df_q = np.exp(-r * T), np.exp(-q * T)
+    call = S * df_q * _norm_cdf(d1) - K * df_r * _norm_cdf(d2)
+    put = K * df_r * _norm_cdf(-d2) - S * df_q * _norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_greeks(S, K, T, r, q, sigma, is_call) -> Dict[str, np.ndarray]:
+    """Delta, gamma, theta (per calendar day) and vega (per vol point), as IB reports them"""
+    sqrt_t = np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / (sigma * sqrt_t)
+    d2 = d1 - sigma * sqrt_t
+    df_r, df_q = np.exp(-r * T), np.exp(-q * T)
+    pdf = _norm_pdf(d1)
+    decay = -S * df_q * pdf * sigma / (2 * sqrt_t)
+    theta_call = decay - r * K * df_r * _norm_cdf(d2) + q * S * df_q * _norm_cdf(d1)
+    theta_put = decay + r * K * df_r * _norm_cdf(-d2) - q * S * df_q * _norm_cdf(-d1)
+    return {
+        "delta": np.where(is_call, df_q * _norm_cdf(d1), -df_q * _norm_cdf(-d1)),
+        "gamma": df_q * pdf / (S * sigma * sqrt_t),
+        "theta": np.where(is_call, theta_call, theta_put) / 365.0,
+        "vega": S * df_q * pdf * sqrt_t / 100.0
+    }
+
+
+def implied_vol(price, S, K, T, r, q, is_call, tol: float = 1e-6, max_iter: int = 60) -> np.ndarray:
     """
-    Dedicated IB client for options data using ib_async directly.
-    Uses reqSecDefOptParams which doesn't have the throttling limitations
-    of reqContractDetails for options.
+    Implied volatility for every element at once.
+
+    Newton steps, falling back to bisection whenever a step leaves the
+    bracket [lo, hi] that each iteration tightens. Prices outside the
+    no-arbitrage bounds give NaN.
+    """
+    price, S, K, T = (np.asarray(a, dtype=np.float64) for a in (price, S, K, T))
+    is_call = np.asarray(is_call, dtype=bool)
+    df_r, df_q = np.exp(-r * T), np.exp(-q * T)
+    lower = np.where(is_call, np.maximum(S * df_q - K * df_r, 0.0), np.maximum(K * df_r - S * df_q, 0.0))
+    upper = np.where(is_call, S * df_q, K * df_r)
+    valid = np.isfinite(price) & (T > 0) & (price > lower) & (price < upper)
+
+    lo = np.full(price.shape, 1e-4)
+    hi = np.full(price.shape, 5.0)
+    # Brenner-Subrahmanyam ATM estimate as the starting point
+    with np.errstate(all="ignore"):
+        sigma = np.clip(np.sqrt(2 * math.pi / T) * price / S, 0.05, 2.0)
+        sigma = np.where(valid, sigma, 0.3)
+        for _ in range(max_iter):
+            diff = bs_price(S, K, T, r, q, sigma, is_call) - price
+            if np.all(np.abs(diff[valid]) < tol):
+                break
+            hi = np.where(diff > 0, sigma, hi)
+            lo = np.where(diff < 0, sigma, lo)
+            d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / (sigma * np.sqrt(T))
+            vega = S * df_q * _norm_pdf(d1) * np.sqrt(T)
+            step = sigma - diff / vega
+            bisect = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+            sigma = np.where(bisect, 0.5 * (lo + hi), step)
+    return np.where(valid, sigma, np.nan)
+
+
+def option_model(price, S, K, T, is_call, r: float = RISK_FREE_RATE, q: float = DIVIDEND_YIELD) -> Dict[str, np.ndarray]:
+    """IV from option prices, then greeks at that IV (NaN where no IV exists)"""
+    iv = implied_vol(price, S, K, T, r, q, is_call)
+    with np.errstate(all="ignore"):
+        greeks = bs_greeks(np.asarray(S, dtype=np.float64), np.asarray(K, dtype=np.float64),
+                           np.asarray(T, dtype=np.float64), r, q, iv, np.asarray(is_call, dtype=bool))
+    return {"iv": iv, **greeks}
+
+
+def years_to_expiry(expiration: str, now: Optional[float] = None) -> float:
+    """Years (ACT/365) until 16:00 America/New_York on a YYYYMMDD expiration"""
+    expiry = datetime.strptime(expiration[:8], "%Y%m%d").replace(hour=16, tzinfo=_MARKET_TZ)
+    return max(expiry.timestamp() - (now or time.time()), 0.0) / (365 * 86400)
+
+
+def option_mid(bid: Optional[float], ask: Optional[float], last: Optional[float]) -> float:
+    """Price used for IV: bid/ask midpoint, else last trade, else NaN"""
+    if bid and ask and ask >= bid:
+        return (bid + ask) / 2
+    return last if last else math.nan
+
+
+def apply_model_greeks(
+    chains: List[Dict[str, Any]],
+    mode: str = "fill",
+    rate: float = RISK_FREE_RATE,
+    dividend_yield: float = DIVIDEND_YIELD
+) -> None:
+    """
+    Compute IV and greeks for chain rows in place, all chains in one array pass.
+
+    mode "fill" only models rows IB sent no greeks for; "model" replaces all.
+    Every row gets greeks_source ("ib", "model", or None if neither exists).
+    """
+    rows, spot, strike, expiry, is_call, price = [], [], [], [], [], []
+    now = time.time()
+    for chain in chains:
+        if "error" in chain:
+            continue
+        underlying_price = chain.get("underlying_price")
+        t = years_to_expiry(chain["expiration"], now)
+        for key, call in (("calls", True), ("puts", False)):
+            for row in chain.get(key, []):
+                row["greeks_source"] = "ib" if row["greeks"] is not None else None
+                if not underlying_price or (mode == "fill" and row["greeks"] is not None):
+                    continue
+                rows.append(row)
+                spot.append(underlying_price)
+                strike.append(row["strike"])
+                expiry.append(t)
+                is_call.append(call)
+                price.append(option_mid(row["bid"], row["ask"], row["last"]))
+    if not rows:
+        return
+
+    model = option_model(price, spot, strike, expiry, is_call, rate, dividend_yield)
+    for i, row in enumerate(rows):
+        iv = model["iv"][i]
+        if not np.isfinite(iv):
+            continue
+        row["iv"] = float(iv)
+        row["greeks"] = {
+            "delta": float(model["delta"][i]),
+            "gamma": float(model["gamma"][i]),
+            "theta": float(model["theta"][i]),
+            "vega": float(model["vega"][i]),
+            "iv": float(iv)
+        }
+        row["greeks_source"] = "model"
+
+
+# ============================================================================
+# Implied Volatility Surface
+# Strike x expiry IV grid from the shared chain pipeline, cached briefly
+# ============================================================================
+
+def build_iv_surface(chains: List[Dict[str, Any]], underlying_price: Optional[float]) -> Dict[str, Any]:
+    """
+    Assemble an expiry x strike IV grid from chain dicts (IV already filled in).
+
+    Each point uses the out-of-the-money side (puts below spot, calls at or
+    above), falling back to the other side. Missing points are interpolated
+    along strikes within each expiry, then across expiries in total variance
+    (iv^2 * t); edges are held flat.
+    """
+    chains = sorted((c for c in chains if "error" not in c), key=lambda c: c["expiration"])
+    strikes = sorted({row["strike"] for c in chains for key in ("calls", "puts") for row in c[key]})
+    expirations = [c["expiration"] for c in chains]
+    now = time.time()
+    years = np.array([years_to_expiry(e, now) for e in expirations])
+    col = {strike: j for j, strike in enumerate(strikes)}
+
+    calls = np.full((len(chains), len(strikes)), np.nan)
+    puts = np.full((len(chains), len(strikes)), np.nan)
+    for i, chain in enumerate(chains):
+        for key, grid in (("calls", calls), ("puts", puts)):
+            for row in chain[key]:
+                if row["iv"] is not None and _has_value(row["iv"]) and row["iv"] > 0:
+                    grid[i, col[row["strike"]]] = row["iv"]
+
+    k = np.array(strikes)
+    otm_calls = k >= (underlying_price or np.inf)
+    iv = np.where(otm_calls, calls, puts)
+    iv = np.where(np.isnan(iv), np.where(otm_calls, puts, calls), iv)
+    observed = ~np.isnan(iv)
+
+    # Along strikes, per expiry
+    for i in range(len(expirations)):
+        known = observed[i]
+        if known.any() and not known.all():
+            iv[i, ~known] = np.interp(k[~known], k[known], iv[i, known])
+
+    # Across expiries, per strike, in total variance
+    if len(expirations) > 1:
+        variance = iv ** 2 * years[:, None]
+        for j in np.flatnonzero(np.isnan(variance).any(axis=0)):
+            known = ~np.isnan(variance[:, j])
+            if known.any():
+                variance[~known, j] = np.interp(years[~known], years[known], variance[known, j])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            iv = np.where(np.isnan(iv), np.sqrt(variance / years[:, None]), iv)
+
+    return {
+        "underlying_price": underlying_price,
+        "expirations": expirations,
+        "years": [round(float(t), 6) for t in years],
+        "strikes": strikes,
+        "iv": [[round(float(v), 6) if np.isfinite(v) else None for v in row] for row in iv],
+        "interpolated": (~observed).astype(int).tolist(),
+        "observed_points": int(observed.sum())
+    }
+
+
+class IVSurfaceCache:
+    """
+    Short-TTL cache of IV surfaces with single-flight builds.
+
+    Consumers asking for the same surface while it is being built share
+    that build; results are reused for `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = SURFACE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[tuple, Dict[str, Any]] = {}
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(
+        self,
+        client: "OptionsClient",
+        symbol: str,
+        max_expirations: int = 8,
+        strikes_range: int = 15,
+        data_timeout: float = CHAIN_DATA_TIMEOUT
+    ) -> Dict[str, Any]:
+        key = (symbol.upper(), max_expirations, strikes_range)
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry["built_at"] < self.ttl:
+            self.hits += 1
+            return {**entry, "age": round(time.time() - entry["built_at"], 3), "cached": True}
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._build(client, key, data_timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one consumer disconnecting doesn't cancel the shared build
+        surface = await asyncio.shield(task)
+        return {**surface, "age": round(time.time() - surface["built_at"], 3), "cached": False}
+
+    async def _build(self, client: "OptionsClient", key: tuple, data_timeout: float) -> Dict[str, Any]:
+        symbol, max_expirations, strikes_range = key
+        start = time.time()
+        chains = []
+        async for chain in client.iter_option_chains(
+            symbols=[symbol],
+            max_expirations=max_expirations,
+            strikes_range=strikes_range,
+            data_timeout=data_timeout
+        ):
+            if "error" in chain and "expiration" not in chain:
+                return {"symbol": symbol, "error": chain["error"], "built_at": time.time()}
+            chains.append(chain)
+
+        apply_model_greeks(chains, "fill")
+        underlying_price = next((c["underlying_price"] for c in chains if c.get("underlying_price")), None)
+        surface = {
+            "symbol": symbol,
+            **build_iv_surface(chains, underlying_price),
+            "build_time": round(time.time() - start, 3),
+            "built_at": time.time()
+        }
+        self._entries[key] = surface
+        return surface
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced
+        }
+
+
+# Global IV surface cache
+surface_cache = IVSurfaceCache()
+
+
+# ============================================================================
+# Chain Snapshots
+# Versioned per-chain row state so polling clients fetch only changed strikes
+# ============================================================================
+
+def _row_fingerprint(value: Any) -> Any:
+    """Comparable form of a chain row: NaN-safe, floats rounded past quote precision"""
+    if isinstance(value, dict):
+        return tuple((k, _row_fingerprint(v)) for k, v in sorted(value.items()))
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, 6)
+    return value
+
+
+@dataclass
+class ChainSnapshot:
+    """Last seen rows of one chain and the version each row last changed at"""
+    id: int
+    version: int = 0
+    rows: Dict[tuple, tuple] = field(default_factory=dict)  # (right, strike) -> (fingerprint, changed_at)
+    removed: Dict[tuple, int] = field(default_factory=dict)  # (right, strike) -> removed_at
+
+
+class ChainSnapshots:
+    """
+    Versioned snapshots of the chains clients poll.
+
+    Every chain response passes through `apply`, which diffs its rows
+    (bid/ask/last/volume/iv/greeks) against the previous response for the
+    same chain and stamps changed rows with a new version. The response
+    carries a version token; a client that sends it back as `since` gets only
+    the rows changed after it, plus the strikes that dropped out of the
+    window. Tokens from another chain, an evicted snapshot or an earlier
+    server run get the full chain with "full": true.
+
+    The rows come from the shared live tickers, so a steady-state poll costs
+    no new subscriptions, and only changed rows are serialized.
+    """
+
+    def __init__(self, max_entries: int = CHAIN_SNAPSHOT_MAX):
+        self.max_entries = max_entries
+        self._boot = f"{int(time.time() * 1000):x}"
+        self._next_id = 0
+        self._snapshots: Dict[tuple, ChainSnapshot] = {}
+        self.full = 0
+        self.deltas = 0
+        self.rows_sent = 0
+        self.rows_unchanged = 0
+
+    def _token(self, snapshot: ChainSnapshot) -> str:
+        return f"{self._boot}.{snapshot.id}.{snapshot.version}"
+
+    def _since_version(self, snapshot: ChainSnapshot, since: str) -> Optional[int]:
+        """Version a token refers to, or None if it is not from this snapshot"""
+        parts = since.split(".")
+        if len(parts) != 3 or parts[0] != self._boot or parts[1] != str(snapshot.id):
+            return None
+        try:
+            version = int(parts[2])
+        except ValueError:
+            return None
+        return version if 0 <= version <= snapshot.version else None
+
+    def _snapshot(self, key: tuple) -> ChainSnapshot:
+        snapshot = self._snapshots.pop(key, None)
+        if snapshot is None:
+            if len(self._snapshots) >= self.max_entries:
+                del self._snapshots[next(iter(self._snapshots))]  # Least recently polled
+            self._next_id += 1
+            snapshot = ChainSnapshot(id=self._next_id)
+        self._snapshots[key] = snapshot
+        return snapshot
+
+    def apply(self, key: tuple, chain: Dict[str, Any], since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Record a chain response and add its version token.
+
+        With a valid `since` token, calls/puts are cut down (in place) to the
+        rows changed after it and "removed" lists strikes that left the chain.
+        """
+        snapshot = self._snapshot(key)
+        changed_at: Optional[int] = None
+        seen = set()
+        for side, right in (("calls", "C"), ("puts", "P")):
+            for row in chain.get(side, []):
+                row_key = (right, row["strike"])
+                seen.add(row_key)
+                fingerprint = _row_fingerprint(row)
+                previous = snapshot.rows.get(row_key)
+                if previous is None or previous[0] != fingerprint:
+                    if changed_at is None:
+                        changed_at = snapshot.version + 1
+                    snapshot.rows[row_key] = (fingerprint, changed_at)
+                    snapshot.removed.pop(row_key, None)
+        gone = [row_key for row_key in snapshot.rows if row_key not in seen]
+        if gone:
+            if changed_at is None:
+                changed_at = snapshot.version + 1
+            for row_key in gone:
+                del snapshot.rows[row_key]
+                snapshot.removed[row_key] = changed_at
+        if changed_at is not None:
+            snapshot.version = changed_at
+        chain["version"] = self._token(snapshot)
+
+        since_version = self._since_version(snapshot, since) if since else None
+        if since_version is None:
+            self.full += 1
+            self.rows_sent += len(seen)
+            if since:
+                chain["full"] = True
+            return chain
+
+        self.deltas += 1
+        sent = 0
+        for side, right in (("calls", "C"), ("puts", "P")):
+            rows = [row for row in chain.get(side, []) if snapshot.rows[(right, row["strike"])][1] > since_version]
+            chain[side] = rows
+            sent += len(rows)
+        self.rows_sent += sent
+        self.rows_unchanged += len(seen) - sent
+        chain["since"] = since
+        chain["full"] = False
+        chain["unchanged"] = len(seen) - sent
+        chain["removed"] = [
+            {"strike": strike, "right": right}
+            for (right, strike), removed_at in sorted(snapshot.removed.items(), key=lambda item: (item[0][1], item[0][0]))
+            if removed_at > since_version
+        ]
+        return chain
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "snapshots": len(self._snapshots),
+            "max_entries": self.max_entries,
+            "full": self.full,
+            "deltas": self.deltas,
+            "rows_sent": self.rows_sent,
+            "rows_unchanged": self.rows_unchanged
+        }
+
+
+# Global chain snapshots for since=<version> polling
+chain_snapshots = ChainSnapshots()
+
+
+# ============================================================================
+# Portfolio Risk
+# Position greeks and price/vol shock P&L for the whole book in array passes
+# ============================================================================
+
+@dataclass
+class RiskBook:
+    """Per-position arrays that only change when positions do (IV is refreshed on a timer)"""
+    signature: tuple
+    contracts: List[ib.Contract]
+    underlyings: List[str]
+    quantity: np.ndarray
+    multiplier: np.ndarray
+    is_option: np.ndarray
+    is_call: np.ndarray
+    strike: np.ndarray
+    expiry: List[str]
+    iv: Optional[np.ndarray] = None
+    iv_at: float = 0.0
+
+
+class PortfolioRisk:
+    """
+    Net greeks and scenario P&L for the account's stock and option positions.
+
+    Positions come from the account state snapshot and prices from the shared
+    market data tickers. The book's static arrays and implied vols are kept
+    between calls: when only prices move, greeks and the shock grid are
+    recomputed at the new spots with the cached vols (no IV solve); IVs are
+    re-solved when positions change or after RISK_IV_TTL seconds.
+    """
+
+    def __init__(self, iv_ttl: float = RISK_IV_TTL):
+        self.iv_ttl = iv_ttl
+        self._book: Optional[RiskBook] = None
+        self.full = 0
+        self.incremental = 0
+
+    def _build_book(self, items: List[ib.PortfolioItem], signature: tuple) -> RiskBook:
+        contracts, underlyings, multiplier, is_option, is_call, strike, expiry = [], [], [], [], [], [], []
+        for item in items:
+            c = item.contract
+            option = c.secType == "OPT"
+            contracts.append(ib.Contract.create(
+                conId=c.conId, symbol=c.symbol, secType=c.secType, currency=c.currency, exchange="SMART",
+                lastTradeDateOrContractMonth=c.lastTradeDateOrContractMonth, strike=c.strike, right=c.right,
+                multiplier=c.multiplier, tradingClass=c.tradingClass
+            ))
+            underlyings.append(c.symbol)
+            multiplier.append(float(c.multiplier or 100) if option else 1.0)
+            is_option.append(option)
+            is_call.append(c.right.upper().startswith("C"))
+            strike.append(c.strike if option else np.nan)
+            expiry.append(c.lastTradeDateOrContractMonth if option else "")
+        return RiskBook(
+            signature=signature,
+            contracts=contracts,
+            underlyings=underlyings,
+            quantity=np.array([float(item.position) for item in items]),
+            multiplier=np.array(multiplier),
+            is_option=np.array(is_option, dtype=bool),
+            is_call=np.array(is_call, dtype=bool),
+            strike=np.array(strike),
+            expiry=expiry
+        )
+
+    async def compute(
+        self,
+        client: "OptionsClient",
+        account: str = "",
+        price_shocks: Optional[List[float]] = None,
+        vol_shocks: Optional[List[float]] = None,
+        data_timeout: float = CHAIN_DATA_TIMEOUT
+    ) -> Dict[str, Any]:
+        """
+        Args:
+            price_shocks: Relative underlying moves (default -10%..+10% in 2.5% steps)
+            vol_shocks: Absolute IV moves in vol points (default -5..+5)
+        """
+        price_shocks = np.array(price_shocks if price_shocks is not None else np.linspace(-0.10, 0.10, 9))
+        vol_shocks = np.array(vol_shocks if vol_shocks is not None else np.linspace(-5, 5, 5))
+
+        items = [
+            item for item in client.account.portfolio.values()
+            if item.contract.secType in ("STK", "OPT") and (not account or item.account == account)
+        ]
+        unsupported = [
+            _contract_json(item.contract) for item in client.account.portfolio.values()
+            if item.contract.secType not in ("STK", "OPT") and (not account or item.account == account)
+        ]
+        if not items:
+            return {"positions": [], "unsupported": unsupported, "note": "No stock or option positions"}
+
+        items.sort(key=lambda i: (i.account, i.contract.conId))
+        signature = tuple((item.account, item.contract.conId, item.position) for item in items)
+        book = self._book
+        if book is None or book.signature != signature:
+            book = self._book = self._build_book(items, signature)
+
+        # Live prices: one shared subscription for underlyings and option legs
+        symbols = sorted(set(book.underlyings))
+        stocks = [await client.get_stock_contract(sym) for sym in symbols]
+        tracked = [c for c in stocks if c] + [c for c, opt in zip(book.contracts, book.is_option) if opt]
+        async with client.market_data.subscribe(tracked, ready=has_price, timeout=data_timeout) as tickers:
+            by_con_id = {c.conId: t for c, t in zip(tracked, tickers)}
+        spot_by_symbol = {
+            sym: ticker_price(by_con_id[stock.conId]) if stock else None for sym, stock in zip(symbols, stocks)
+        }
+
+        n = len(book.contracts)
+        spot = np.array([spot_by_symbol.get(sym) or np.nan for sym in book.underlyings])
+        price = np.full(n, np.nan)
+        ib_iv = np.full(n, np.nan)
+        for i, (contract, item) in enumerate(zip(book.contracts, items)):
+            ticker = by_con_id.get(contract.conId)
+            if book.is_option[i]:
+                if ticker is not None:
+                    price[i] = option_mid(_number(ticker.bid), _number(ticker.ask), _number(ticker.last))
+                    if ticker.modelGreeks and _has_value(ticker.modelGreeks.impliedVol):
+                        ib_iv[i] = ticker.modelGreeks.impliedVol
+                if not np.isfinite(price[i]):
+                    price[i] = _number(item.marketPrice) or np.nan
+            elif not np.isfinite(spot[i]):
+                spot[i] = _number(item.marketPrice) or np.nan
+
+        now = time.time()
+        years = np.array([years_to_expiry(e, now) if e else 0.0 for e in book.expiry])
+        opt = book.is_option
+
+        # Implied vols: IB's where sent, else solved; reused while only prices move
+        if book.iv is None or now - book.iv_at > self.iv_ttl:
+            solved = implied_vol(price, spot, book.strike, years, RISK_FREE_RATE, DIVIDEND_YIELD, book.is_call)
+            book.iv = np.where(np.isfinite(ib_iv), ib_iv, solved)
+            book.iv_at = now
+            self.full += 1
+        else:
+            self.incremental += 1
+        iv = book.iv
+
+        # Greeks per unit (stocks: delta 1), then scaled by quantity x multiplier
+        with np.errstate(all="ignore"):
+            g = bs_greeks(spot, book.strike, years, RISK_FREE_RATE, DIVIDEND_YIELD, iv, book.is_call)
+        valid = ~opt | (np.isfinite(iv) & (years > 0) & np.isfinite(spot))
+        scale = book.quantity * book.multiplier
+        unit = {
+            "delta": np.where(opt, g["delta"], 1.0),
+            "gamma": np.where(opt, g["gamma"], 0.0),
+            "theta": np.where(opt, g["theta"], 0.0),
+            "vega": np.where(opt, g["vega"], 0.0)
+        }
+        position_greeks = {name: np.where(valid, values * scale, 0.0) for name, values in unit.items()}
+
+        # Shock grid: (price shocks, vol shocks, positions) in one broadcast
+        shocked_spot = spot[None, None, :] * (1 + price_shocks[:, None, None])
+        shocked_iv = np.maximum(iv[None, None, :] + vol_shocks[None, :, None] / 100.0, 1e-4)
+        with np.errstate(all="ignore"):
+            base = bs_price(spot, book.strike, years, RISK_FREE_RATE, DIVIDEND_YIELD, iv, book.is_call)
+            shocked = bs_price(shocked_spot, book.strike, years, RISK_FREE_RATE, DIVIDEND_YIELD, shocked_iv, book.is_call)
+        option_pnl = (shocked - base[None, None, :]) * scale
+        stock_pnl = (shocked_spot - spot[None, None, :]) * scale
+        pnl = np.where(opt & valid, option_pnl, np.where(~opt & np.isfinite(spot), stock_pnl, 0.0)).sum(axis=2)
+
+        positions = []
+        for i, contract in enumerate(book.contracts):
+            positions.append({
+                "account": items[i].account,
+                "contract": _contract_json(contract),
+                "quantity": float(book.quantity[i]),
+                "underlying_price": _number(spot[i]),
+                "price": _number(price[i]) if opt[i] else _number(spot[i]),
+                "iv": _number(iv[i]) if opt[i] else None,
+                "valid": bool(valid[i]),
+                **{name: float(values[i]) for name, values in position_greeks.items()}
+            })
+
+        by_underlying: Dict[str, Dict[str, float]] = {}
+        for i, sym in enumerate(book.underlyings):
+            agg = by_underlying.setdefault(sym, {"delta": 0.0, "gamma": 0.0, "theta": 0.0, "vega": 0.0})
+            for name, values in position_greeks.items():
+                agg[name] += float(values[i])
+            agg["dollar_delta"] = agg["delta"] * (_number(spot[i]) or 0.0)
+
+        return {
+            "positions": positions,
+            "by_underlying": by_underlying,
+            "totals": {name: float(values.sum()) for name, values in position_greeks.items()},
+            "scenarios": {
+                "price_shocks": [round(float(p), 6) for p in price_shocks],
+                "vol_shocks": [round(float(v), 6) for v in vol_shocks],
+                "pnl": [[round(float(v), 2) for v in row] for row in pnl]
+            },
+            "unsupported": unsupported,
+            "iv_age": round(now - book.iv_at, 3),
+            "computed_at": now
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "positions": len(self._book.contracts) if self._book else 0,
+            "full": self.full,
+            "incremental": self.incremental,
+            "iv_ttl": self.iv_ttl
+        }
+
+
+# Global portfolio risk engine
+portfolio_risk = PortfolioRisk()
+
+
+# ============================================================================
+# Cache Pre-Warming
+# Watchlist contracts, option params and near-ATM lines warmed ahead of demand
+# ============================================================================
+
+@dataclass
+class WatchItem:
+    """One watchlist underlying and how much of its chain to keep warm"""
+    symbol: str
+    expiry_days: int = WARM_EXPIRY_DAYS
+    strikes: int = WARM_STRIKES
+
+
+def load_watchlist(path: str = WARM_WATCHLIST_PATH, symbols: str = WARM_SYMBOLS) -> Dict[str, Any]:
+    """
+    Read the watchlist from the JSON file at `path` if it exists, else `symbols`.
+
+    The file holds either a list of symbols or an object such as
+    {"symbols": ["SPY", {"symbol": "TSLA", "expiry_days": 14, "strikes": 5}],
+    "times": ["09:25", "12:00"]}. Entries without their own window or width
+    use WARM_EXPIRY_DAYS / WARM_STRIKES; "times" replaces WARM_TIMES.
+
+    Returns {"items": [WatchItem], "times": ["HH:MM"]}
+    """
+    data: Any = None
+    if path and os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    times: Any = WARM_TIMES
+    if data is None:
+        entries = symbols.split(",")
+    elif isinstance(data, list):
+        entries = data
+    else:
+        entries = data.get("symbols", [])
+        times = data.get("times", WARM_TIMES)
+    if isinstance(times, str):
+        times = times.split(",")
+
+    items: Dict[str, WatchItem] = {}
+    for entry in entries:
+        if isinstance(entry, dict):
+            item = WatchItem(
+                symbol=str(entry.get("symbol", "")).strip().upper(),
+                expiry_days=int(entry.get("expiry_days", WARM_EXPIRY_DAYS)),
+                strikes=int(entry.get("strikes", WARM_STRIKES))
+            )
+        else:
+            item = WatchItem(symbol=str(entry).strip().upper())
+        if item.symbol:
+            items[item.symbol] = item
+    return {"items": list(items.values()), "times": [str(t).strip() for t in times if str(t).strip()]}
+
+
+def next_warm_time(times: List[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """Earliest configured HH:MM America/New_York on a weekday strictly after `now`"""
+    now = (now or datetime.now(_MARKET_TZ)).astimezone(_MARKET_TZ)
+    best = None
+    for value in times:
+        try:
+            hour, minute = (int(part) for part in value.split(":"))
+            candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        except ValueError:
+            logger.warning(f"Ignoring invalid warm time {value!r} (expected HH:MM)")
+            continue
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        while candidate.weekday() >= 5:
+            candidate += timedelta(days=1)
+        if best is None or candidate < best:
+            best = candidate
+    return best
+
+
+class CacheWarmer:
+    """
+    Pre-warms the caches the first chain requests of a session depend on.
+
+    Runs once at startup and then at the configured times. For every
+    watchlist symbol it qualifies the underlying, fetches option params and
+    qualifies the calls and puts within `strikes` of ATM for each expiration
+    in the window. It then opens lines for the nearest-expiration contracts
+    closest to ATM, round-robin across symbols, up to `line_share` of the
+    market data line budget.
+
+    Warming yields to live traffic: before each step it pauses (up to
+    `max_pause` seconds at a time) while requests are queued on the governor
+    or in flight in the coalescer, and it only opens lines that are free
+    (see MarketDataManager.prewarm).
     """
 
-    def __init__(self, host: str, port: int, client_id: int):
-        self.host = host
-        self.port = port
-        self.client_id = client_id
-        self._ib: Optional[ib.IB] = None
+    def __init__(
+        self,
+        line_share: float = WARM_LINE_SHARE,
+        hold: float = WARM_HOLD,
+        max_pause: float = 5.0,
+        chunk: int = 10
+    ):
+        self.line_share = line_share
+        self.hold = hold
+        self.max_pause = max_pause
+        self.chunk = chunk
+        self._client: Optional[OptionsClient] = None
+        self._task: Optional[asyncio.Task] = None
         self._lock = asyncio.Lock()
-        self._connected = False
-        self._monitor_task: Optional[asyncio.Task] = None
+        self._watchlist: Dict[str, Any] = {"items": [], "times": []}
+        self._underlying_con_ids: Dict[str, int] = {}
+        self._line_con_ids: List[int] = []
+        self.running = False
+        self.runs = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.next_run_at: Optional[float] = None
+
+    def _reload(self) -> None:
+        try:
+            self._watchlist = load_watchlist()
+        except Exception as e:
+            logger.error(f"Cache warmer could not read watchlist {WARM_WATCHLIST_PATH}: {e}")
 
-    async def connect(self) -> bool:
-        """Connect to IB Gateway"""
-        async with self._lock:
-            if self._connected and self._ib and self._ib.isConnected():
-                return True
+    @staticmethod
+    def _live_traffic() -> bool:
+        return bool(governor.lines.stats.waiting or governor.messages.stats.waiting or coalescer.inflight_count)
 
+    async def _yield_to_live(self, run: Dict[str, Any]) -> None:
+        """Pause while live requests are queued or in flight (at most max_pause seconds)"""
+        if not self._live_traffic():
+            return
+        start = time.monotonic()
+        while self._live_traffic() and time.monotonic() - start < self.max_pause:
+            await asyncio.sleep(0.1)
+        run["yields"] += 1
+        run["yield_time"] += time.monotonic() - start
+
+    async def warm(self, client: OptionsClient, trigger: str = "manual") -> Dict[str, Any]:
+        """Run one warming pass over the watchlist and return its report"""
+        async with self._lock:
+            self._reload()
+            run = {
+                "trigger": trigger,
+                "started_at": time.time(),
+                "symbols": len(self._watchlist["items"]),
+                "underlyings": 0,
+                "option_params": 0,
+                "expirations": 0,
+                "contracts": 0,
+                "qualified": 0,
+                "lines": 0,
+                "yields": 0,
+                "yield_time": 0.0,
+                "errors": []
+            }
+            self.running = True
             try:
-                self._ib = ib.IB()
-                await self._ib.connectAsync(
-                    self.host,
-                    self.port,
-                    clientId=self.client_id,
-                    readonly=True,
-                    timeout=30
-                )
-                self._connected = True
-                logger.info(f"Options client connected to IB at {self.host}:{self.port}")
-                return True
+                await self._warm(client, run)
             except Exception as e:
-                logger.error(f"Options client failed to connect: {e}")
-                self._connected = False
-                return False
-
-    async def disconnect(self):
-        """Disconnect from IB Gateway"""
-        async with self._lock:
-            if self._ib:
-                self._ib.disconnect()
-                self._connected = False
-                logger.info("Options client disconnected")
-
-    async def ensure_connected(self) -> bool:
-        """Ensure connection is active, reconnect if needed"""
-        if not self._connected or not self._ib or not self._ib.isConnected():
-            return await self.connect()
-        return True
+                logger.error(f"Cache warm ({trigger}) failed: {e!r}")
+                run["errors"].append(repr(e))
+            finally:
+                self.running = False
+            run["duration"] = round(time.time() - run["started_at"], 3)
+            run["yield_time"] = round(run["yield_time"], 3)
+            self.runs += 1
+            self.last_run = run
+            logger.info(
+                f"Cache warm ({trigger}): {run['underlyings']}/{run['symbols']} underlyings, "
+                f"{run['qualified']}/{run['contracts']} option contracts, {run['lines']} lines "
+                f"in {run['duration']}s ({run['yields']} yields)"
+            )
+            return run
 
-    async def start_health_monitor(self) -> None:
-        """Start background liveness monitor (mirrors worker pool's pattern)."""
-        if self._monitor_task is None or self._monitor_task.done():
-            self._monitor_task = asyncio.create_task(self._health_monitor_loop())
-            logger.info(f"OptionsClient health monitor started (interval: {HEALTH_CHECK_INTERVAL}s)")
+    async def _warm(self, client: OptionsClient, run: Dict[str, Any]) -> None:
+        items: List[WatchItem] = self._watchlist["items"]
+        if not items:
+            return
+        if not await client.ensure_connected():
+            run["errors"].append("Not connected to IB")
+            return
+        ib_conn = client.connection
+        market_data = client.market_data
+        line_allowance = int(governor.lines.max_lines * self.line_share)
+
+        # Underlyings in one batch, then their prices from shared tickers
+        await self._yield_to_live(run)
+        stocks = await contract_cache.qualify(ib_conn, [ib.Stock(item.symbol, "SMART", "USD") for item in items])
+        underlyings = []
+        for item, stock in zip(items, stocks):
+            if stock:
+                underlyings.append((item, stock))
+            else:
+                run["errors"].append(f"Could not qualify {item.symbol}")
+        run["underlyings"] = len(underlyings)
+        self._underlying_con_ids = {item.symbol: stock.conId for item, stock in underlyings}
+
+        stock_tickers = await market_data.prewarm([stock for _, stock in underlyings][:line_allowance], self.hold)
+        await market_data.wait_until_ready(stock_tickers, has_price, MKT_DATA_WARMUP)
+        prices = {t.contract.conId: ticker_price(t) for t in stock_tickers}
+        line_con_ids = [t.contract.conId for t in stock_tickers]
+
+        # Option params and every chain contract in the window, one symbol per step
+        now = datetime.now(_MARKET_TZ)
+        today = now.strftime("%Y%m%d")
+        nearest: List[List[ib.Contract]] = []  # Per symbol, closest to ATM first
+        for item, stock in underlyings:
+            await self._yield_to_live(run)
+            try:
+                params = await client.option_params.get(ib_conn, stock)
+            except Exception as e:
+                run["errors"].append(f"{item.symbol}: option params failed: {e!r}")
+                continue
+            if not params:
+                run["errors"].append(f"{item.symbol}: no option chains")
+                continue
+            run["option_params"] += 1
+
+            last = (now + timedelta(days=item.expiry_days)).strftime("%Y%m%d")
+            expirations = [e for e in params.expirations if today <= e <= last]
+            price = prices.get(stock.conId)
+            strikes = select_strikes(params.strikes, price, item.strikes)
+            if not expirations or not strikes:
+                continue
+            # One expiration per step so live requests never queue behind a whole symbol
+            front: List[ib.Contract] = []
+            for i, expiration in enumerate(expirations):
+                if i:
+                    await self._yield_to_live(run)
+                contracts = client.chain_contracts(item.symbol, expiration, params, strikes)
+                qualified = [c for c in await contract_cache.qualify(ib_conn, contracts) if c]
+                run["expirations"] += 1
+                run["contracts"] += len(contracts)
+                run["qualified"] += len(qualified)
+                if i == 0:
+                    front = qualified
+            reference = price or strikes[len(strikes) // 2]
+            nearest.append(sorted(front, key=lambda c: abs(c.strike - reference)))
+
+        # Near-ATM lines, round-robin across symbols, while the share and free lines last
+        order = []
+        for rank in range(max((len(contracts) for contracts in nearest), default=0)):
+            order.extend(contracts[rank] for contracts in nearest if rank < len(contracts))
+        order = order[:max(0, line_allowance - len(line_con_ids))]
+        for start in range(0, len(order), self.chunk):
+            await self._yield_to_live(run)
+            chunk = order[start:start + self.chunk]
+            opened = await market_data.prewarm(chunk, self.hold)
+            line_con_ids.extend(t.contract.conId for t in opened)
+            if len(opened) < len(chunk):
+                break  # No free lines left
+        self._line_con_ids = line_con_ids
+        run["lines"] = len(line_con_ids)
+
+    async def start(self, client: OptionsClient) -> None:
+        """Warm once now and then at the configured times (no-op for an empty watchlist)"""
+        self._client = client
+        self._reload()
+        if not self._watchlist["items"]:
+            logger.info("Cache warmer: empty watchlist, not scheduled")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._schedule_loop())
+            logger.info(
+                f"Cache warmer started: {len(self._watchlist['items'])} symbols, "
+                f"times {self._watchlist['times']} America/New_York"
+            )
 
-    async def stop_health_monitor(self) -> None:
-        if self._monitor_task and not self._monitor_task.done():
-            self._monitor_task.cancel()
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
             try:
-                await self._monitor_task
+                await self._task
             except asyncio.CancelledError:
                 pass
 
-    async def _health_monitor_loop(self) -> None:
-        """Periodic liveness check via reqCurrentTime; reconnect on silent failure."""
-        consecutive_failures = 0
+    async def _schedule_loop(self) -> None:
+        client = self._client
+        trigger = "startup"
         while True:
             try:
-                await asyncio.sleep(HEALTH_CHECK_INTERVAL)
-
-                healthy = False
-                if self._connected and self._ib and self._ib.isConnected():
-                    try:
-                        await asyncio.wait_for(self._ib.reqCurrentTimeAsync(), timeout=10)
-                        healthy = True
-                        consecutive_failures = 0
-                    except Exception as e:
-                        logger.warning(f"OptionsClient liveness ping failed: {e!r}; forcing reconnect")
-                        self._connected = False
-                        if self._ib:
-                            try:
-                                self._ib.disconnect()
-                            except Exception:
-                                pass
-
-                if not healthy:
-                    consecutive_failures += 1
-                    backoff = min(5 * (2 ** (consecutive_failures - 1)), 60)
-                    logger.info(f"OptionsClient: reconnect attempt #{consecutive_failures} (next backoff {backoff}s if fails)")
-                    ok = await self.connect()
-                    if ok:
-                        consecutive_failures = 0
-                        logger.info("OptionsClient reconnected")
-                    else:
-                        await asyncio.sleep(backoff)
+                # The options client's health monitor handles (re)connecting
+                while not client.is_connected:
+                    await asyncio.sleep(5)
+                await self.warm(client, trigger)
+                trigger = "scheduled"
+
+                next_run = next_warm_time(self._watchlist["times"])
+                if next_run is None:
+                    self.next_run_at = None
+                    break
+                self.next_run_at = next_run.timestamp()
+                await asyncio.sleep(max(0.0, self.next_run_at - time.time()))
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"OptionsClient monitor unexpected error: {e!r}")
-                await asyncio.sleep(5)
+                logger.error(f"Cache warmer loop error: {e!r}")
+                await asyncio.sleep(30)
 
-    async def get_stock_contract(self, symbol: str) -> Optional[ib.Stock]:
-        """Get qualified stock contract"""
-        if not await self.ensure_connected():
-            return None
+    def get_stats(self) -> Dict[str, Any]:
+        """Watchlist coverage right now, plus the last pass and the next scheduled one"""
+        items = self._watchlist["items"]
+        coverage = None
+        if self._client:
+            coverage = {
+                "symbols": len(items),
+                "underlyings_qualified": sum(
+                    1 for item in items if contract_cache.get(ib.Stock(item.symbol, "SMART", "USD"))
+                ),
+                "option_params_cached": sum(
+                    1 for con_id in self._underlying_con_ids.values() if self._client.option_params.peek(con_id)
+                ),
+                "lines_streaming": sum(
+                    1 for con_id in self._line_con_ids if self._client.market_data.is_streaming(con_id)
+                )
+            }
+        return {
+            "watchlist": [item.symbol for item in items],
+            "times": self._watchlist["times"],
+            "line_share": self.line_share,
+            "running": self.running,
+            "runs": self.runs,
+            "coverage": coverage,
+            "last_run": self.last_run,
+            "next_run": datetime.fromtimestamp(self.next_run_at, _MARKET_TZ).isoformat() if self.next_run_at else None
+        }
 
-        try:
-            stock = ib.Stock(symbol.upper(), "SMART", "USD")
-            contracts = await asyncio.wait_for(
-                self._ib.qualifyContractsAsync(stock),
-                timeout=30
-            )
-            if contracts:
-                return contracts[0] if isinstance(contracts[0], ib.Contract) else None
-            return None
-        except Exception as e:
-            logger.error(f"Failed to get stock contract for {symbol}: {e}")
-            return None
 
-    async def get_stock_price(self, symbol: str) -> Optional[float]:
-        """Get current stock price using market data snapshot"""
-        if not await self.ensure_connected():
-            return None
+# Global watchlist cache warmer
+cache_warmer = CacheWarmer()
 
-        try:
-            stock = await self.get_stock_contract(symbol)
-            if not stock:
-                return None
 
-            # Request market data type 4 = delayed frozen data (available without subscription)
-            self._ib.reqMarketDataType(4)
+# ============================================================================
+# Historical Bar Store
+# Columnar, memory-mapped bars per (conId, bar size); only gaps go to IB
+# ============================================================================
 
-            # Request ticker
-            ticker = self._ib.reqMktData(stock, '', False, False)
-            await asyncio.sleep(2)  # Wait for data
+BAR_COLUMNS = ("ts", "open", "high", "low", "close", "volume", "average", "bar_count")
 
-            # Cancel market data
-            self._ib.cancelMktData(stock)
+_BAR_UNITS = {"sec": 1, "secs": 1, "min": 60, "mins": 60, "hour": 3600, "hours": 3600,
+              "day": 86400, "days": 86400, "week": 7 * 86400, "weeks": 7 * 86400}
+_DURATION_UNITS = {"S": 1, "D": 86400, "W": 7 * 86400, "M": 30 * 86400, "Y": 365 * 86400}
 
-            # Get price (try last, then close, then bid/ask midpoint)
-            price = ticker.last
-            if not price or price <= 0:
-                price = ticker.close
-            if not price or price <= 0:
-                if ticker.bid and ticker.ask and ticker.bid > 0 and ticker.ask > 0:
-                    price = (ticker.bid + ticker.ask) / 2
+# Longest duration IB accepts in one request, by bar size (seconds -> seconds)
+_MAX_SPANS = ((1, 1800), (5, 3600), (10, 14400), (30, 28800), (60, 86400),
+              (120, 2 * 86400), (1200, 7 * 86400), (8 * 3600, 30 * 86400))
 
-            return float(price) if price and price > 0 else None
-        except Exception as e:
-            logger.error(f"Failed to get price for {symbol}: {e}")
-            return None
 
-    async def get_option_expirations(self, symbol: str) -> List[str]:
-        """
-        Get available option expiration dates using reqSecDefOptParams.
-        This is the proper way to get options data - no throttling.
+def bar_seconds(bar_size: str) -> int:
+    """IB bar size setting ("1 min", "5 mins", "1 day") in seconds"""
+    count, unit = bar_size.split()
+    if unit not in _BAR_UNITS:
+        raise ValueError(f"Unsupported bar size: {bar_size}")
+    return int(count) * _BAR_UNITS[unit]
+
+
+def duration_seconds(duration: str) -> int:
+    """IB duration string ("3600 S", "1 D", "2 W") in seconds"""
+    count, unit = duration.split()
+    if unit not in _DURATION_UNITS:
+        raise ValueError(f"Unsupported duration: {duration}")
+    return int(count) * _DURATION_UNITS[unit]
+
+
+def _duration_str(seconds: float, step: int) -> str:
+    if seconds <= 86400 and step < 86400:
+        return f"{max(int(-(-seconds // 1)), 60)} S"
+    if seconds <= 365 * 86400:
+        return f"{int(-(-seconds // 86400))} D"
+    return f"{int(-(-seconds // (365 * 86400)))} Y"
+
+
+def _bar_timestamp(value: Any) -> int:
+    """Epoch seconds for an IB bar date (aware datetime intraday, date for daily bars)"""
+    if isinstance(value, datetime):
+        return int((value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp())
+    return int(datetime(value.year, value.month, value.day, tzinfo=_MARKET_TZ).timestamp())
 
-        Returns list of expiration dates in YYYYMMDD format.
-        """
-        if not await self.ensure_connected():
-            return []
 
+def parse_end_time(value: str) -> int:
+    """Epoch seconds for an IB-style end time ("" = now, "YYYYMMDD HH:MM:SS" in market time, or ISO 8601)"""
+    if not value:
+        return int(time.time())
+    for fmt in ("%Y%m%d %H:%M:%S", "%Y%m%d-%H:%M:%S", "%Y%m%d"):
         try:
-            stock = await self.get_stock_contract(symbol)
-            if not stock:
-                logger.error(f"Could not qualify stock contract for {symbol}")
-                return []
+            parsed = datetime.strptime(value, fmt)
+            tz = timezone.utc if "-" in value else _MARKET_TZ
+            return int(parsed.replace(tzinfo=tz).timestamp())
+        except ValueError:
+            pass
+    parsed = datetime.fromisoformat(value)
+    return int((parsed if parsed.tzinfo else parsed.replace(tzinfo=_MARKET_TZ)).timestamp())
+
+
+def _subtract(coverage: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Parts of [start, end) not covered by the sorted, merged `coverage`"""
+    gaps = []
+    cursor = start
+    for lo, hi in coverage:
+        if hi <= cursor:
+            continue
+        if lo >= end:
+            break
+        if lo > cursor:
+            gaps.append([cursor, lo])
+        cursor = max(cursor, hi)
+    if cursor < end:
+        gaps.append([cursor, end])
+    return gaps
+
+
+def _union(coverage: List[List[int]], start: int, end: int) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for lo, hi in sorted(coverage + [[start, end]]):
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
 
-            logger.info(f"Requesting option params for {symbol} (conId={stock.conId})")
 
-            # Use reqSecDefOptParams - this is the proper way to get options chain params
-            # It returns expirations and strikes without throttling
-            chains = await asyncio.wait_for(
-                self._ib.reqSecDefOptParamsAsync(
-                    underlyingSymbol=stock.symbol,
-                    futFopExchange="",  # Empty for stocks
-                    underlyingSecType=stock.secType,
-                    underlyingConId=stock.conId
-                ),
-                timeout=OPTIONS_TIMEOUT
-            )
+@dataclass
+class BarSeries:
+    """Bars for one (conId, bar size, whatToShow, useRTH) plus the time ranges already fetched"""
+    columns: Dict[str, np.ndarray]
+    coverage: List[List[int]] = field(default_factory=list)
+    version: int = 0
+
+    def __len__(self) -> int:
+        return len(self.columns["ts"])
+
+    def merge(self, bars: List[ib.BarData]) -> None:
+        """Add bars, replacing stored bars with the same timestamp"""
+        if not bars:
+            return
+        new = {
+            "ts": np.array([_bar_timestamp(b.date) for b in bars], dtype=np.int64),
+            "open": np.array([b.open for b in bars], dtype=np.float64),
+            "high": np.array([b.high for b in bars], dtype=np.float64),
+            "low": np.array([b.low for b in bars], dtype=np.float64),
+            "close": np.array([b.close for b in bars], dtype=np.float64),
+            "volume": np.array([b.volume for b in bars], dtype=np.float64),
+            "average": np.array([b.average for b in bars], dtype=np.float64),
+            "bar_count": np.array([b.barCount for b in bars], dtype=np.int64)
+        }
+        combined = {c: np.concatenate([self.columns[c], new[c]]) for c in BAR_COLUMNS}
+        # np.unique keeps the first occurrence; reverse so the newer bar wins
+        _, idx = np.unique(combined["ts"][::-1], return_index=True)
+        keep = len(combined["ts"]) - 1 - idx
+        self.columns = {c: combined[c][keep] for c in BAR_COLUMNS}
+
+    def slice(self, start: int, end: int) -> Dict[str, np.ndarray]:
+        ts = self.columns["ts"]
+        lo, hi = np.searchsorted(ts, start, "left"), np.searchsorted(ts, end, "left")
+        return {c: self.columns[c][lo:hi] for c in BAR_COLUMNS}
+
+
+def resample_bars(columns: Dict[str, np.ndarray], seconds: int) -> Dict[str, np.ndarray]:
+    """Aggregate bars into `seconds` buckets (daily and longer buckets align to the market timezone)"""
+    ts = columns["ts"]
+    if len(ts) == 0:
+        return columns
+    offset = int(datetime.now(_MARKET_TZ).utcoffset().total_seconds()) if seconds >= 86400 else 0
+    buckets = (ts + offset) // seconds * seconds - offset
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+    ends = np.concatenate([starts[1:], [len(ts)]])
+    volume = np.add.reduceat(columns["volume"], starts)
+    weighted = np.add.reduceat(columns["average"] * columns["volume"], starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average = np.where(volume > 0, weighted / volume, columns["close"][ends - 1])
+    return {
+        "ts": buckets[starts],
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": columns["close"][ends - 1],
+        "volume": volume,
+        "average": average,
+        "bar_count": np.add.reduceat(columns["bar_count"], starts)
+    }
 
-            if not chains:
-                logger.warning(f"No option chains returned for {symbol}")
-                return []
 
-            # Get the SMART exchange chain (most liquid)
-            smart_chain = next((c for c in chains if c.exchange == "SMART"), None)
-            if not smart_chain:
-                # Fall back to first available
-                smart_chain = chains[0]
+def bars_to_json(columns: Dict[str, np.ndarray], daily: bool = False) -> List[Dict[str, Any]]:
+    """Row-oriented bar dicts for JSON responses"""
+    rows = []
+    for i in range(len(columns["ts"])):
+        when = datetime.fromtimestamp(int(columns["ts"][i]), _MARKET_TZ if daily else timezone.utc)
+        rows.append({
+            "date": when.date().isoformat() if daily else when.isoformat(),
+            "open": float(columns["open"][i]),
+            "high": float(columns["high"][i]),
+            "low": float(columns["low"][i]),
+            "close": float(columns["close"][i]),
+            "volume": _number(columns["volume"][i]),
+            "average": _number(columns["average"][i]),
+            "bar_count": int(columns["bar_count"][i])
+        })
+    return rows
 
-            expirations = sorted(list(smart_chain.expirations))
-            logger.info(f"Found {len(expirations)} expirations for {symbol}")
-            return expirations
 
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout getting option expirations for {symbol}")
-            return []
+class HistoricalDataError(Exception):
+    """A historical data request failed or timed out (its range stays unfetched)"""
+
+
+def _is_history_warning(code: int, message: str) -> bool:
+    """Error events that do not fail a historical request ("no data" is a valid empty answer)"""
+    if code == 165 or 2100 <= code < 2200:
+        return True
+    return code == 162 and "returned no data" in message.lower()
+
+
+class BarStore:
+    """
+    Local historical bar store.
+
+    Each series is kept as one NumPy array per column (memory-mapped from
+    BAR_STORE_PATH when set) together with the time ranges already fetched.
+    A query only asks IB for the parts of its range that were never fetched;
+    the still-forming last bar is never marked as covered, so it gets refreshed.
+    """
+
+    def __init__(self, path: str = BAR_STORE_PATH):
+        self.path = path
+        self._series: Dict[tuple, BarSeries] = {}
+        self._locks: Dict[tuple, asyncio.Lock] = {}
+        self.hits = 0
+        self.fills = 0
+        self.failed_fills = 0
+        self.fetched_bars = 0
+
+    @staticmethod
+    def key_for(con_id: int, bar_size: str, what_to_show: str, use_rth: bool) -> tuple:
+        return (con_id, bar_size, what_to_show.upper(), bool(use_rth))
+
+    def _dir(self, key: tuple) -> str:
+        con_id, bar_size, what_to_show, use_rth = key
+        slug = f"{bar_size.replace(' ', '')}_{what_to_show.lower()}_{'rth' if use_rth else 'all'}"
+        return os.path.join(self.path, str(con_id), slug)
+
+    def _load(self, key: tuple) -> BarSeries:
+        empty = BarSeries({c: np.empty(0, dtype=np.int64 if c in ("ts", "bar_count") else np.float64)
+                           for c in BAR_COLUMNS})
+        if not self.path:
+            return empty
+        directory = self._dir(key)
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+            columns = {c: np.load(os.path.join(directory, f"{c}.{meta['version']}.npy"), mmap_mode="r")
+                       for c in BAR_COLUMNS}
+            return BarSeries(columns, meta["coverage"], meta["version"])
+        except FileNotFoundError:
+            return empty
         except Exception as e:
-            logger.error(f"Failed to get option expirations for {symbol}: {e}")
-            return []
+            logger.warning(f"Bar store: ignoring unreadable series {directory}: {e}")
+            return empty
+
+    def _persist(self, key: tuple, series: BarSeries) -> None:
+        """Write a new version of every column, then switch meta.json over atomically"""
+        directory = self._dir(key)
+        os.makedirs(directory, exist_ok=True)
+        version = series.version + 1
+        for c in BAR_COLUMNS:
+            np.save(os.path.join(directory, f"{c}.{version}.npy"), np.ascontiguousarray(series.columns[c]))
+        tmp = os.path.join(directory, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": version, "coverage": series.coverage}, f)
+        os.replace(tmp, os.path.join(directory, "meta.json"))
+        for c in BAR_COLUMNS:
+            try:
+                os.remove(os.path.join(directory, f"{c}.{series.version}.npy"))
+            except FileNotFoundError:
+                pass
+        series.version = version
 
-    async def get_option_chain(
+    def _get_series(self, key: tuple) -> BarSeries:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = self._load(key)
+        return series
+
+    async def get_bars(
         self,
-        symbol: str,
-        expiration: str,
-        strikes_range: int = 20
-    ) -> Dict[str, Any]:
-        """
-        Get options chain with market data for a specific expiration.
+        ib_conn: ib.IB,
+        contract: ib.Contract,
+        bar_size: str,
+        start: int,
+        end: int,
+        what_to_show: str = "TRADES",
+        use_rth: bool = True
+    ) -> Dict[str, np.ndarray]:
+        """Bars with start <= ts < end, fetching only never-seen ranges from IB"""
+        key = self.key_for(contract.conId, bar_size, what_to_show, use_rth)
+        step = bar_seconds(bar_size)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            series = self._get_series(key)
+            # A gap shorter than one bar cannot hold a completed bar
+            gaps = [g for g in _subtract(series.coverage, start, end) if g[1] - g[0] >= step]
+            if not gaps:
+                self.hits += 1
+                return series.slice(start, end)
 
-        Args:
-            symbol: Stock symbol
-            expiration: Expiration date in YYYYMMDD format
-            strikes_range: Number of strikes on each side of ATM
+            try:
+                for gap_start, gap_end in gaps:
+                    await self._fill(ib_conn, contract, key, series, gap_start, gap_end, step)
+            finally:
+                if self.path:
+                    await asyncio.to_thread(self._persist, key, series)
+            return series.slice(start, end)
+
+    async def get_duration(
+        self,
+        ib_conn: ib.IB,
+        contract: ib.Contract,
+        bar_size: str,
+        duration: str,
+        end: int,
+        what_to_show: str = "TRADES",
+        use_rth: bool = True
+    ) -> Dict[str, np.ndarray]:
+        """
+        Bars for an IB duration string ending at `end`, in IB's terms.
 
-        Returns dict with underlying_price, calls, puts
+        "N D" is the last N trading sessions rather than the last N * 86400
+        seconds, so on weekends, holidays and before the open it still
+        returns the previous sessions: the lookback widens (as in `tail`)
+        until it holds N sessions. Other units stay trailing seconds.
         """
-        if not await self.ensure_connected():
-            return {"error": "Not connected to IB"}
+        span = duration_seconds(duration)
+        count, unit = duration.split()
+        if unit != "D":
+            return await self.get_bars(ib_conn, contract, bar_size, end - span, end, what_to_show, use_rth)
+
+        sessions = int(count)
+        lookback = span
+        # Two weekend days per five sessions, plus room for a long holiday weekend
+        max_lookback = span + (sessions + 4) // 5 * 2 * 86400 + 2 * 86400
+        while True:
+            columns = await self.get_bars(ib_conn, contract, bar_size, end - lookback, end, what_to_show, use_rth)
+            days = [datetime.fromtimestamp(int(ts), _MARKET_TZ).date() for ts in columns["ts"]]
+            found = sorted(set(days))
+            if len(found) >= sessions:
+                # The window may start partway into the earliest session; reach back to its start
+                first_day = found[-sessions]
+                day_start = int(datetime(first_day.year, first_day.month, first_day.day, tzinfo=_MARKET_TZ).timestamp())
+                if day_start < end - lookback:
+                    columns = await self.get_bars(ib_conn, contract, bar_size, day_start, end, what_to_show, use_rth)
+                    days = [datetime.fromtimestamp(int(ts), _MARKET_TZ).date() for ts in columns["ts"]]
+                first = days.index(first_day)
+                return {c: v[first:] for c, v in columns.items()}
+            if lookback >= max_lookback:
+                return columns
+            lookback = min(lookback * 2, max_lookback)
+
+    async def _fill(
+        self,
+        ib_conn: ib.IB,
+        contract: ib.Contract,
+        key: tuple,
+        series: BarSeries,
+        gap_start: int,
+        gap_end: int,
+        step: int
+    ) -> None:
+        """Fetch one gap newest-first in chunks IB accepts for this bar size"""
+        _, bar_size, what_to_show, use_rth = key
+        max_span = next((span for size, span in _MAX_SPANS if step <= size), 365 * 86400)
+        # The bar that is still forming stays uncovered so it is fetched again
+        forming = int(time.time()) // step * step
+        chunk_end = gap_end
+        while chunk_end > gap_start:
+            chunk_start = max(gap_start, chunk_end - max_span)
+            duration = _duration_str(chunk_end - chunk_start, step)
+            end_dt = datetime.fromtimestamp(chunk_end, timezone.utc)
+            await governor.historical.acquire(json.dumps([contract.conId, bar_size, what_to_show, use_rth, chunk_end, duration]))
+            await governor.messages.acquire()
+
+            # ib_async returns an empty list on timeouts and request errors alike,
+            # so errors are taken from errorEvent and timeouts from the clock
+            errors: Dict[int, tuple] = {}
+
+            def on_error(req_id, code, message, _contract):
+                if not _is_history_warning(code, message):
+                    errors.setdefault(req_id, (code, message))
+
+            ib_conn.errorEvent += on_error
+            sent = time.monotonic()
+            try:
+                bars = await ib_conn.reqHistoricalDataAsync(
+                    contract,
+                    endDateTime=end_dt if chunk_end < time.time() else "",
+                    durationStr=duration,
+                    barSizeSetting=bar_size,
+                    whatToShow=what_to_show,
+                    useRTH=use_rth,
+                    formatDate=2,
+                    timeout=HIST_REQUEST_TIMEOUT
+                )
+            finally:
+                ib_conn.errorEvent -= on_error
+            self.fills += 1
+            error = errors.get(getattr(bars, "reqId", None))
+            if error or (not bars and time.monotonic() - sent >= HIST_REQUEST_TIMEOUT):
+                # Leave the chunk (and the rest of the gap) uncovered so it is asked for again
+                self.failed_fills += 1
+                reason = f"error {error[0]}: {error[1]}" if error else f"timed out after {HIST_REQUEST_TIMEOUT:g}s"
+                raise HistoricalDataError(f"Historical data for {contract.symbol} {bar_size} failed ({reason})")
+            self.fetched_bars += len(bars or [])
+            series.merge(list(bars or []))
+            covered_end = min(chunk_end, forming)
+            if covered_end > chunk_start:
+                series.coverage = _union(series.coverage, chunk_start, covered_end)
+            chunk_end = chunk_start
+
+    async def tail(
+        self,
+        ib_conn: ib.IB,
+        contract: ib.Contract,
+        bar_size: str = "1 min",
+        lookback: int = 86400,
+        max_lookback: int = 4 * 86400
+    ) -> Optional[Dict[str, Any]]:
+        """Most recent bar, widening the lookback (weekends, holidays) until one is found"""
+        now = int(time.time())
+        while True:
+            columns = await self.get_bars(ib_conn, contract, bar_size, now - lookback, now + 1)
+            if len(columns["ts"]):
+                return bars_to_json({c: v[-1:] for c, v in columns.items()}, bar_seconds(bar_size) >= 86400)[0]
+            if lookback >= max_lookback:
+                return None
+            lookback = min(lookback * 2, max_lookback)
 
-        try:
-            stock = await self.get_stock_contract(symbol)
-            if not stock:
-                return {"error": f"Could not qualify stock contract for {symbol}"}
-
-            # Get current price
-            underlying_price = await self.get_stock_price(symbol)
-            if not underlying_price:
-                logger.warning(f"Could not get underlying price for {symbol}, using last close")
-
-            # Get option chain parameters
-            chains = await asyncio.wait_for(
-                self._ib.reqSecDefOptParamsAsync(
-                    underlyingSymbol=stock.symbol,
-                    futFopExchange="",
-                    underlyingSecType=stock.secType,
-                    underlyingConId=stock.conId
-                ),
-                timeout=OPTIONS_TIMEOUT
-            )
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "series": len(self._series),
+            "bars": sum(len(s) for s in self._series.values()),
+            "path": self.path or None,
+            "hits": self.hits,
+            "fills": self.fills,
+            "fetched_bars": self.fetched_bars,
+            "failed_fills": self.failed_fills
+        }
 
-            if not chains:
-                return {"error": f"No option chains found for {symbol}"}
-
-            # Get SMART exchange chain
-            chain = next((c for c in chains if c.exchange == "SMART"), chains[0])
-
-            # Verify expiration exists
-            if expiration not in chain.expirations:
-                return {"error": f"Expiration {expiration} not found for {symbol}"}
-
-            # Filter strikes around ATM
-            all_strikes = sorted(chain.strikes)
-            if underlying_price:
-                # Find ATM strike
-                atm_idx = min(range(len(all_strikes)),
-                             key=lambda i: abs(all_strikes[i] - underlying_price))
-                start_idx = max(0, atm_idx - strikes_range)
-                end_idx = min(len(all_strikes), atm_idx + strikes_range + 1)
-                strikes = all_strikes[start_idx:end_idx]
-            else:
-                # Take middle strikes if no price
-                mid = len(all_strikes) // 2
-                strikes = all_strikes[max(0, mid-strikes_range):mid+strikes_range+1]
 
-            logger.info(f"Getting {len(strikes)} strikes for {symbol} {expiration}")
+# Global bar store (shared by native tools and the quote fallback)
+bar_store = BarStore()
 
-            # Create option contracts
-            calls = []
-            puts = []
 
-            # Request market data type 4 = delayed frozen data
-            self._ib.reqMarketDataType(4)
+# ============================================================================
+# Native MCP Tools
+# Hot MCP tools served in-process on the options client's ib_async connection,
+# returning structured JSON instead of the ib_mcp subprocess's markdown text
+# ============================================================================
 
-            # Build call and put contracts
-            call_contracts = [
-                ib.Option(symbol, expiration, strike, "C", "SMART", tradingClass=chain.tradingClass)
-                for strike in strikes
-            ]
-            put_contracts = [
-                ib.Option(symbol, expiration, strike, "P", "SMART", tradingClass=chain.tradingClass)
-                for strike in strikes
-            ]
+class NativeTools:
+    """
+    In-process implementations of the most frequently called MCP tools.
 
-            # Qualify contracts in batches to avoid pacing violations
-            all_contracts = call_contracts + put_contracts
-            qualified = []
-            batch_size = 50
+    Calls with arguments a native tool does not understand, made while the
+    IB connection is down, that need account state which has not synced
+    yet, or for which the bar store has no bars, return None so the caller
+    can fall back to the ib_mcp worker pool.
+    """
 
-            for i in range(0, len(all_contracts), batch_size):
-                batch = all_contracts[i:i+batch_size]
-                try:
-                    batch_qualified = await asyncio.wait_for(
-                        self._ib.qualifyContractsAsync(*batch),
-                        timeout=30
-                    )
-                    qualified.extend([c for c in batch_qualified if c])
-                    await asyncio.sleep(0.5)  # Respect pacing
-                except Exception as e:
-                    logger.warning(f"Batch qualification failed: {e}")
+    # Tool name -> accepted argument names
+    TOOLS = {
+        "get_account_summary": {"account"},
+        "get_portfolio": {"account"},
+        "get_positions": {"account"},
+        "get_historical_data": {"symbol", "duration", "bar_size", "what_to_show", "use_rth", "end_date_time"}
+    }
 
-            if not qualified:
-                return {
-                    "symbol": symbol,
-                    "expiration": expiration,
-                    "underlying_price": underlying_price,
-                    "calls": [],
-                    "puts": [],
-                    "note": "No contracts qualified - may need market data subscription"
-                }
+    def __init__(self, client: OptionsClient):
+        self.client = client
+        self.calls: Dict[str, int] = {}
+        self.fallbacks = 0
+        self.errors = 0
 
-            # Request tickers for all qualified contracts
-            tickers = []
-            for contract in qualified:
-                try:
-                    ticker = self._ib.reqMktData(contract, '', False, False)
-                    tickers.append((contract, ticker))
-                except Exception as e:
-                    logger.debug(f"Failed to request ticker for {contract}: {e}")
+    def handles(self, name: str, arguments: Dict[str, Any]) -> bool:
+        accepted = self.TOOLS.get(name)
+        return accepted is not None and set(arguments) <= accepted
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run a native tool; None means the worker pool should handle it"""
+        if not self.handles(name, arguments) or not await self.client.ensure_connected():
+            self.fallbacks += 1
+            return None
+        try:
+            data = await getattr(self, name)(**arguments)
+        except Exception as e:
+            logger.warning(f"Native {name} failed, falling back to worker pool: {e!r}")
+            self.errors += 1
+            self.fallbacks += 1
+            return None
+        if data is None:
+            self.fallbacks += 1
+            return None
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return data
+
+    async def get_account_summary(self, account: str = "") -> Dict[str, Any]:
+        state = self.client.account
+        if state.ready:
+            return state.account_summary(account)
+        await governor.messages.acquire()
+        values = await asyncio.wait_for(self.client.connection.accountSummaryAsync(account), timeout=30)
+        accounts: Dict[str, Dict[str, Any]] = {}
+        for v in values:
+            number = _number(v.value)
+            accounts.setdefault(v.account, {})[v.tag] = {
+                "value": number if number is not None else v.value,
+                "currency": v.currency or None
+            }
+        return {"accounts": accounts}
 
-            # Wait for data
-            await asyncio.sleep(3)
+    async def get_portfolio(self, account: str = "") -> Optional[Dict[str, Any]]:
+        # Kept current from updatePortfolioEvent by the account state cache;
+        # until its initial sync lands the worker pool answers instead
+        state = self.client.account
+        return state.portfolio_items(account) if state.ready else None
 
-            # Process tickers
-            for contract, ticker in tickers:
-                contract_data = {
-                    "strike": contract.strike,
-                    "bid": ticker.bid if ticker.bid and ticker.bid > 0 else None,
-                    "ask": ticker.ask if ticker.ask and ticker.ask > 0 else None,
-                    "last": ticker.last if ticker.last and ticker.last > 0 else None,
-                    "volume": ticker.volume if ticker.volume else None,
-                    "open_interest": None,  # Requires separate request
-                    "iv": None,  # Will be calculated
-                    "greeks": None
-                }
+    async def get_positions(self, account: str = "") -> Optional[Dict[str, Any]]:
+        # Kept current from positionEvent by the account state cache
+        state = self.client.account
+        return state.position_list(account) if state.ready else None
+
+    async def get_historical_data(
+        self,
+        symbol: str,
+        duration: str = "1 D",
+        bar_size: str = "1 min",
+        what_to_show: str = "TRADES",
+        use_rth: bool = True,
+        end_date_time: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        stock = await self.client.get_stock_contract(symbol)
+        if not stock:
+            raise ValueError(f"Could not qualify {symbol}")
+        columns = await bar_store.get_duration(
+            self.client.connection, stock, bar_size, duration, parse_end_time(end_date_time), what_to_show, use_rth
+        )
+        if not len(columns["ts"]):
+            return None  # Let the worker pool give IB's own answer
+        return {
+            "symbol": stock.symbol,
+            "con_id": stock.conId,
+            "duration": duration,
+            "bar_size": bar_size,
+            "what_to_show": what_to_show,
+            "bars": bars_to_json(columns, bar_seconds(bar_size) >= 86400)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "tools": sorted(self.TOOLS),
+            "calls": dict(self.calls),
+            "fallbacks": self.fallbacks,
+            "errors": self.errors
+        }
+
+
+# Global native tools instance (bound to the options client in lifespan)
+native_tools: Optional[NativeTools] = None
+
+
+# ============================================================================
+# Orders Client for Paper Trading
+# Uses ib_async directly for order placement
+# ============================================================================
+
+# How far along an order is; a wait for a state is satisfied by any later one
+_ORDER_PROGRESS = {"PendingSubmit": 0, "ApiPending": 0, "PreSubmitted": 1, "Submitted": 2, "Filled": 3}
 
-                # Add Greeks if available
-                if ticker.modelGreeks:
-                    contract_data["greeks"] = {
-                        "delta": ticker.modelGreeks.delta,
-                        "gamma": ticker.modelGreeks.gamma,
-                        "theta": ticker.modelGreeks.theta,
-                        "vega": ticker.modelGreeks.vega,
-                        "iv": ticker.modelGreeks.impliedVol
-                    }
-                    contract_data["iv"] = ticker.modelGreeks.impliedVol
 
-                if contract.right == "C":
-                    calls.append(contract_data)
-                else:
-                    puts.append(contract_data)
+class OrderTracker:
+    """
+    Event-driven view of the orders client's trades.
 
-                # Cancel market data
-                self._ib.cancelMktData(contract)
+    Indexes trades by orderId and permId from newOrderEvent/orderStatusEvent,
+    records status transitions and fills from orderStatusEvent and
+    execDetailsEvent as numbered events, and wakes anyone waiting on them.
+    """
 
-            # Sort by strike
-            calls.sort(key=lambda x: x["strike"])
-            puts.sort(key=lambda x: x["strike"])
+    def __init__(self, max_events: int = ORDER_EVENTS_MAX):
+        self._ib: Optional[ib.IB] = None
+        self._by_order_id: Dict[int, ib.Trade] = {}
+        self._by_perm_id: Dict[int, ib.Trade] = {}
+        self._last_status: Dict[int, tuple] = {}
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.seq = 0
+        self._changed = asyncio.Event()
+
+    def bind(self, ib_conn: ib.IB) -> None:
+        """Follow a (new) IB connection and index the trades it already knows"""
+        if self._ib is not None:
+            self._ib.newOrderEvent -= self._index
+            self._ib.orderStatusEvent -= self._on_status
+            self._ib.execDetailsEvent -= self._on_fill
+        self._ib = ib_conn
+        ib_conn.newOrderEvent += self._index
+        ib_conn.orderStatusEvent += self._on_status
+        ib_conn.execDetailsEvent += self._on_fill
+        for trade in ib_conn.trades():
+            self._index(trade)
+
+    def _index(self, trade: ib.Trade) -> None:
+        if trade.order.orderId:
+            self._by_order_id[trade.order.orderId] = trade
+        if trade.order.permId:
+            self._by_perm_id[trade.order.permId] = trade
+
+    def find(self, order_id: int) -> Optional[ib.Trade]:
+        """Trade by orderId, or by permId for orders placed elsewhere"""
+        return self._by_order_id.get(order_id) or self._by_perm_id.get(order_id)
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        self.seq += 1
+        self.events.append({"seq": self.seq, "time": time.time(), **event})
+        # Wake every waiter; each re-checks its own condition
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _on_status(self, trade: ib.Trade) -> None:
+        self._index(trade)
+        status = trade.orderStatus
+        key = trade.order.permId or trade.order.orderId
+        # orderStatusEvent repeats for unchanged states; publish transitions only
+        if self._last_status.get(key) == (status.status, status.filled):
+            return
+        self._last_status[key] = (status.status, status.filled)
+        self._emit({"type": "status", **trade_summary(trade)})
+
+    def _on_fill(self, trade: ib.Trade, fill: ib.Fill) -> None:
+        self._index(trade)
+        execution = fill.execution
+        self._emit({
+            "type": "fill",
+            "order_id": trade.order.orderId,
+            "perm_id": trade.order.permId,
+            "exec_id": execution.execId,
+            "side": execution.side,
+            "shares": execution.shares,
+            "price": execution.price,
+            "cum_qty": execution.cumQty,
+            "avg_price": execution.avgPrice,
+            "symbol": fill.contract.symbol
+        })
+
+    def since(self, seq: int) -> List[Dict[str, Any]]:
+        return [e for e in self.events if e["seq"] > seq]
+
+    async def wait_events(self, since: int, timeout: float) -> List[Dict[str, Any]]:
+        """Events after `since`, waiting up to `timeout` seconds for the first one"""
+        deadline = time.monotonic() + timeout
+        while not (events := self.since(since)):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+        return events
 
-            return {
-                "symbol": symbol,
-                "expiration": expiration,
-                "underlying_price": underlying_price,
-                "calls": calls,
-                "puts": puts,
-                "trading_class": chain.tradingClass,
-                "multiplier": chain.multiplier
-            }
+    async def wait_for_status(self, trade: ib.Trade, target: str, timeout: float) -> bool:
+        """
+        Wait until the trade reaches `target` (or a later state) or is done.
 
-        except asyncio.TimeoutError:
-            return {"error": f"Timeout getting option chain for {symbol}"}
-        except Exception as e:
-            logger.error(f"Failed to get option chain for {symbol}: {e}")
-            return {"error": str(e)}
+        Returns True if `target` was reached before the timeout.
+        """
+        def reached() -> bool:
+            status = trade.orderStatus.status
+            if status == target:
+                return True
+            if target in _ORDER_PROGRESS and _ORDER_PROGRESS.get(status, -1) >= _ORDER_PROGRESS[target]:
+                return True
+            return False
 
+        deadline = time.monotonic() + timeout
+        while not reached() and trade.orderStatus.status not in ib.OrderStatus.DoneStates:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+        return reached()
 
-# Global options client instance
-options_client: Optional[OptionsClient] = None
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "orders": len(self._by_order_id),
+            "events": len(self.events),
+            "seq": self.seq
+        }
 
 
-# ============================================================================
-# Orders Client for Paper Trading
-# Uses ib_async directly for order placement
-# ============================================================================
+def trade_summary(trade: ib.Trade) -> Dict[str, Any]:
+    """Order identity and current status fields of a trade"""
+    return {
+        "order_id": trade.order.orderId,
+        "perm_id": trade.order.permId,
+        "status": trade.orderStatus.status,
+        "filled": trade.orderStatus.filled,
+        "remaining": trade.orderStatus.remaining,
+        "avg_fill_price": trade.orderStatus.avgFillPrice,
+        "last_fill_price": trade.orderStatus.lastFillPrice,
+        "why_held": trade.orderStatus.whyHeld
+    }
+
 
 class OrdersClient:
     """
@@ -459,6 +3717,7 @@ class OrdersClient:
         self._connected = False
         self._readonly = os.getenv("IB_READONLY", "true").lower() == "true"
         self._monitor_task: Optional[asyncio.Task] = None
+        self.tracker = OrderTracker()
 
     async def connect(self) -> bool:
         """Connect to IB Gateway"""
@@ -475,6 +3734,7 @@ class OrdersClient:
                     readonly=self._readonly,  # Use config setting
                     timeout=30
                 )
+                self.tracker.bind(self._ib)
                 self._connected = True
                 logger.info(f"Orders client connected to IB at {self.host}:{self.port} (readonly={self._readonly})")
                 return True
@@ -521,6 +3781,7 @@ class OrdersClient:
                 healthy = False
                 if self._connected and self._ib and self._ib.isConnected():
                     try:
+                        await governor.messages.acquire()
                         await asyncio.wait_for(self._ib.reqCurrentTimeAsync(), timeout=10)
                         healthy = True
                         consecutive_failures = 0
@@ -576,10 +3837,7 @@ class OrdersClient:
                 right.upper(),
                 "SMART"
             )
-            contracts = await asyncio.wait_for(
-                self._ib.qualifyContractsAsync(option),
-                timeout=30
-            )
+            contracts = await contract_cache.qualify(self._ib, [option])
             if contracts and len(contracts) > 0:
                 return contracts[0]
             return None
@@ -596,7 +3854,9 @@ class OrdersClient:
         action: str,
         quantity: int,
         order_type: str = "LMT",
-        limit_price: Optional[float] = None
+        limit_price: Optional[float] = None,
+        wait_for: Optional[str] = None,
+        wait_timeout: float = ORDER_ACK_TIMEOUT
     ) -> Dict[str, Any]:
         """
         Place an option order.
@@ -610,6 +3870,9 @@ class OrdersClient:
             quantity: Number of contracts
             order_type: 'LMT' or 'MKT'
             limit_price: Required for limit orders
+            wait_for: Order state to wait for (e.g. 'Submitted', 'Filled');
+                default waits only for IB to acknowledge the order
+            wait_timeout: Max seconds to wait
 
         Returns:
             Dict with order_id, status, and details
@@ -648,10 +3911,9 @@ class OrdersClient:
                 order = ib.LimitOrder(action.upper(), quantity, limit_price)
 
             # Place the order
+            await governor.messages.acquire()
             trade = self._ib.placeOrder(contract, order)
-
-            # Wait for order acknowledgment
-            await asyncio.sleep(1)
+            wait = await self._await_order(trade, wait_for, wait_timeout)
 
             return {
                 "success": True,
@@ -661,6 +3923,7 @@ class OrdersClient:
                 "filled": trade.orderStatus.filled,
                 "remaining": trade.orderStatus.remaining,
                 "avg_fill_price": trade.orderStatus.avgFillPrice,
+                "wait": wait,
                 "contract": {
                     "symbol": contract.symbol,
                     "expiration": contract.lastTradeDateOrContractMonth,
@@ -689,7 +3952,10 @@ class OrdersClient:
         action: str,
         quantity: int,
         order_type: str = "LMT",
-        limit_price: Optional[float] = None
+        limit_price: Optional[float] = None,
+        wait_for: Optional[str] = None,
+        wait_timeout: float = ORDER_ACK_TIMEOUT,
+        check_margin: bool = False
     ) -> Dict[str, Any]:
         """
         Place a multi-leg combo order (spread).
@@ -706,6 +3972,10 @@ class OrdersClient:
             quantity: Number of combo contracts
             order_type: 'LMT' or 'MKT'
             limit_price: Net debit (positive) or credit (negative) for the combo
+            wait_for: Order state to wait for (see place_option_order)
+            wait_timeout: Max seconds to wait
+            check_margin: Run a whatIfOrder margin check first and reject the
+                order if margin after it would exceed equity with loan
 
         Returns:
             Dict with order details
@@ -724,15 +3994,14 @@ class OrdersClient:
             }
 
         try:
-            # Qualify all leg contracts
+            # Qualify all leg contracts in one batch (cached legs skip IB)
+            options = [
+                ib.Option(leg["symbol"].upper(), leg["expiration"], leg["strike"], leg["right"].upper(), "SMART")
+                for leg in legs
+            ]
+            contracts = await contract_cache.qualify(self._ib, options)
             combo_legs = []
-            for leg in legs:
-                contract = await self.get_option_contract(
-                    leg["symbol"],
-                    leg["expiration"],
-                    leg["strike"],
-                    leg["right"]
-                )
+            for leg, contract in zip(legs, contracts):
                 if not contract:
                     return {
                         "success": False,
@@ -766,11 +4035,21 @@ class OrdersClient:
                     }
                 order = ib.LimitOrder(action.upper(), quantity, limit_price)
 
+            # Optional pre-flight margin check; the order only goes out if it passes
+            margin = None
+            if check_margin:
+                margin = await self.what_if(combo, order)
+                if not margin.get("ok"):
+                    return {
+                        "success": False,
+                        "error": margin.get("error") or "Pre-flight margin check failed",
+                        "margin": margin
+                    }
+
             # Place the order
+            await governor.messages.acquire()
             trade = self._ib.placeOrder(combo, order)
-
-            # Wait for order acknowledgment
-            await asyncio.sleep(1)
+            wait = await self._await_order(trade, wait_for, wait_timeout)
 
             return {
                 "success": True,
@@ -780,6 +4059,8 @@ class OrdersClient:
                 "filled": trade.orderStatus.filled,
                 "remaining": trade.orderStatus.remaining,
                 "avg_fill_price": trade.orderStatus.avgFillPrice,
+                "wait": wait,
+                "margin": margin,
                 "combo_legs": [
                     {
                         "conId": cl.conId,
@@ -803,27 +4084,52 @@ class OrdersClient:
                 "error": str(e)
             }
 
+    async def what_if(self, contract: ib.Contract, order: ib.Order) -> Dict[str, Any]:
+        """Margin impact of an order via whatIfOrder (nothing is transmitted)"""
+        def amount(value: str) -> Optional[float]:
+            number = _number(value)
+            # IB reports unset values as Double.MAX_VALUE
+            return number if number is not None and number < 1e300 else None
+
+        try:
+            await governor.messages.acquire()
+            state = await asyncio.wait_for(self._ib.whatIfOrderAsync(contract, order), timeout=30)
+        except Exception as e:
+            logger.error(f"whatIfOrder failed: {e}")
+            return {"ok": False, "error": f"whatIfOrder failed: {e}"}
+        if not state:
+            return {"ok": False, "error": "whatIfOrder returned no result"}
+
+        result = {
+            "init_margin_change": amount(state.initMarginChange),
+            "maint_margin_change": amount(state.maintMarginChange),
+            "init_margin_after": amount(state.initMarginAfter),
+            "equity_with_loan_after": amount(state.equityWithLoanAfter),
+            "commission": amount(state.commission),
+            "warning": state.warningText or None
+        }
+        init_after, equity_after = result["init_margin_after"], result["equity_with_loan_after"]
+        result["ok"] = init_after is None or equity_after is None or init_after <= equity_after
+        if not result["ok"]:
+            result["error"] = f"Insufficient margin: initial margin {init_after} > equity with loan {equity_after}"
+        return result
+
+    async def _await_order(self, trade: ib.Trade, wait_for: Optional[str], timeout: float) -> Dict[str, Any]:
+        """Wait for the trade to reach `wait_for` (default: acknowledged by IB)"""
+        target = wait_for or "PreSubmitted"
+        start = time.time()
+        reached = await self.tracker.wait_for_status(trade, target, timeout)
+        return {"target": target, "reached": reached, "elapsed": round(time.time() - start, 3)}
+
     async def get_order_status(self, order_id: int) -> Dict[str, Any]:
-        """Get status of a specific order"""
+        """Get status of a specific order (by orderId or permId)"""
         if not await self.ensure_connected():
             return {"error": "Not connected to IB Gateway"}
 
         try:
-            # Get all open orders
-            trades = self._ib.trades()
-
-            for trade in trades:
-                if trade.order.orderId == order_id:
-                    return {
-                        "found": True,
-                        "order_id": trade.order.orderId,
-                        "status": trade.orderStatus.status,
-                        "filled": trade.orderStatus.filled,
-                        "remaining": trade.orderStatus.remaining,
-                        "avg_fill_price": trade.orderStatus.avgFillPrice,
-                        "last_fill_price": trade.orderStatus.lastFillPrice,
-                        "why_held": trade.orderStatus.whyHeld
-                    }
+            trade = self.tracker.find(order_id)
+            if trade:
+                return {"found": True, **trade_summary(trade)}
 
             return {
                 "found": False,
@@ -847,18 +4153,18 @@ class OrdersClient:
             return {"error": "Not connected to IB Gateway"}
 
         try:
-            trades = self._ib.trades()
-
-            for trade in trades:
-                if trade.order.orderId == order_id:
-                    self._ib.cancelOrder(trade.order)
-                    await asyncio.sleep(0.5)
+            trade = self.tracker.find(order_id)
+            if trade:
+                await governor.messages.acquire()
+                self._ib.cancelOrder(trade.order)
+                await self.tracker.wait_for_status(trade, "Cancelled", ORDER_ACK_TIMEOUT)
 
-                    return {
-                        "success": True,
-                        "order_id": order_id,
-                        "status": "Cancel requested"
-                    }
+                return {
+                    "success": True,
+                    "order_id": trade.order.orderId,
+                    "status": "Cancel requested",
+                    "order_status": trade.orderStatus.status
+                }
 
             return {
                 "success": False,
@@ -906,47 +4212,385 @@ orders_client: Optional[OrdersClient] = None
 ORDERS_CLIENT_ID = int(os.getenv("ORDERS_CLIENT_ID", "98"))
 
 
+# ============================================================================
+# Docker Engine Client
+# Gateway container control over the Docker socket, without blocking the loop
+# ============================================================================
+
+DOCKER_RUNNING_EVENTS = {"start": "running", "restart": "running", "unpause": "running"}
+DOCKER_STOPPED_EVENTS = {"die": "exited", "stop": "exited", "pause": "paused", "create": "created", "destroy": "removed"}
+
+
+class DockerEngine:
+    """
+    Async Docker Engine API client over the unix socket.
+
+    Commands reuse one persistent keep-alive connection (a second, one-shot
+    connection is opened if a long command such as restart holds it). A
+    separate connection streams /events for the gateway container, so
+    `state` is pushed as the container starts, dies or changes health
+    instead of being polled with `docker inspect`.
+    """
+
+    def __init__(self, socket_path: str, container: str, api_version: str = DOCKER_API_VERSION):
+        self.socket_path = socket_path
+        self.container = container
+        self.api_version = api_version
+        self.state: Dict[str, Any] = {"status": None, "health": None, "updated_at": 0.0, "source": None}
+        self.has_healthcheck = False  # From inspect; kept while the container is stopped
+        self.stream_connected = False
+        self._conn: Optional[tuple] = None
+        self._conn_lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._last_error: Optional[str] = None
+        self.requests = 0
+        self.events_seen = 0
+        self.reconnects = 0
+
+    # ------------------------------------------------------------------
+    # HTTP over the unix socket
+    # ------------------------------------------------------------------
+
+    def _request_bytes(self, method: str, path: str) -> bytes:
+        return (f"{method} /{self.api_version}{path} HTTP/1.1\r\n"
+                f"Host: docker\r\nContent-Length: 0\r\n\r\n").encode()
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> tuple:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Docker closed the connection")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    @staticmethod
+    async def _iter_chunks(reader: asyncio.StreamReader):
+        """Body chunks of a chunked transfer-encoded response"""
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                await reader.readline()
+                return
+            chunk = await reader.readexactly(size)
+            await reader.readexactly(2)
+            yield chunk
+
+    async def _read_body(self, reader: asyncio.StreamReader, status: int, headers: Dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            return b"".join([chunk async for chunk in self._iter_chunks(reader)])
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"]))
+        if status in (204, 304):
+            return b""
+        return await reader.read()
+
+    def _close_conn(self) -> None:
+        if self._conn:
+            self._conn[1].close()
+        self._conn = None
+
+    async def request(self, method: str, path: str, timeout: float = 30) -> tuple:
+        """Send one API request; returns (status, parsed JSON body or text)"""
+        self.requests += 1
+        if self._conn_lock.locked():
+            # The persistent connection is busy (e.g. a restart); don't queue behind it
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            try:
+                writer.write(self._request_bytes(method, path))
+                status, headers = await asyncio.wait_for(self._read_head(reader), timeout)
+                body = await asyncio.wait_for(self._read_body(reader, status, headers), timeout)
+            finally:
+                writer.close()
+            return status, self._decode(body)
+
+        async with self._conn_lock:
+            for attempt in range(2):
+                reused = self._conn is not None
+                if not reused:
+                    self._conn = await asyncio.open_unix_connection(self.socket_path)
+                reader, writer = self._conn
+                try:
+                    writer.write(self._request_bytes(method, path))
+                    await writer.drain()
+                    status, headers = await asyncio.wait_for(self._read_head(reader), timeout)
+                except ConnectionError:
+                    # Docker closes idle keep-alive connections; retry once on a fresh one
+                    self._close_conn()
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    self._close_conn()
+                    raise
+                try:
+                    body = await asyncio.wait_for(self._read_body(reader, status, headers), timeout)
+                except BaseException:
+                    self._close_conn()
+                    raise
+                if headers.get("connection", "").lower() == "close":
+                    self._close_conn()
+                return status, self._decode(body)
+
+    @staticmethod
+    def _decode(body: bytes) -> Any:
+        if not body:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return body.decode(errors="replace").strip()
+
+    # ------------------------------------------------------------------
+    # Container commands
+    # ------------------------------------------------------------------
+
+    async def inspect(self, container: Optional[str] = None) -> Dict[str, Any]:
+        container = container or self.container
+        status, body = await self.request("GET", f"/containers/{quote(container)}/json", timeout=10)
+        if status != 200:
+            raise DockerError(status, body)
+        state = body.get("State") or {}
+        if container == self.container:
+            healthcheck = (body.get("Config") or {}).get("Healthcheck") or {}
+            self.has_healthcheck = bool(state.get("Health")) or (healthcheck.get("Test") or ["NONE"])[0] != "NONE"
+        result = {
+            "status": state.get("Status"),
+            "health": (state.get("Health") or {}).get("Status"),
+            "started_at": state.get("StartedAt")
+        }
+        if container == self.container:
+            self._set(result["status"], result["health"], "inspect")
+        return result
+
+    async def container_action(self, action: str, container: Optional[str] = None) -> None:
+        """start / stop / restart; 304 (already in that state) counts as success"""
+        container = container or self.container
+        query = f"?t={DOCKER_STOP_TIMEOUT}" if action in ("stop", "restart") else ""
+        status, body = await self.request(
+            "POST", f"/containers/{quote(container)}/{action}{query}", timeout=DOCKER_STOP_TIMEOUT + 30
+        )
+        if status not in (204, 304):
+            raise DockerError(status, body)
+
+    # ------------------------------------------------------------------
+    # Event stream
+    # ------------------------------------------------------------------
+
+    def _set(self, status: Optional[str], health: Optional[str], source: str) -> None:
+        self.state = {"status": status, "health": health, "updated_at": time.time(), "source": source}
+        # Wake every waiter; each re-checks its own condition
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _apply_event(self, event: Dict[str, Any]) -> None:
+        action = event.get("Action") or event.get("status") or ""
+        self.events_seen += 1
+        status, health = self.state["status"], self.state["health"]
+        if action.startswith("health_status"):
+            self.has_healthcheck = True
+            health = action.partition(":")[2].strip()
+        elif action in DOCKER_RUNNING_EVENTS:
+            # A (re)started container re-runs its healthcheck from "starting"; unpause resumes it
+            status = DOCKER_RUNNING_EVENTS[action]
+            if action != "unpause":
+                health = "starting" if self.has_healthcheck else None
+        elif action in DOCKER_STOPPED_EVENTS:
+            status, health = DOCKER_STOPPED_EVENTS[action], None
+        else:
+            return
+        logger.info(f"Docker event for {self.container}: {action} -> status={status} health={health}")
+        self._set(status, health, "event")
+
+    async def _watch(self) -> None:
+        """Follow /events for the gateway container, reconnecting with backoff"""
+        backoff = 1.0
+        filters = quote(json.dumps({"type": ["container"], "container": [self.container]}))
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+                writer.write(self._request_bytes("GET", f"/events?filters={filters}"))
+                status, headers = await self._read_head(reader)
+                if status != 200:
+                    raise DockerError(status, self._decode(await self._read_body(reader, status, headers)))
+                # Seed after subscribing so no transition falls between the two
+                try:
+                    await self.inspect()
+                except DockerError as e:
+                    if e.status != 404:
+                        raise
+                    self._set("missing", None, "inspect")
+                self.stream_connected = True
+                self._last_error = None
+                backoff = 1.0
+                logger.info(f"Docker event stream connected for {self.container} ({self.state['status']})")
+                buffer = b""
+                async for chunk in self._iter_chunks(reader):
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        if line.strip():
+                            self._apply_event(json.loads(line))
+                raise ConnectionError("event stream ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if error != self._last_error:
+                    logger.warning(f"Docker event stream unavailable ({error}); retrying")
+                    self._last_error = error
+            finally:
+                self.stream_connected = False
+                if writer:
+                    writer.close()
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    async def start(self) -> None:
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+        self._close_conn()
+
+    async def get_state(self) -> Dict[str, Any]:
+        """Pushed state while the event stream is up, else a fresh inspect"""
+        if self.stream_connected:
+            return self.state
+        await self.inspect()
+        return self.state
+
+    async def wait_for(self, predicate: Callable[[Dict[str, Any]], bool], timeout: float) -> bool:
+        """Wait until `predicate(state)` holds, woken by events rather than polling"""
+        deadline = time.monotonic() + timeout
+        while not predicate(self.state):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            changed = self._changed
+            try:
+                if self.stream_connected:
+                    await asyncio.wait_for(changed.wait(), timeout=remaining)
+                else:
+                    # No stream to push changes; fall back to inspecting
+                    await asyncio.sleep(min(2.0, remaining))
+                    await self.inspect()
+            except asyncio.TimeoutError:
+                return predicate(self.state)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "container": self.container,
+            "stream_connected": self.stream_connected,
+            "state": self.state,
+            "has_healthcheck": self.has_healthcheck,
+            "requests": self.requests,
+            "events": self.events_seen,
+            "stream_reconnects": self.reconnects,
+            "last_error": self._last_error
+        }
+
+
+class DockerError(Exception):
+    """Non-success response from the Docker Engine API"""
+
+    def __init__(self, status: int, body: Any):
+        self.status = status
+        message = body.get("message") if isinstance(body, dict) else body
+        super().__init__(message or f"HTTP {status}")
+
+
+# Global Docker client for the gateway container
+docker_engine = DockerEngine(DOCKER_SOCKET, GATEWAY_CONTAINER)
+
+
 async def docker_command(action: str, container: str = None) -> Dict[str, Any]:
     """Execute a Docker command on the gateway container"""
-    import subprocess
     container = container or GATEWAY_CONTAINER
 
     try:
-        if action == "stop":
-            cmd = ["docker", "stop", container]
-        elif action == "start":
-            cmd = ["docker", "start", container]
-        elif action == "restart":
-            cmd = ["docker", "restart", container]
+        if action in ("stop", "start", "restart"):
+            await docker_engine.container_action(action, container)
+            output = container
         elif action == "status":
-            cmd = ["docker", "inspect", "-f", "{{.State.Status}}", container]
+            if container == docker_engine.container:
+                output = (await docker_engine.get_state())["status"]
+            else:
+                output = (await docker_engine.inspect(container))["status"]
         else:
             return {"success": False, "error": f"Unknown action: {action}"}
 
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-
-        if result.returncode == 0:
-            return {
-                "success": True,
-                "action": action,
-                "container": container,
-                "output": result.stdout.strip()
-            }
-        else:
-            return {
-                "success": False,
-                "action": action,
-                "container": container,
-                "error": result.stderr.strip()
-            }
-    except subprocess.TimeoutExpired:
+        return {
+            "success": True,
+            "action": action,
+            "container": container,
+            "output": output
+        }
+    except DockerError as e:
+        return {
+            "success": False,
+            "action": action,
+            "container": container,
+            "error": str(e)
+        }
+    except asyncio.TimeoutError:
         return {"success": False, "error": f"Docker {action} timed out"}
-    except FileNotFoundError:
+    except (FileNotFoundError, ConnectionRefusedError, PermissionError):
         return {"success": False, "error": "Docker not available in container"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+async def api_port_open(timeout: float = 3.0) -> bool:
+    """True if the IB API port accepts TCP connections"""
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(IB_HOST, int(IB_PORT)),
+            timeout=timeout
+        )
+        writer.close()
+        await writer.wait_closed()
+        return True
+    except Exception:
+        return False
+
+
+async def wait_for_gateway_api(timeout: float) -> bool:
+    """
+    Wait for the gateway container to run (pushed by Docker events), then for
+    its API port to accept connections.
+    """
+    deadline = time.monotonic() + timeout
+    running = await docker_engine.wait_for(
+        lambda state: state["status"] == "running" and state["health"] in (None, "healthy"),
+        timeout
+    )
+    if not running and docker_engine.state["status"] != "running":
+        return False
+    # The port opens some seconds after the container starts (IBC login)
+    delay = 0.5
+    while time.monotonic() < deadline:
+        if await api_port_open(timeout=min(3.0, max(deadline - time.monotonic(), 0.1))):
+            return True
+        await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay = min(delay * 2, 5.0)
+    return False
+
+
 async def check_gateway_status() -> Dict[str, Any]:
     """Check if gateway is logged in and responsive"""
     # Check Docker container status
@@ -954,29 +4598,18 @@ async def check_gateway_status() -> Dict[str, Any]:
     container_running = docker_status.get("output") == "running" if docker_status["success"] else False
 
     # Try to connect to IB API port (4004 for paper via socat)
-    api_port_open = False
-    if container_running:
-        try:
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(IB_HOST, int(IB_PORT)),
-                timeout=3.0
-            )
-            writer.close()
-            await writer.wait_closed()
-            api_port_open = True
-        except:
-            pass
+    port_open = await api_port_open() if container_running else False
 
     # Check if we can make actual IB calls
     pool_stats = pool.get_stats() if pool else None
     ib_connected = pool_stats["workers_ib_connected"] > 0 if pool_stats else False
 
     # Determine overall gateway status
-    if ib_connected and api_port_open:
+    if ib_connected and port_open:
         status = "connected"
-    elif api_port_open and not ib_connected:
+    elif port_open and not ib_connected:
         status = "api_ready"  # Gateway up but workers not connected
-    elif container_running and not api_port_open:
+    elif container_running and not port_open:
         status = "starting"  # Container running but API not ready
     else:
         status = "disconnected"
@@ -984,7 +4617,7 @@ async def check_gateway_status() -> Dict[str, Any]:
     return {
         "status": status,
         "container_running": container_running,
-        "api_port_open": api_port_open,
+        "api_port_open": port_open,
         "ib_connected": ib_connected,
         "gateway_container": GATEWAY_CONTAINER,
         "api_host": IB_HOST,
@@ -1045,21 +4678,40 @@ class CircuitBreaker:
 
 @dataclass
 class IBWorker:
-    """A single IB MCP subprocess worker"""
+    """
+    A single IB MCP subprocess worker.
+
+    Requests are pipelined over stdio: each call is written with a worker-
+    local JSON-RPC id and a background reader task resolves the matching
+    pending future, so one subprocess serves up to `max_inflight` concurrent
+    calls and health checks never wait behind real traffic.
+    """
     worker_id: int
     client_id: int
     process: Optional[asyncio.subprocess.Process] = None
     initialized: bool = False
-    lock: asyncio.Lock = None
+    lock: asyncio.Lock = None  # Guards start/stop (process lifecycle)
     last_successful_call: float = 0
     consecutive_failures: int = 0
     ib_connected: bool = False
     # Track restarts for backoff (don't reset on start)
     restart_count: int = 0
     last_restart_time: float = 0
+    max_inflight: int = WORKER_MAX_INFLIGHT
+    inflight: int = 0
+    draining: bool = False  # Scale-down in progress: no new calls routed here
+    metrics: Optional["PoolMetrics"] = None
+    _slots: asyncio.Semaphore = None
+    _write_lock: asyncio.Lock = None
+    _pending: Dict[int, asyncio.Future] = None
+    _next_id: int = 0
+    _reader_task: Optional[asyncio.Task] = None
 
     def __post_init__(self):
         self.lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._write_lock = asyncio.Lock()
+        self._pending = {}
 
     def should_restart(self) -> bool:
         """Check if enough time has passed for backoff-based restart."""
@@ -1115,6 +4767,9 @@ class IBWorker:
             self.process.stdin.write(json.dumps(notif).encode() + b'\n')
             await self.process.stdin.drain()
 
+            # From here on responses are demultiplexed by the reader task
+            self._reader_task = asyncio.create_task(self._reader_loop(self.process))
+
             self.initialized = True
             # Don't reset consecutive_failures here - only reset when IB actually connects
             return True
@@ -1124,8 +4779,40 @@ class IBWorker:
             await self.stop()
             return False
 
+    async def _reader_loop(self, process: asyncio.subprocess.Process) -> None:
+        """Route each response line to the pending call with the same id"""
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line.decode().strip())
+                except ValueError:
+                    logger.debug(f"Worker {self.worker_id}: Ignoring non-JSON output: {line[:100]!r}")
+                    continue
+                future = self._pending.pop(message.get("id"), None) if isinstance(message, dict) else None
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id}: Reader error - {e}")
+        # Process closed: fail everything still waiting on it
+        self._fail_pending(Exception("Process closed unexpectedly"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
     async def stop(self) -> None:
         """Stop the subprocess"""
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        self._fail_pending(Exception("Worker stopped"))
         if self.process is not None:
             logger.info(f"Worker {self.worker_id}: Stopping")
             try:
@@ -1148,34 +4835,65 @@ class IBWorker:
         """Check if process is still running"""
         return self.process is not None and self.process.returncode is None
 
-    async def check_ib_connection(self) -> bool:
-        """Actually test IB connectivity by making a lightweight call"""
-        if not self.is_alive():
-            self.ib_connected = False
-            return False
+    def is_ready(self) -> bool:
+        """Running, past the MCP handshake and with its reader routing responses"""
+        return (
+            self.is_alive() and self.initialized and
+            self._reader_task is not None and not self._reader_task.done()
+        )
 
-        try:
-            # Use get_account_summary as a lightweight connectivity test
-            test_request = {
-                "jsonrpc": "2.0",
-                "id": "health_check",
-                "method": "tools/call",
-                "params": {"name": "get_account_summary", "arguments": {}}
-            }
+    async def _call(self, request_data: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Send one JSON-RPC request and wait for its response.
 
-            self.process.stdin.write(json.dumps(test_request).encode() + b'\n')
-            await self.process.stdin.drain()
+        The request goes out under a worker-local id (callers' ids may collide);
+        the caller's id is restored on the response. A late response after a
+        timeout is simply dropped by the reader.
+        """
+        self._next_id += 1
+        call_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        try:
+            async with self._write_lock:
+                self.process.stdin.write(json.dumps({**request_data, "id": call_id}).encode() + b'\n')
+                await self.process.stdin.drain()
+            response = await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending.pop(call_id, None)
+        return {**response, "id": request_data.get("id")}
 
-            response_line = await asyncio.wait_for(
-                self.process.stdout.readline(),
-                timeout=10.0
-            )
+    async def check_ib_connection(self) -> bool:
+        """
+        Test that the worker responds and IB is reachable.
 
-            if not response_line:
-                self.ib_connected = False
-                return False
+        With the in-process account state connection up, this is an MCP ping
+        to the worker plus the shared reqCurrentTime probe; a worker whose own
+        IB session dropped is still caught by send_to_ib_mcp's not-connected
+        handling. Without it, fall back to a get_account_summary round-trip.
+        """
+        if not self.is_alive() or not self.initialized:
+            self.ib_connected = False
+            return False
 
-            response = json.loads(response_line.decode().strip())
+        try:
+            account_state = options_client.account if options_client and options_client._connected else None
+            if account_state is not None:
+                await self._call({"jsonrpc": "2.0", "id": "health_check", "method": "ping"}, timeout=10.0)
+                if not await account_state.probe():
+                    logger.warning(f"Worker {self.worker_id}: IB liveness probe failed")
+                    self.ib_connected = False
+                    return False
+                response = {}
+            else:
+                # Use get_account_summary as a connectivity test through the worker
+                test_request = {
+                    "jsonrpc": "2.0",
+                    "id": "health_check",
+                    "method": "tools/call",
+                    "params": {"name": "get_account_summary", "arguments": {}}
+                }
+                response = await self._call(test_request, timeout=10.0)
 
             # Check for "Not connected" or other IB errors
             if "result" in response:
@@ -1204,92 +4922,351 @@ class IBWorker:
             return False
 
     async def send_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Send a request and get response (must hold lock)"""
-        if not self.is_alive():
-            if not await self.start():
+        """Send a request and get response (up to max_inflight run concurrently)"""
+        # Restarts belong to the pool (see IBWorkerPool.acquire), never to a request
+        if not self.is_ready():
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": -32603, "message": "IB worker not running (restarting)"},
+                "id": request_data.get("id")
+            }
+
+        queued_at = time.monotonic()
+        async with self._slots:
+            self.inflight += 1
+            started_at = time.monotonic()
+            try:
+                response = await self._call(request_data, timeout=30.0)
+            except asyncio.TimeoutError:
+                # Ids keep the stream in sync, so a slow call doesn't poison the worker
+                logger.error(f"Worker {self.worker_id}: Timeout")
+                self.consecutive_failures += 1
+                return {
+                    "jsonrpc": "2.0",
+                    "error": {"code": -32603, "message": "Timeout waiting for IB response"},
+                    "id": request_data.get("id")
+                }
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id}: Error - {e}")
+                self.consecutive_failures += 1
+                async with self.lock:
+                    await self.stop()
                 return {
                     "jsonrpc": "2.0",
-                    "error": {"code": -32603, "message": "Failed to start IB worker"},
+                    "error": {"code": -32603, "message": str(e)},
                     "id": request_data.get("id")
                 }
+            finally:
+                self.inflight -= 1
+                if self.metrics is not None:
+                    self.metrics.record(started_at - queued_at, time.monotonic() - started_at)
+
+        # Check if this was a successful IB call
+        if "result" in response:
+            content = response["result"].get("content", [])
+            if content:
+                text = content[0].get("text", "") if isinstance(content[0], dict) else str(content[0])
+                if "Not connected" in text or "Cannot connect" in text:
+                    self.ib_connected = False
+                    self.consecutive_failures += 1
+                    return response
 
-        try:
-            self.process.stdin.write(json.dumps(request_data).encode() + b'\n')
-            await self.process.stdin.drain()
+        # Success
+        self.consecutive_failures = 0
+        self.last_successful_call = time.time()
+        self.ib_connected = True
+        return response
 
-            response_line = await asyncio.wait_for(
-                self.process.stdout.readline(),
-                timeout=30.0
-            )
 
-            if not response_line:
-                raise Exception("Process closed unexpectedly")
+class PoolMetrics:
+    """Rolling slot-wait and call-latency samples for autoscaling decisions"""
 
-            response = json.loads(response_line.decode().strip())
+    def __init__(self, maxlen: int = 2000):
+        self._samples: Deque[tuple] = deque(maxlen=maxlen)  # (time, wait, latency)
 
-            # Check if this was a successful IB call
-            if "result" in response:
-                content = response["result"].get("content", [])
-                if content:
-                    text = content[0].get("text", "") if isinstance(content[0], dict) else str(content[0])
-                    if "Not connected" in text or "Cannot connect" in text:
-                        self.ib_connected = False
-                        self.consecutive_failures += 1
-                        return response
+    def record(self, wait: float, latency: float) -> None:
+        self._samples.append((time.monotonic(), wait, latency))
 
-            # Success
-            self.consecutive_failures = 0
-            self.last_successful_call = time.time()
-            self.ib_connected = True
-            return response
+    def summary(self, window: float) -> Dict[str, Any]:
+        """Call count and p95 wait/latency (ms) over the last `window` seconds"""
+        cutoff = time.monotonic() - window
+        recent = [(w, l) for t, w, l in self._samples if t >= cutoff]
+        if not recent:
+            return {"calls": 0, "p95_wait_ms": 0.0, "p95_latency_ms": 0.0}
 
-        except asyncio.TimeoutError:
-            logger.error(f"Worker {self.worker_id}: Timeout")
-            self.consecutive_failures += 1
-            await self.stop()
-            return {
-                "jsonrpc": "2.0",
-                "error": {"code": -32603, "message": "Timeout waiting for IB response"},
-                "id": request_data.get("id")
-            }
-        except Exception as e:
-            logger.error(f"Worker {self.worker_id}: Error - {e}")
-            self.consecutive_failures += 1
-            await self.stop()
-            return {
-                "jsonrpc": "2.0",
-                "error": {"code": -32603, "message": str(e)},
-                "id": request_data.get("id")
-            }
+        def p95(values: List[float]) -> float:
+            values = sorted(values)
+            return round(1000 * values[min(len(values) - 1, int(0.95 * len(values)))], 1)
+
+        return {
+            "calls": len(recent),
+            "p95_wait_ms": p95([w for w, _ in recent]),
+            "p95_latency_ms": p95([l for _, l in recent])
+        }
 
 
 class IBWorkerPool:
-    """Pool of IB MCP workers for concurrent request handling"""
+    """
+    Pool of IB MCP workers for concurrent request handling.
+
+    Autoscales between min_size and max_size: a worker is added when calls
+    queue for slots (p95 wait) or run slow while the pool is busy (p95
+    latency), and removed after SCALE_DOWN_IDLE seconds of low load. Removed
+    workers are drained before stopping and their client ids are reused
+    only after a short quarantine so IB has released them.
+
+    All workers are started concurrently by warm_up(), and `spares` fully
+    initialized workers are kept outside the routing set. A failed worker
+    is swapped for a spare immediately while a new spare warms in the
+    background, so no request pays subprocess start or IB connect time.
+    """
 
-    def __init__(self, size: int, base_client_id: int):
-        self.size = size
-        self.workers: List[IBWorker] = [
-            IBWorker(worker_id=i, client_id=base_client_id + i)
-            for i in range(size)
-        ]
-        self._available = asyncio.Queue()
+    def __init__(self, size: int, base_client_id: int, min_size: int = IB_POOL_MIN, max_size: int = IB_POOL_MAX,
+                 spares: int = IB_POOL_SPARES):
+        self.min_size = max(1, min(min_size, max_size))
+        self.max_size = max(self.min_size, max_size)
+        self.spare_count = max(0, spares)
+        self.spares: List[IBWorker] = []
+        self.base_client_id = base_client_id
+        self.metrics = PoolMetrics()
+        self.scale_events: Deque[Dict[str, Any]] = deque(maxlen=20)
+        # Client ids this pool may use (workers + spares + one retiring worker
+        # per spare), skipping the dedicated options/orders ids
+        reserved = {OPTIONS_CLIENT_ID, ORDERS_CLIENT_ID}
+        ids = []
+        candidate = base_client_id
+        while len(ids) < self.max_size + 2 * self.spare_count:
+            if candidate not in reserved:
+                ids.append(candidate)
+            candidate += 1
+        self._free_client_ids: Dict[int, float] = {cid: 0.0 for cid in ids}  # id -> released_at
+        self._next_worker_id = 0
+        self.workers: List[IBWorker] = []
+        for _ in range(max(self.min_size, min(size, self.max_size))):
+            self.workers.append(self._new_worker())
+        self.size = len(self.workers)
         self._initialized = False
         self._health_task: Optional[asyncio.Task] = None
+        self._scale_task: Optional[asyncio.Task] = None
+        self._replenish_task: Optional[asyncio.Task] = None
+        self._starting: Dict[int, asyncio.Task] = {}  # worker_id -> background start
+        self._last_scale = 0.0
+        self._last_busy = time.monotonic()
+
+    def _allocate_client_id(self) -> int:
+        """Lowest client id that has been free longer than the quarantine (else the oldest freed)"""
+        now = time.time()
+        settled = [cid for cid, released in self._free_client_ids.items() if now - released >= CLIENT_ID_QUARANTINE]
+        if settled:
+            client_id = min(settled)
+        else:
+            client_id = min(self._free_client_ids, key=lambda cid: self._free_client_ids[cid])
+        del self._free_client_ids[client_id]
+        return client_id
+
+    def _new_worker(self) -> IBWorker:
+        worker = IBWorker(worker_id=self._next_worker_id, client_id=self._allocate_client_id())
+        worker.metrics = self.metrics
+        self._next_worker_id += 1
+        return worker
+
+    async def initialize(self) -> None:
+        """Initialize the pool - make all workers available"""
+        if self._initialized:
+            return
+        self._initialized = True
+        logger.info(f"Worker pool initialized with {self.size} workers")
+
+    async def _warm_worker(self, worker: IBWorker) -> bool:
+        """Start a worker and let it complete the IB connect handshake"""
+        async with worker.lock:
+            if not await worker.start():
+                return False
+        await governor.messages.acquire()
+        await worker.check_ib_connection()
+        return True
+
+    def _start_in_background(self, worker: IBWorker) -> asyncio.Task:
+        """Warm a worker outside any request, at most one start per worker at a time"""
+        task = self._starting.get(worker.worker_id)
+        if task is None:
+            task = asyncio.create_task(self._warm_worker(worker))
+            self._starting[worker.worker_id] = task
+            task.add_done_callback(lambda _: self._starting.pop(worker.worker_id, None))
+        return task
+
+    async def warm_up(self) -> None:
+        """Start every worker and hot spare concurrently"""
+        start = time.time()
+        for _ in range(self.spare_count - len(self.spares)):
+            if not self._free_client_ids:
+                break
+            self.spares.append(self._new_worker())
+        results = await asyncio.gather(
+            *[self._warm_worker(w) for w in self.workers + self.spares],
+            return_exceptions=True
+        )
+        started = sum(1 for r in results if r is True)
+        logger.info(f"Pool warm-up: {started}/{len(results)} workers started in {time.time() - start:.1f}s "
+                    f"({len(self.spares)} spares)")
+
+    def _is_ready(self, worker: IBWorker) -> bool:
+        return worker.is_ready()
+
+    def _take_spare(self) -> Optional[IBWorker]:
+        """Pop a ready spare, preferring ones with a verified IB connection"""
+        ready = [w for w in self.spares if self._is_ready(w)]
+        if not ready:
+            return None
+        spare = max(ready, key=lambda w: w.ib_connected)
+        self.spares.remove(spare)
+        self._schedule_replenish()
+        return spare
+
+    def _schedule_replenish(self) -> None:
+        if self._replenish_task is None or self._replenish_task.done():
+            self._replenish_task = asyncio.create_task(self._replenish_spares())
+
+    async def _replenish_spares(self) -> None:
+        """Warm new spares (in the background) until the configured count is reached"""
+        try:
+            while len(self.spares) < self.spare_count and self._free_client_ids:
+                spare = self._new_worker()
+                if await self._warm_worker(spare):
+                    self.spares.append(spare)
+                    logger.info(f"Hot spare {spare.worker_id} ready (client_id={spare.client_id})")
+                else:
+                    await self._retire(spare)
+                    break  # Gateway likely down; the health monitor retries later
+        except Exception as e:
+            logger.error(f"Spare replenish error: {e}")
+
+    async def _retire(self, worker: IBWorker) -> None:
+        """Stop a worker for good and return its client id"""
+        async with worker.lock:
+            await worker.stop()
+        self._free_client_ids[worker.client_id] = time.time()
+
+    async def replace_worker(self, worker: IBWorker, reason: str) -> bool:
+        """
+        Swap a failed worker for a warm spare.
 
-    async def initialize(self) -> None:
-        """Initialize the pool - make all workers available"""
-        if self._initialized:
-            return
-        for worker in self.workers:
-            await self._available.put(worker)
-        self._initialized = True
-        logger.info(f"Worker pool initialized with {self.size} workers")
+        Returns True if the slot now holds a ready worker. Without a spare the
+        failed worker is stopped and restarted in the background.
+        """
+        if worker not in self.workers:
+            return True  # Already swapped by a concurrent caller
+        if self._swap_in_spare(worker, reason) is not None:
+            return True
+        async with worker.lock:
+            await worker.stop()
+        return False
+
+    def _swap_in_spare(self, worker: IBWorker, reason: str) -> Optional[IBWorker]:
+        """Put a ready spare in the worker's slot and retire the worker in the background"""
+        spare = self._take_spare()
+        if spare is None:
+            return None
+        self.workers[self.workers.index(worker)] = spare
+        self._record_scale_event("swap", spare, f"replaced worker {worker.worker_id}: {reason}")
+        asyncio.create_task(self._retire(worker))
+        return spare
 
     async def start_health_monitor(self) -> None:
         """Start background health monitoring"""
         self._health_task = asyncio.create_task(self._health_monitor())
         logger.info(f"Health monitor started (interval: {HEALTH_CHECK_INTERVAL}s)")
 
+    async def start_autoscaler(self) -> None:
+        """Start background autoscaling"""
+        if self.min_size == self.max_size:
+            return
+        self._scale_task = asyncio.create_task(self._autoscale_loop())
+        logger.info(f"Autoscaler started (size {self.min_size}-{self.max_size}, interval: {SCALE_INTERVAL}s)")
+
+    def _record_scale_event(self, action: str, worker: IBWorker, reason: str) -> None:
+        event = {
+            "time": time.time(),
+            "action": action,
+            "worker_id": worker.worker_id,
+            "client_id": worker.client_id,
+            "size": self.size,
+            "reason": reason
+        }
+        self.scale_events.append(event)
+        logger.info(f"Pool {action}: worker {worker.worker_id} (client_id={worker.client_id}), size={self.size} - {reason}")
+
+    async def _autoscale_loop(self) -> None:
+        """Periodically grow or shrink the pool from measured wait and latency"""
+        while True:
+            try:
+                await asyncio.sleep(SCALE_INTERVAL)
+                await self._autoscale_step()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Autoscaler error: {e}")
+
+    async def _autoscale_step(self) -> None:
+        now = time.monotonic()
+        active = [w for w in self.workers if not w.draining]
+        capacity = sum(w.max_inflight for w in active) or 1
+        inflight = sum(w.inflight for w in self.workers)
+        stats = self.metrics.summary(window=SCALE_INTERVAL)
+        busy = inflight / capacity >= 0.5 or stats["p95_wait_ms"] > 0
+        if busy:
+            self._last_busy = now
+
+        # Don't flap: one scaling action per interval
+        if now - self._last_scale < SCALE_INTERVAL:
+            return
+
+        if len(active) < self.max_size:
+            reason = None
+            if stats["p95_wait_ms"] > SCALE_UP_WAIT_MS:
+                reason = f"p95 slot wait {stats['p95_wait_ms']}ms > {SCALE_UP_WAIT_MS}ms"
+            elif busy and stats["p95_latency_ms"] > SCALE_UP_P95_MS:
+                reason = f"p95 latency {stats['p95_latency_ms']}ms > {SCALE_UP_P95_MS}ms while busy"
+            if reason:
+                await self.scale_up(reason)
+                return
+
+        if len(active) > self.min_size and now - self._last_busy > SCALE_DOWN_IDLE:
+            await self.scale_down(f"idle for {int(now - self._last_busy)}s")
+
+    async def scale_up(self, reason: str) -> Optional[IBWorker]:
+        """Add a worker: promote a hot spare, or start a new one in the background"""
+        worker = self._take_spare()
+        if worker is None:
+            if not self._free_client_ids:
+                return None
+            worker = self._new_worker()
+            self._start_in_background(worker)
+        self.workers.append(worker)
+        self.size = len(self.workers)
+        self._last_scale = time.monotonic()
+        self._record_scale_event("scale_up", worker, reason)
+        return worker
+
+    async def scale_down(self, reason: str) -> Optional[IBWorker]:
+        """Drain the least-used worker, stop it and release its client id"""
+        active = [w for w in self.workers if not w.draining]
+        if len(active) <= self.min_size:
+            return None
+        worker = min(active, key=lambda w: (w.inflight, w.last_successful_call, -w.worker_id))
+        worker.draining = True
+        self._last_scale = time.monotonic()
+        self._record_scale_event("drain", worker, reason)
+
+        deadline = time.monotonic() + SCALE_DRAIN_TIMEOUT
+        while worker.inflight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        self.workers.remove(worker)
+        self.size = len(self.workers)
+        await self._retire(worker)
+        self._record_scale_event("scale_down", worker, reason)
+        return worker
+
     async def _health_monitor(self) -> None:
         """Background task to monitor worker health and auto-reconnect gateway if needed"""
         consecutive_disconnects = 0
@@ -1301,25 +5278,27 @@ class IBWorkerPool:
                 workers_connected = 0
                 workers_needing_restart = []
 
-                for i, worker in enumerate(self.workers):
+                for i, worker in enumerate(list(self.workers)):
+                    if worker.draining:
+                        continue
                     # Stagger checks to avoid IB connection storms
                     if i > 0:
                         await asyncio.sleep(2)
 
                     if worker.is_alive():
-                        # Check actual IB connectivity
-                        async with worker.lock:
-                            connected = await worker.check_ib_connection()
-                            if connected:
-                                workers_connected += 1
-                            else:
-                                # Increment failure count but don't restart immediately
-                                worker.consecutive_failures += 1
-                                logger.warning(f"Worker {worker.worker_id}: IB check failed ({worker.consecutive_failures} consecutive)")
-
-                                # Only restart after 2+ consecutive failures AND backoff elapsed
-                                if worker.consecutive_failures >= 2 and worker.should_restart():
-                                    workers_needing_restart.append(worker)
+                        # Check actual IB connectivity (pipelined alongside real traffic)
+                        await governor.messages.acquire()
+                        connected = await worker.check_ib_connection()
+                        if connected:
+                            workers_connected += 1
+                        else:
+                            # Increment failure count but don't restart immediately
+                            worker.consecutive_failures += 1
+                            logger.warning(f"Worker {worker.worker_id}: IB check failed ({worker.consecutive_failures} consecutive)")
+
+                            # Only restart after 2+ consecutive failures AND backoff elapsed
+                            if worker.consecutive_failures >= 2 and worker.should_restart():
+                                workers_needing_restart.append(worker)
                     else:
                         # Worker not alive - check if we should restart with backoff
                         if worker.should_restart():
@@ -1329,14 +5308,25 @@ class IBWorkerPool:
                     if worker.restart_count >= 3:
                         logger.warning(f"Worker {worker.worker_id}: {worker.restart_count} restart attempts, backing off")
 
-                # Restart workers that need it (one at a time with delay)
+                # Restart workers that need it: swap in a hot spare if one is ready,
+                # otherwise restart in place (one at a time with delay)
                 for worker in workers_needing_restart:
-                    async with worker.lock:
-                        backoff = min(5 * (2 ** (worker.restart_count)), 60) if worker.restart_count > 0 else 5
-                        logger.info(f"Worker {worker.worker_id}: Restarting (attempt #{worker.restart_count + 1}, next backoff {backoff}s)")
-                        await worker.stop()
-                        # Small delay before restart to let IB settle
-                        await asyncio.sleep(3)
+                    if await self.replace_worker(worker, "failed health check"):
+                        continue
+                    backoff = min(5 * (2 ** (worker.restart_count)), 60) if worker.restart_count > 0 else 5
+                    logger.info(f"Worker {worker.worker_id}: Restarting (attempt #{worker.restart_count + 1}, next backoff {backoff}s)")
+                    # Small delay before restart to let IB settle
+                    await asyncio.sleep(3)
+                    self._start_in_background(worker)
+
+                # Spares can lose IB silently too; replace dead ones and top up
+                for spare in list(self.spares):
+                    if not self._is_ready(spare) or not await spare.check_ib_connection():
+                        logger.warning(f"Hot spare {spare.worker_id} unhealthy, replacing")
+                        self.spares.remove(spare)
+                        await self._retire(spare)
+                if len(self.spares) < self.spare_count:
+                    self._schedule_replenish()
 
                 # Auto-reconnect gateway only if BOTH workers AND options_client are disconnected
                 # This prevents unnecessary gateway restarts when options_client is working fine
@@ -1386,8 +5376,9 @@ class IBWorkerPool:
             result = await docker_command("restart")
             if result["success"]:
                 logger.info("Gateway restart initiated by health monitor")
-                # Wait for gateway to come up
-                await asyncio.sleep(30)
+                # Wait for the container's start event and the API port rather than a fixed sleep
+                if not await wait_for_gateway_api(timeout=90):
+                    logger.warning("Gateway API not reachable 90s after restart")
             else:
                 logger.error(f"Gateway auto-restart failed: {result.get('error')}")
         except Exception as e:
@@ -1395,23 +5386,45 @@ class IBWorkerPool:
 
     @asynccontextmanager
     async def acquire(self):
-        """Acquire a worker from the pool"""
-        worker = await self._available.get()
-        try:
-            yield worker
-        finally:
-            await self._available.put(worker)
+        """
+        Pick the least-loaded worker.
+
+        Workers are shared, not checked out: each one multiplexes up to
+        max_inflight calls and queues the rest on its own slots.
+
+        If no routable worker is ready and no spare is, the chosen worker
+        starts in the background and the request waits at most
+        WORKER_RESTART_WAIT seconds for that start; a worker that is still
+        not through its MCP handshake by then fails the request fast instead
+        of starting inline.
+        """
+        # Never make a request pay for a cold start when a warm spare is ready
+        for dead in [w for w in self.workers if not w.draining and not w.is_alive() and w.inflight == 0]:
+            if self._swap_in_spare(dead, "not running") is None:
+                break
+        candidates = [w for w in self.workers if not w.draining] or self.workers
+        worker = min(
+            candidates,
+            key=lambda w: (not self._is_ready(w), w.inflight / w.max_inflight, w.worker_id)
+        )
+        if not self._is_ready(worker):
+            try:
+                await asyncio.wait_for(asyncio.shield(self._start_in_background(worker)), WORKER_RESTART_WAIT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Worker {worker.worker_id}: not ready after {WORKER_RESTART_WAIT}s, failing request")
+        yield worker
 
     async def shutdown(self) -> None:
         """Stop all workers and health monitor"""
         logger.info("Shutting down worker pool")
-        if self._health_task:
-            self._health_task.cancel()
-            try:
-                await self._health_task
-            except asyncio.CancelledError:
-                pass
-        for worker in self.workers:
+        for task in (self._health_task, self._scale_task, self._replenish_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        for worker in self.workers + self.spares:
             await worker.stop()
 
     def get_stats(self) -> Dict[str, Any]:
@@ -1420,22 +5433,33 @@ class IBWorkerPool:
         ib_connected = sum(1 for w in self.workers if w.ib_connected)
         return {
             "pool_size": self.size,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
             "workers_alive": alive,
             "workers_ib_connected": ib_connected,
-            "workers_available": self._available.qsize(),
+            "workers_available": sum(1 for w in self.workers if w.inflight < w.max_inflight),
+            "inflight": sum(w.inflight for w in self.workers),
             "workers": [
                 {
                     "id": w.worker_id,
                     "client_id": w.client_id,
                     "alive": w.is_alive(),
                     "initialized": w.initialized,
+                    "inflight": w.inflight,
+                    "draining": w.draining,
                     "ib_connected": w.ib_connected,
                     "consecutive_failures": w.consecutive_failures,
                     "restart_count": w.restart_count,
                     "last_success_ago": int(time.time() - w.last_successful_call) if w.last_successful_call else None
                 }
                 for w in self.workers
-            ]
+            ],
+            "spares": [
+                {"id": w.worker_id, "client_id": w.client_id, "ready": self._is_ready(w), "ib_connected": w.ib_connected}
+                for w in self.spares
+            ],
+            "load": self.metrics.summary(window=60),
+            "scale_events": list(self.scale_events)
         }
 
 
@@ -1472,6 +5496,13 @@ INIT_RESPONSE = {
 }
 
 
+# Read-only MCP methods whose identical concurrent requests are coalesced
+COALESCED_METHODS = {"tools/call", "tools/list"}
+
+# MCP tools that issue IB historical data requests (subject to historical pacing)
+HISTORICAL_TOOLS = {"get_historical_data"}
+
+
 def is_ib_not_connected_error(response: Dict[str, Any]) -> bool:
     """Check if response indicates IB is not connected"""
     if "result" in response:
@@ -1484,8 +5515,6 @@ def is_ib_not_connected_error(response: Dict[str, Any]) -> bool:
 
 async def send_to_ib_mcp(request_data: Dict[str, Any]) -> Dict[str, Any]:
     """Send request to IB MCP via worker pool with retry logic"""
-    global pool, circuit_breaker
-
     # Handle initialize request without using a worker
     if request_data.get("method") == "initialize":
         return {
@@ -1494,6 +5523,21 @@ async def send_to_ib_mcp(request_data: Dict[str, Any]) -> Dict[str, Any]:
             "result": INIT_RESPONSE
         }
 
+    # ib_mcp only reads, so identical concurrent calls share one round-trip
+    method = request_data.get("method")
+    if method in COALESCED_METHODS:
+        response = await coalescer.run(
+            f"mcp:{method}", (request_data.get("params") or {},), lambda: _send_to_ib_mcp(request_data),
+            cacheable=lambda r: "error" not in r and not is_ib_not_connected_error(r)
+        )
+        response["id"] = request_data.get("id")
+        return response
+    return await _send_to_ib_mcp(request_data)
+
+
+async def _send_to_ib_mcp(request_data: Dict[str, Any]) -> Dict[str, Any]:
+    global pool, circuit_breaker, native_tools
+
     # Check circuit breaker
     if not await circuit_breaker.can_execute():
         return {
@@ -1505,54 +5549,85 @@ async def send_to_ib_mcp(request_data: Dict[str, Any]) -> Dict[str, Any]:
             "id": request_data.get("id")
         }
 
+    params = request_data.get("params") or {}
+
+    # Hot tools run in-process on the shared ib_async connection
+    if request_data.get("method") == "tools/call" and native_tools:
+        data = await native_tools.call(params.get("name"), params.get("arguments") or {})
+        if data is not None:
+            await circuit_breaker.record_success()
+            return {
+                "jsonrpc": "2.0",
+                "id": request_data.get("id"),
+                "result": {
+                    "content": [{"type": "text", "text": json.dumps(data)}],
+                    "structuredContent": data,
+                    "isError": False
+                }
+            }
+
+    # Historical data tools share IB's historical pacing budget
+    if request_data.get("method") == "tools/call" and params.get("name") in HISTORICAL_TOOLS:
+        pacing_key = json.dumps([params.get("name"), params.get("arguments") or {}], sort_keys=True)
+        await governor.historical.acquire(pacing_key)
+
     # Retry loop with exponential backoff
     last_response = None
     for attempt in range(MAX_RETRIES + 1):
+        await governor.messages.acquire()
         async with pool.acquire() as worker:
-            async with worker.lock:
-                response = await worker.send_request(request_data)
-                last_response = response
+            response = await worker.send_request(request_data)
+            last_response = response
 
-                # Check if IB not connected
-                if is_ib_not_connected_error(response):
-                    await circuit_breaker.record_failure()
+            # Check if IB not connected
+            if is_ib_not_connected_error(response):
+                await circuit_breaker.record_failure()
 
-                    if attempt < MAX_RETRIES:
-                        logger.warning(f"IB not connected, restarting worker (attempt {attempt + 1}/{MAX_RETRIES + 1})")
-                        await worker.stop()
+                if attempt < MAX_RETRIES:
+                    logger.warning(f"IB not connected, replacing worker (attempt {attempt + 1}/{MAX_RETRIES + 1})")
+                    # A warm spare can take the call right away; otherwise back off
+                    if not await pool.replace_worker(worker, "IB not connected"):
                         backoff = 2 ** attempt
                         await asyncio.sleep(backoff)
-                        continue
-
-                    # All retries exhausted
-                    return response
+                    continue
 
-                # Check for other errors
-                if "error" in response:
-                    await circuit_breaker.record_failure()
-                    return response
+                # All retries exhausted
+                return response
 
-                # Success!
-                await circuit_breaker.record_success()
+            # Check for other errors
+            if "error" in response:
+                await circuit_breaker.record_failure()
                 return response
 
+            # Success!
+            await circuit_breaker.record_success()
+            return response
+
     return last_response
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler"""
-    global pool, options_client, orders_client
+    global pool, options_client, orders_client, native_tools
     logger.info(f"Starting MCP IB Server with {POOL_SIZE} workers")
     logger.info(f"Connecting to {IB_HOST}:{IB_PORT}, base client_id={IB_CLIENT_ID_BASE}")
     logger.info(f"Health check interval: {HEALTH_CHECK_INTERVAL}s, Max retries: {MAX_RETRIES}")
     logger.info(f"Options timeout: {OPTIONS_TIMEOUT}s, Options client_id: {OPTIONS_CLIENT_ID}")
     logger.info(f"Orders client_id: {ORDERS_CLIENT_ID}, IB_READONLY={os.getenv('IB_READONLY', 'true')}")
 
+    # Load persisted contract qualifications before any client needs them
+    await contract_cache.load()
+
+    # Follow the gateway container's state through Docker events
+    await docker_engine.start()
+
     # Initialize MCP worker pool
     pool = IBWorkerPool(size=POOL_SIZE, base_client_id=IB_CLIENT_ID_BASE)
     await pool.initialize()
+    await pool.warm_up()
     await pool.start_health_monitor()
+    await pool.start_autoscaler()
 
     # Initialize dedicated options client (uses ib_async directly for reqSecDefOptParams)
     options_client = OptionsClient(
@@ -1566,6 +5641,11 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Options client failed to connect on startup: {e}")
     await options_client.start_health_monitor()
+    await options_client.market_data.start()
+    native_tools = NativeTools(options_client)
+
+    # Warm watchlist contracts, option params and near-ATM lines (startup + scheduled)
+    await cache_warmer.start(options_client)
 
     # Initialize orders client for paper trading
     orders_client = OrdersClient(
@@ -1586,10 +5666,13 @@ async def lifespan(app: FastAPI):
     if orders_client:
         await orders_client.stop_health_monitor()
         await orders_client.disconnect()
+    await cache_warmer.stop()
     if options_client:
         await options_client.stop_health_monitor()
+        await options_client.market_data.stop()
         await options_client.disconnect()
     await pool.shutdown()
+    await docker_engine.stop()
 
 
 app = FastAPI(title="MCP IB Server", version="2.1.0", lifespan=lifespan)
@@ -1643,6 +5726,20 @@ async def health_check():
         "ib_host": IB_HOST,
         "ib_port": IB_PORT,
         "circuit_breaker": cb_status,
+        "market_data": options_client.market_data.get_stats() if options_client else None,
+        "contract_cache": contract_cache.get_stats(),
+        "option_params": options_client.option_params.get_stats() if options_client else None,
+        "governor": governor.get_stats(),
+        "native_tools": native_tools.get_stats() if native_tools else None,
+        "bar_store": bar_store.get_stats(),
+        "iv_surface": surface_cache.get_stats(),
+        "chain_snapshots": chain_snapshots.get_stats(),
+        "orders": orders_client.tracker.get_stats() if orders_client else None,
+        "coalescing": coalescer.get_stats(),
+        "account_state": options_client.account.get_stats() if options_client else None,
+        "portfolio_risk": portfolio_risk.get_stats(),
+        "cache_warmer": cache_warmer.get_stats(),
+        "docker": docker_engine.get_stats(),
         "pool": pool_stats
     }
 
@@ -1832,17 +5929,23 @@ async def gateway_ensure_ready(timeout: int = 90):
     start_time = time.time()
     max_wait = min(timeout, 120)  # Cap at 2 minutes
 
-    while time.time() - start_time < max_wait:
-        await asyncio.sleep(2)  # Check every 2 seconds
-        status = await check_gateway_status()
-        if status["status"] == "connected":
-            waited = int(time.time() - start_time)
-            logger.info(f"Gateway ready after {waited}s")
-            return {
-                "ready": True,
-                "message": f"Gateway connected after {waited}s",
-                "waited": waited
-            }
+    # Container state is pushed by the Docker event stream; then reconnect the
+    # workers as soon as the API port opens instead of waiting for the monitor
+    if await wait_for_gateway_api(max_wait):
+        while time.time() - start_time < max_wait:
+            if pool:
+                await pool.warm_up()
+            status = await check_gateway_status()
+            if status["status"] == "connected":
+                waited = int(time.time() - start_time)
+                logger.info(f"Gateway ready after {waited}s")
+                return {
+                    "ready": True,
+                    "message": f"Gateway connected after {waited}s",
+                    "waited": waited
+                }
+            # API port open but IB login still in progress
+            await asyncio.sleep(min(2, max(max_wait - (time.time() - start_time), 0)))
 
     # Timeout - still not connected
     waited = int(time.time() - start_time)
@@ -1855,6 +5958,75 @@ async def gateway_ensure_ready(timeout: int = 90):
     }
 
 
+# ============================================================================
+# Response Encoding
+# Opt-in columnar chain/quote payloads serialized without jsonable_encoder
+# ============================================================================
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json produces the same payload, just slower
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # Optional: format=msgpack is unavailable without it
+    msgpack = None
+
+RESPONSE_FORMATS = ("json", "columnar", "msgpack")  # Default rows / parallel arrays as JSON / as MessagePack
+CHAIN_ROW_COLUMNS = ("strike", "bid", "ask", "last", "volume", "open_interest", "iv")
+GREEK_COLUMNS = ("delta", "gamma", "theta", "vega")
+QUOTE_COLUMNS = ("symbol", "price", "bid", "ask", "last", "volume", "timestamp", "source", "error")
+
+
+def check_format(format: str) -> Optional[str]:
+    """Error message for an unsupported response format, else None"""
+    if format not in RESPONSE_FORMATS:
+        return f"format must be one of {', '.join(RESPONSE_FORMATS)}"
+    if format == "msgpack" and msgpack is None:
+        return "format=msgpack needs the msgpack package on the server"
+    return None
+
+
+def rows_to_columns(rows: List[Dict[str, Any]], fields: tuple) -> Dict[str, list]:
+    """Parallel arrays, one per field, in row order (missing values are null)"""
+    return {name: [row.get(name) for row in rows] for name in fields}
+
+
+def chain_columns(rows: List[Dict[str, Any]]) -> Dict[str, list]:
+    """Chain rows as parallel arrays with the greeks flattened into delta/gamma/theta/vega"""
+    columns = rows_to_columns(rows, CHAIN_ROW_COLUMNS)
+    columns["iv"] = [_number(value) for value in columns["iv"]]
+    greeks = [row.get("greeks") or {} for row in rows]
+    for name in GREEK_COLUMNS:
+        columns[name] = [_number(g.get(name)) for g in greeks]
+    if any("greeks_source" in row for row in rows):
+        columns["greeks_source"] = [row.get("greeks_source") for row in rows]
+    return columns
+
+
+def columnar_chain(chain: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace a chain's calls/puts row lists with column dicts (in place)"""
+    if "error" not in chain:
+        chain["calls"] = chain_columns(chain.get("calls", []))
+        chain["puts"] = chain_columns(chain.get("puts", []))
+        chain["format"] = "columnar"
+    return chain
+
+
+def dump_json(payload: Any) -> bytes:
+    """Compact JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def encode_response(payload: Dict[str, Any], format: str) -> Response:
+    """Serialize a columnar payload directly, bypassing FastAPI's jsonable_encoder"""
+    if format == "msgpack":
+        return Response(msgpack.packb(payload, use_bin_type=True), media_type="application/msgpack")
+    return Response(dump_json(payload), media_type="application/json")
+
+
 # ============================================================================
 # Options Data REST Endpoints (for optionsearch integration)
 # Uses dedicated OptionsClient with ib_async for reqSecDefOptParams
@@ -1894,7 +6066,15 @@ async def get_option_expirations(symbol: str):
 
 
 @app.get("/options/chain/{symbol}/{expiration}")
-async def get_option_chain(symbol: str, expiration: str, strikes: int = 20):
+async def get_option_chain(
+    symbol: str,
+    expiration: str,
+    strikes: int = 20,
+    timeout: float = CHAIN_DATA_TIMEOUT,
+    greeks: str = "ib",
+    since: Optional[str] = None,
+    format: str = "json"
+):
     """
     Get options chain for a symbol and expiration.
 
@@ -1904,75 +6084,321 @@ async def get_option_chain(symbol: str, expiration: str, strikes: int = 20):
         symbol: Stock symbol (e.g., AAPL)
         expiration: Expiration date in YYYYMMDD format
         strikes: Number of strikes on each side of ATM (default 20)
-
-    Returns calls and puts with bid/ask/last/greeks.
+        timeout: Max seconds to wait for bid/ask/greeks per contract (default 3)
+        greeks: "ib" (IB modelGreeks only), "fill" (local model where IB sent none)
+            or "model" (local model for every strike)
+        since: Version token from an earlier response of this chain; only
+            strikes changed after it are returned (plus removed strikes)
+        format: "json" (row objects), "columnar" (calls/puts as parallel
+            arrays per field: strike, bid, ask, ..., delta, gamma, theta, vega)
+            or "msgpack" (the columnar payload as MessagePack)
+
+    Returns calls and puts with bid/ask/last/greeks, timed_out strikes and a
+    version token. With a stale or foreign `since` the full chain comes back
+    with "full": true.
     """
     global options_client
 
     if not options_client:
         return {"error": "Options client not initialized", "symbol": symbol}
+    if greeks not in GREEKS_MODES:
+        return {"error": f"greeks must be one of {', '.join(GREEKS_MODES)}", "symbol": symbol}
+    if format_error := check_format(format):
+        return {"error": format_error, "symbol": symbol}
 
     try:
         result = await options_client.get_option_chain(
             symbol=symbol.upper(),
             expiration=expiration,
-            strikes_range=strikes
+            strikes_range=strikes,
+            data_timeout=timeout
         )
 
         if "error" in result:
             return result
 
+        if greeks != "ib":
+            apply_model_greeks([result], greeks)
+        result = chain_snapshots.apply((symbol.upper(), expiration, strikes, greeks), result, since)
+        if format != "json":
+            return encode_response(columnar_chain(result), format)
         return result
     except Exception as e:
         logger.error(f"Error getting chain for {symbol} {expiration}: {e}")
         return {"error": str(e), "symbol": symbol, "expiration": expiration}
 
 
+@app.get("/options/chain/{symbol}/{expiration}/stream")
+async def stream_option_chain(
+    symbol: str,
+    expiration: str,
+    strikes: int = 20,
+    timeout: float = CHAIN_DATA_TIMEOUT,
+    greeks: str = "ib",
+    format: str = "ndjson"
+):
+    """
+    Stream an options chain as its data arrives.
+
+    Emits a meta event (underlying price, strikes) first, then one row event
+    per contract as its ticker settles (near-ATM strikes that are already
+    streaming come first), then a summary with the timed_out strikes.
+
+    Args:
+        format: "ndjson" (one JSON object per line) or "sse" (text/event-stream,
+            event name = type)
+        strikes, timeout, greeks: as for GET /options/chain/{symbol}/{expiration}
+    """
+    global options_client
+
+    if not options_client:
+        return {"error": "Options client not initialized", "symbol": symbol}
+    if greeks not in GREEKS_MODES:
+        return {"error": f"greeks must be one of {', '.join(GREEKS_MODES)}", "symbol": symbol}
+    if format not in ("ndjson", "sse"):
+        return {"error": "format must be ndjson or sse", "symbol": symbol}
+
+    async def stream():
+        underlying_price = None
+        try:
+            async for event in options_client.stream_option_chain(
+                symbol=symbol.upper(),
+                expiration=expiration,
+                strikes_range=strikes,
+                data_timeout=timeout
+            ):
+                if event["type"] == "meta":
+                    underlying_price = event["underlying_price"]
+                elif event["type"] == "row" and greeks != "ib":
+                    side = "calls" if event["right"] == "C" else "puts"
+                    apply_model_greeks(
+                        [{"expiration": expiration, "underlying_price": underlying_price, side: [event]}], greeks
+                    )
+                if format == "sse":
+                    yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                else:
+                    yield json.dumps(event) + "\n"
+        except Exception as e:
+            logger.error(f"Chain stream failed for {symbol} {expiration}: {e}")
+            event = {"type": "error", "symbol": symbol, "expiration": expiration, "error": str(e)}
+            yield f"event: error\ndata: {json.dumps(event)}\n\n" if format == "sse" else json.dumps(event) + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
+class ChainBatchRequest(BaseModel):
+    """Request for many option chains planned as one job"""
+    symbols: List[str]
+    expirations: Optional[List[str]] = None  # YYYYMMDD; default = nearest max_expirations
+    max_expirations: int = 6
+    strikes: int = 20  # Strikes on each side of ATM
+    timeout: float = CHAIN_DATA_TIMEOUT  # Per-contract data deadline
+    greeks: str = "ib"  # "ib", "fill" or "model" (see GET /options/chain)
+    format: str = "json"  # "json" or "columnar" (see GET /options/chain)
+
+
+@app.post("/options/chains")
+async def get_option_chains(request: ChainBatchRequest):
+    """
+    Get option chains for symbols x expirations in one batch.
+
+    Shares underlying price and option params per symbol, qualifies all
+    contracts together, and streams each chain back as newline-delimited
+    JSON as soon as it completes (format="columnar" sends each chain's calls
+    and puts as parallel arrays). The last line is a summary.
+    """
+    global options_client
+
+    if not options_client:
+        return {"error": "Options client not initialized"}
+    if request.greeks not in GREEKS_MODES:
+        return {"error": f"greeks must be one of {', '.join(GREEKS_MODES)}"}
+    if request.format not in ("json", "columnar"):
+        return {"error": "format must be json or columnar (NDJSON lines)"}
+
+    async def stream():
+        start = time.time()
+        chains = 0
+        errors = 0
+        try:
+            async for chain in options_client.iter_option_chains(
+                symbols=request.symbols,
+                expirations=request.expirations,
+                max_expirations=request.max_expirations,
+                strikes_range=request.strikes,
+                data_timeout=request.timeout
+            ):
+                if "error" in chain:
+                    errors += 1
+                else:
+                    chains += 1
+                    if request.greeks != "ib":
+                        apply_model_greeks([chain], request.greeks)
+                if request.format == "columnar":
+                    yield dump_json(columnar_chain(chain)) + b"\n"
+                else:
+                    yield json.dumps(chain) + "\n"
+        except Exception as e:
+            logger.error(f"Chain batch failed: {e}")
+            errors += 1
+            yield json.dumps({"error": str(e)}) + "\n"
+        yield json.dumps({
+            "done": True,
+            "chains": chains,
+            "errors": errors,
+            "elapsed": round(time.time() - start, 3)
+        }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/options/surface/{symbol}")
+async def get_iv_surface(
+    symbol: str,
+    max_expirations: int = 8,
+    strikes: int = 15,
+    timeout: float = CHAIN_DATA_TIMEOUT
+):
+    """
+    Get an implied volatility surface (expirations x strikes) for an underlying.
+
+    Built from the same cached option params and shared tickers as the chain
+    endpoints, with local IV where IB sent none and interpolation for missing
+    points (flagged in `interpolated`). Surfaces are shared for SURFACE_TTL seconds.
+    """
+    global options_client
+
+    if not options_client:
+        return {"error": "Options client not initialized", "symbol": symbol}
+
+    try:
+        return await surface_cache.get(options_client, symbol, max_expirations, strikes, timeout)
+    except Exception as e:
+        logger.error(f"Error building IV surface for {symbol}: {e}")
+        return {"error": str(e), "symbol": symbol}
+
+
+class GreeksOption(BaseModel):
+    """One option to price: IV comes from price, else bid/ask midpoint, else last"""
+    strike: float
+    right: str  # C or P
+    expiration: str  # YYYYMMDD
+    price: Optional[float] = None
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    last: Optional[float] = None
+
+
+class GreeksRequest(BaseModel):
+    """Local Black-Scholes IV and greeks for a set of options on one underlying"""
+    underlying_price: float
+    options: List[GreeksOption]
+    rate: float = RISK_FREE_RATE
+    dividend_yield: float = DIVIDEND_YIELD
+
+
+@app.post("/options/greeks")
+async def compute_option_greeks(request: GreeksRequest):
+    """
+    Compute IV and delta/gamma/theta/vega for many options in one vectorized pass.
+
+    Pure computation - uses no IB requests or market data lines.
+    """
+    start = time.perf_counter()
+    now = time.time()
+    try:
+        opts = request.options
+        model = option_model(
+            [o.price if o.price else option_mid(o.bid, o.ask, o.last) for o in opts],
+            [request.underlying_price] * len(opts),
+            [o.strike for o in opts],
+            [years_to_expiry(o.expiration, now) for o in opts],
+            [o.right.upper().startswith("C") for o in opts],
+            request.rate,
+            request.dividend_yield
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+
+    results = []
+    for i, o in enumerate(opts):
+        row = {"strike": o.strike, "right": o.right.upper()[:1], "expiration": o.expiration}
+        for name in ("iv", "delta", "gamma", "theta", "vega"):
+            row[name] = _number(model[name][i])
+        results.append(row)
+
+    return {
+        "underlying_price": request.underlying_price,
+        "rate": request.rate,
+        "dividend_yield": request.dividend_yield,
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
+
+
+def parse_markdown_bars(text: str) -> List[Dict[str, Any]]:
+    """Parse ib_mcp's markdown bar table (| Date | Open | High | Low | Close | Volume |)"""
+    bars = []
+    for line in text.strip().split('\n'):
+        # Data lines start with | and contain numbers
+        if not line.startswith('|') or 'Date' in line or '---' in line or '*' in line:
+            continue
+        parts = [p.strip() for p in line.split('|') if p.strip()]
+        if len(parts) >= 6:
+            bars.append({
+                "date": parts[0] or None,
+                "open": float(parts[1]) if parts[1] else None,
+                "high": float(parts[2]) if parts[2] else None,
+                "low": float(parts[3]) if parts[3] else None,
+                "close": float(parts[4]) if parts[4] else None,
+                "volume": float(parts[5]) if parts[5] else None
+            })
+    return bars
+
+
 @app.get("/options/quote/{symbol}")
-async def get_stock_quote(symbol: str):
+async def get_stock_quote(symbol: str, format: str = "json"):
     """
     Get current stock quote with price.
 
     Uses options client for market data if available, falls back to historical data.
     Returns price, bid, ask, volume.
+
+    format: "json" (one quote object), "columnar" or "msgpack" (the quote's
+    symbol, price, bid, ask, last, volume, timestamp, source, error fields as
+    one-element arrays, as POST /options/quotes returns them)
     """
+    if format_error := check_format(format):
+        return {"error": format_error, "symbol": symbol}
+    quote = await _stock_quote(symbol)
+    if format == "json" or "error" in quote:
+        return quote
+    return encode_response({**rows_to_columns([quote], QUOTE_COLUMNS), "format": "columnar"}, format)
+
+
+async def _stock_quote(symbol: str) -> Dict[str, Any]:
     global options_client
 
     # Try using options client first (uses live market data)
     if options_client:
         try:
-            if await options_client.ensure_connected():
-                stock = await options_client.get_stock_contract(symbol.upper())
-                if stock:
-                    # Request market data type 4 = delayed frozen data
-                    options_client._ib.reqMarketDataType(4)
-
-                    ticker = options_client._ib.reqMktData(stock, '', False, False)
-                    await asyncio.sleep(2)
-
-                    options_client._ib.cancelMktData(stock)
-
-                    price = ticker.last
-                    if not price or price <= 0:
-                        price = ticker.close
-                    if not price or price <= 0:
-                        if ticker.bid and ticker.ask and ticker.bid > 0 and ticker.ask > 0:
-                            price = (ticker.bid + ticker.ask) / 2
-
-                    if price and price > 0:
-                        return {
-                            "symbol": symbol.upper(),
-                            "price": float(price),
-                            "bid": float(ticker.bid) if ticker.bid and ticker.bid > 0 else None,
-                            "ask": float(ticker.ask) if ticker.ask and ticker.ask > 0 else None,
-                            "last": float(ticker.last) if ticker.last and ticker.last > 0 else None,
-                            "volume": int(ticker.volume) if ticker.volume else None,
-                            "source": "market_data"
-                        }
+            ticker = await options_client.get_stock_ticker(symbol.upper())
+            if ticker and ticker_price(ticker):
+                return quote_from_ticker(symbol.upper(), ticker)
         except Exception as e:
             logger.warning(f"Options client quote failed for {symbol}, falling back to historical: {e}")
 
-    # Fall back to historical data via MCP
+        # Fall back to the latest bar from the local bar store
+        try:
+            stock = await options_client.get_stock_contract(symbol.upper())
+            bar = await bar_store.tail(options_client._ib, stock) if stock else None
+            if bar:
+                return quote_from_bar(symbol.upper(), bar)
+        except Exception as e:
+            logger.warning(f"Bar store quote failed for {symbol}, falling back to MCP: {e}")
+
+    # Last resort: historical data via MCP
     request = {
         "jsonrpc": "2.0",
         "id": "quote-1",
@@ -1993,42 +6419,205 @@ async def get_stock_quote(symbol: str):
         return {"error": result["error"], "symbol": symbol}
 
     try:
-        content = result.get("result", {}).get("content", [])
-        if content and len(content) > 0:
-            text = content[0].get("text", "")
-            # Parse the markdown table format
-            # Format: | Date | Open | High | Low | Close | Volume |
-            lines = text.strip().split('\n')
-
-            # Find data lines (those starting with | and containing numbers)
-            data_lines = []
-            for line in lines:
-                if line.startswith('|') and 'Date' not in line and '---' not in line and '*' not in line:
-                    data_lines.append(line)
-
-            if data_lines:
-                # Get the last data line (most recent)
-                last_line = data_lines[-1]
-                # Split by | and strip whitespace
-                parts = [p.strip() for p in last_line.split('|') if p.strip()]
-                # parts: [Date, Open, High, Low, Close, Volume]
-                if len(parts) >= 6:
-                    return {
-                        "symbol": symbol.upper(),
-                        "price": float(parts[4]) if parts[4] else None,  # Close
-                        "open": float(parts[1]) if parts[1] else None,
-                        "high": float(parts[2]) if parts[2] else None,
-                        "low": float(parts[3]) if parts[3] else None,
-                        "volume": int(float(parts[5])) if parts[5] else None,
-                        "timestamp": parts[0] if parts[0] else None,
-                        "source": "historical"
-                    }
+        bars = result.get("result", {}).get("structuredContent", {}).get("bars")
+        if bars is None:
+            # Worker pool fallback returns ib_mcp's markdown table
+            content = result.get("result", {}).get("content", [])
+            bars = parse_markdown_bars(content[0].get("text", "")) if content else []
+
+        if bars:
+            # Get the last bar (most recent)
+            return quote_from_bar(symbol.upper(), bars[-1])
     except Exception as e:
         return {"error": str(e), "symbol": symbol, "raw": result}
 
     return {"symbol": symbol, "price": None, "raw": result}
 
 
+class QuotesRequest(BaseModel):
+    """Request for many stock quotes in one pass"""
+    symbols: List[str]
+    timeout: float = MKT_DATA_WARMUP  # Max seconds to wait for live prices
+    fallback_timeout: float = 10  # Max seconds for the historical-bar fallback
+    format: str = "json"  # "json", "columnar" or "msgpack" (see GET /options/chain)
+
+
+@app.post("/options/quotes")
+async def get_stock_quotes(request: QuotesRequest):
+    """
+    Get quotes for a list of symbols in one pass.
+
+    All symbols are qualified in one batch and read from shared live tickers
+    with a single wait; symbols without a live price by the deadline get the
+    latest cached historical bar instead (source "historical"). Quotes come
+    back in request order; format="columnar" returns them as parallel arrays
+    per field (symbol, price, bid, ask, last, volume, timestamp, source, error).
+    """
+    global options_client
+
+    if not options_client:
+        return {"error": "Options client not initialized"}
+    if not request.symbols:
+        return {"error": "symbols must not be empty"}
+    if format_error := check_format(request.format):
+        return {"error": format_error}
+
+    start = time.time()
+    try:
+        result = await options_client.get_stock_quotes(
+            request.symbols, data_timeout=request.timeout, fallback_timeout=request.fallback_timeout
+        )
+    except Exception as e:
+        logger.error(f"Bulk quotes failed: {e}")
+        return {"error": str(e)}
+    if "error" in result:
+        return result
+
+    quotes = list(result["quotes"].values())
+    response = {
+        "quotes": quotes,
+        "count": len(quotes),
+        "live": sum(1 for q in quotes if q.get("source") == "market_data"),
+        "historical": sum(1 for q in quotes if q.get("source") == "historical"),
+        "missing": [q["symbol"] for q in quotes if q.get("price") is None],
+        "elapsed": round(time.time() - start, 3)
+    }
+    if request.format != "json":
+        response["quotes"] = rows_to_columns(quotes, QUOTE_COLUMNS)
+        response["format"] = "columnar"
+        return encode_response(response, request.format)
+    return response
+
+
+# ============================================================================
+# Account REST Endpoints
+# Served from the event-driven account snapshot (no IB round-trip)
+# ============================================================================
+
+@app.get("/account")
+async def get_account(account: str = ""):
+    """
+    Get account values and PnL.
+
+    Args:
+        account: Limit to one account (default: all managed accounts)
+    """
+    global options_client
+
+    if not options_client or not options_client.account.ready:
+        return {"error": "Account state not available (options client not connected)"}
+
+    state = options_client.account
+    return {**state.account_summary(account), **state.pnl_summary(account)}
+
+
+@app.get("/account/positions")
+async def get_account_positions(account: str = ""):
+    """
+    Get portfolio positions with market value and PnL.
+
+    Args:
+        account: Limit to one account (default: all managed accounts)
+    """
+    global options_client
+
+    if not options_client or not options_client.account.ready:
+        return {"error": "Account state not available (options client not connected)"}
+
+    return options_client.account.portfolio_items(account)
+
+
+@app.get("/portfolio/risk")
+async def get_portfolio_risk(
+    account: str = "",
+    price_range: float = 0.10,
+    price_steps: int = 4,
+    vol_range: float = 5,
+    vol_steps: int = 2,
+    timeout: float = CHAIN_DATA_TIMEOUT
+):
+    """
+    Get per-position and aggregate greeks plus a price x vol shock P&L grid.
+
+    Args:
+        account: Limit to one account (default: all managed accounts)
+        price_range: Largest relative underlying move (0.10 = +/-10%)
+        price_steps: Shock steps on each side of unchanged price
+        vol_range: Largest IV move in vol points
+        vol_steps: Shock steps on each side of unchanged vol
+        timeout: Max seconds to wait for prices on newly subscribed contracts
+    """
+    global options_client
+
+    if not options_client or not options_client.account.ready:
+        return {"error": "Account state not available (options client not connected)"}
+
+    try:
+        return await portfolio_risk.compute(
+            options_client,
+            account=account,
+            price_shocks=list(np.linspace(-price_range, price_range, 2 * max(price_steps, 0) + 1)),
+            vol_shocks=list(np.linspace(-vol_range, vol_range, 2 * max(vol_steps, 0) + 1)),
+            data_timeout=timeout
+        )
+    except Exception as e:
+        logger.error(f"Portfolio risk failed: {e}")
+        return {"error": str(e)}
+
+
+# ============================================================================
+# Historical Data REST Endpoints
+# Served from the local bar store; only missing ranges are requested from IB
+# ============================================================================
+
+@app.get("/history/{symbol}")
+async def get_history(
+    symbol: str,
+    duration: str = "1 D",
+    bar_size: str = "1 min",
+    what_to_show: str = "TRADES",
+    use_rth: bool = True,
+    end: str = "",
+    resample: Optional[str] = None
+):
+    """
+    Get historical bars for a stock.
+
+    `resample` aggregates the stored bars to a coarser bar size (e.g. bar_size=1 min,
+    resample=15 mins) without another IB request.
+    """
+    global options_client
+
+    if not options_client:
+        return {"error": "Options client not initialized"}
+
+    try:
+        stock = await options_client.get_stock_contract(symbol.upper())
+        if not stock:
+            return {"error": f"Could not qualify {symbol}", "symbol": symbol.upper()}
+        columns = await bar_store.get_duration(
+            options_client.connection, stock, bar_size, duration, parse_end_time(end), what_to_show, use_rth
+        )
+        size = bar_size
+        if resample:
+            if bar_seconds(resample) % bar_seconds(bar_size):
+                return {"error": f"resample must be a multiple of bar_size ({bar_size})"}
+            columns = resample_bars(columns, bar_seconds(resample))
+            size = resample
+        return {
+            "symbol": stock.symbol,
+            "con_id": stock.conId,
+            "bar_size": size,
+            "count": len(columns["ts"]),
+            "bars": bars_to_json(columns, bar_seconds(size) >= 86400)
+        }
+    except ValueError as e:
+        return {"error": str(e), "symbol": symbol.upper()}
+    except Exception as e:
+        logger.error(f"History request failed for {symbol}: {e}")
+        return {"error": str(e), "symbol": symbol.upper()}
+
+
 # ============================================================================
 # Orders REST Endpoints (for paper trading)
 # Requires IB_READONLY=false in environment
@@ -2044,6 +6633,8 @@ class SingleLegOrderRequest(BaseModel):
     quantity: int
     order_type: str = "LMT"  # LMT or MKT
     limit_price: Optional[float] = None
+    wait_for: Optional[str] = None  # e.g. Submitted or Filled; default = IB acknowledgement
+    wait_timeout: float = ORDER_ACK_TIMEOUT
 
 
 class ComboLeg(BaseModel):
@@ -2063,6 +6654,9 @@ class ComboOrderRequest(BaseModel):
     quantity: int
     order_type: str = "LMT"
     limit_price: Optional[float] = None
+    wait_for: Optional[str] = None  # e.g. Submitted or Filled; default = IB acknowledgement
+    wait_timeout: float = ORDER_ACK_TIMEOUT
+    check_margin: bool = False  # whatIfOrder pre-flight check before placing
 
 
 @app.get("/orders/capability")
@@ -2112,6 +6706,56 @@ async def get_open_orders():
         return {"error": str(e)}
 
 
+@app.get("/orders/events")
+async def get_order_events(since: int = 0, timeout: float = 30):
+    """
+    Long-poll order status transitions and fills.
+
+    Returns events with seq > `since` as soon as there is at least one, or an
+    empty list after `timeout` seconds. Pass the returned last_seq as the next
+    `since`.
+    """
+    global orders_client
+
+    if not orders_client:
+        return {"error": "Orders client not initialized"}
+
+    tracker = orders_client.tracker
+    events = await tracker.wait_events(since, min(timeout, 300))
+    return {
+        "events": events,
+        "last_seq": events[-1]["seq"] if events else max(since, tracker.seq)
+    }
+
+
+@app.get("/orders/events/stream")
+async def stream_order_events(since: Optional[int] = None):
+    """
+    Server-sent events for order status transitions and fills.
+
+    Starts with new events only, or replays buffered events after `since`.
+    """
+    global orders_client
+
+    if not orders_client:
+        return {"error": "Orders client not initialized"}
+
+    tracker = orders_client.tracker
+
+    async def stream():
+        last = tracker.seq if since is None else since
+        while True:
+            events = await tracker.wait_events(last, 15)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            last = events[-1]["seq"]
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
 @app.get("/orders/{order_id}")
 async def get_order_status(order_id: int):
     """
@@ -2148,7 +6792,9 @@ async def place_single_order(request: SingleLegOrderRequest):
         action=request.action,
         quantity=request.quantity,
         order_type=request.order_type,
-        limit_price=request.limit_price
+        limit_price=request.limit_price,
+        wait_for=request.wait_for,
+        wait_timeout=request.wait_timeout
     )
 
 
@@ -2174,7 +6820,10 @@ async def place_combo_order(request: ComboOrderRequest):
         action=request.action,
         quantity=request.quantity,
         order_type=request.order_type,
-        limit_price=request.limit_price
+        limit_price=request.limit_price,
+        wait_for=request.wait_for,
+        wait_timeout=request.wait_timeout,
+        check_margin=request.check_margin
     )
 
 
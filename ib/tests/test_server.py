@@ -0,0 +1,861 @@
+"""
+Unit tests for server.py helpers that run without IB.
+
+Run with:
+    pytest tests/test_server.py -v
+"""
+# Add src/ to path so the import works without installing the package.
+import sys, os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import asyncio
+import copy
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+import ib_async as ib
+
+import server
+from server import (
+    BarStore, ChainSnapshots, HistoricalDataError, HistoricalPacer, IBGovernor, LineBudget, MarketDataManager,
+    NativeTools, RequestCoalescer, TokenBucket, _MARKET_TZ, _subtract, _union, bs_greeks, bs_price, implied_vol
+)
+
+
+# ---------------------------------------------------------------------------
+# IB request governor
+# ---------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    assert time.monotonic() - start < 0.05
+    await bucket.acquire(2)
+    assert time.monotonic() - start >= 0.09  # Two tokens at 20/s
+    assert bucket.stats.delayed == 1
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_oversized_request_into_debt():
+    bucket = TokenBucket(rate=50, burst=5)
+    await bucket.acquire(10)  # Larger than the bucket: allowed once full
+    assert bucket._tokens == pytest.approx(-5, abs=0.5)
+    start = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.1  # Pays the debt back first
+
+
+@pytest.mark.asyncio
+async def test_line_budget_rejects_request_over_budget():
+    budget = LineBudget(max_lines=3)
+    with pytest.raises(ValueError):
+        await budget.reserve(4)
+    assert budget.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_line_budget_times_out_when_full():
+    budget = LineBudget(max_lines=2)
+    await budget.reserve(2)
+    with pytest.raises(asyncio.TimeoutError):
+        await budget.reserve(1, timeout=0.05)
+    assert budget.in_use == 2
+    assert budget.stats.waiting == 0
+    budget.release(2)
+    await budget.reserve(2, timeout=0.05)  # The timed-out waiter left nothing behind
+
+
+@pytest.mark.asyncio
+async def test_line_budget_serves_waiters_fifo_all_or_nothing():
+    budget = LineBudget(max_lines=3)
+    await budget.reserve(3)
+    granted = []
+
+    async def reserve(name, n):
+        await budget.reserve(n)
+        granted.append(name)
+
+    big = asyncio.create_task(reserve("big", 2))
+    await asyncio.sleep(0)
+    small = asyncio.create_task(reserve("small", 1))
+    await asyncio.sleep(0)
+    budget.release(1)  # Enough for "small" alone, but "big" is first in line
+    await asyncio.sleep(0.01)
+    assert granted == []
+    budget.release(2)
+    await asyncio.wait_for(asyncio.gather(big, small), 1)
+    assert granted == ["big", "small"]
+    assert budget.in_use == 3
+
+
+@pytest.mark.asyncio
+async def test_line_budget_reclaims_idle_lines_before_queueing():
+    budget = LineBudget(max_lines=3)
+    await budget.reserve(3)
+    idle = [1, 1]  # Two idle lines a reclaimer may cancel
+    asked = []
+
+    def reclaim(n):
+        asked.append(n)
+        while n > 0 and idle:
+            idle.pop()
+            budget.release(1)
+            n -= 1
+
+    budget.add_reclaimer(reclaim)
+    await budget.reserve(2, timeout=0.05)
+    assert asked == [2]
+    assert idle == [] and budget.in_use == 3
+    assert budget.stats.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_line_budget_notify_idle_wakes_queued_reservation():
+    budget = LineBudget(max_lines=1)
+    await budget.reserve(1)
+    idle = []
+
+    def reclaim(n):
+        if idle:
+            idle.pop()
+            budget.release(1)
+
+    budget.add_reclaimer(reclaim)
+    waiter = asyncio.create_task(budget.reserve(1))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    idle.append(1)
+    budget.notify_idle()
+    await asyncio.wait_for(waiter, 1)
+    assert budget.in_use == 1
+
+
+@pytest.mark.asyncio
+async def test_historical_pacer_blocks_once_window_is_full():
+    pacer = HistoricalPacer(max_requests=2, window=60, identical_spacing=0)
+    await pacer.acquire("a")
+    await pacer.acquire("b")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(pacer.acquire("c"), 0.05)
+    assert pacer.stats.waiting == 0
+    assert pacer.get_stats()["window_requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_historical_pacer_releases_as_window_slides():
+    pacer = HistoricalPacer(max_requests=2, window=0.2, identical_spacing=0)
+    start = time.monotonic()
+    for key in ("a", "b", "c"):
+        await pacer.acquire(key)
+    assert time.monotonic() - start >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_historical_pacer_spaces_identical_requests():
+    pacer = HistoricalPacer(max_requests=60, window=600, identical_spacing=0.2)
+    await pacer.acquire("same")
+    start = time.monotonic()
+    await pacer.acquire("other")
+    assert time.monotonic() - start < 0.05
+    await pacer.acquire("same")
+    assert time.monotonic() - start >= 0.18
+
+
+# ---------------------------------------------------------------------------
+# Shared market data subscriptions
+# ---------------------------------------------------------------------------
+
+class _FakeTicker:
+    def __init__(self, contract):
+        self.contract = contract
+
+
+class _FakeMarketDataConn:
+    def __init__(self):
+        self.pendingTickersEvent = _FakeEvent()
+        self.subscribed = []
+        self.cancelled = []
+
+    def reqMarketDataType(self, data_type):
+        pass
+
+    def isConnected(self):
+        return True
+
+    def reqMktData(self, contract, *args):
+        self.subscribed.append(contract.conId)
+        return _FakeTicker(contract)
+
+    def cancelMktData(self, contract):
+        self.cancelled.append(contract.conId)
+
+
+def _option(con_id):
+    contract = ib.Option("SPY", "20261120", 500 + con_id, "C", "SMART")
+    contract.conId = con_id
+    return contract
+
+
+@pytest.fixture
+def market_data(monkeypatch):
+    monkeypatch.setattr(server.governor, "lines", LineBudget(max_lines=3))
+    manager = MarketDataManager(ttl=0)
+    conn = _FakeMarketDataConn()
+    manager.bind(conn)
+    return manager, conn
+
+
+@pytest.mark.asyncio
+async def test_overlapping_requests_share_one_line(market_data):
+    manager, conn = market_data
+    a, b, c = _option(1), _option(2), _option(3)
+    first = await manager.acquire_many([a, b])
+    second = await manager.acquire_many([b, c])
+    assert conn.subscribed == [1, 2, 3]
+    assert first[1] is second[0]
+    assert manager._subs[2].refcount == 2
+    assert (manager.hits, manager.misses) == (1, 3)
+    assert server.governor.lines.in_use == 3
+
+    manager.release_many([a, b])
+    assert manager._subs[2].refcount == 1
+    assert manager.evict_idle() == 1  # Only a: b is still held by the second request
+    assert conn.cancelled == [1]
+    assert server.governor.lines.in_use == 2
+
+    manager.release_many([b, c])
+    assert manager.evict_idle() == 2
+    assert server.governor.lines.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_duplicate_contracts_in_one_request_take_one_line(market_data):
+    manager, conn = market_data
+    a = _option(1)
+    tickers = await manager.acquire_many([a, a])
+    assert tickers[0] is tickers[1]
+    assert manager._subs[1].refcount == 1
+    assert server.governor.lines.in_use == 1
+
+
+@pytest.mark.asyncio
+async def test_request_wider_than_line_budget_is_rejected(market_data):
+    manager, conn = market_data
+    with pytest.raises(ValueError):
+        await manager.acquire_many([_option(i) for i in range(4)])
+    assert conn.subscribed == []
+    assert server.governor.lines.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_idle_lines_are_rotated_out_for_new_requests(market_data):
+    manager, conn = market_data
+    old = [_option(i) for i in (1, 2, 3)]
+    await manager.acquire_many(old)
+    manager.release_many(old)
+    manager.ttl = 3600  # Not stale yet: only rotation can take them
+    await manager.acquire_many([_option(4), _option(5)])
+    assert len(conn.cancelled) == 2
+    assert server.governor.lines.in_use == 3
+
+
+@pytest.mark.asyncio
+async def test_queued_request_does_not_pin_shared_lines(market_data):
+    manager, conn = market_data
+    a, b, c, d = _option(1), _option(2), _option(3), _option(4)
+    await manager.acquire_many([a, b, c])
+    waiter = asyncio.create_task(manager.acquire_many([c, d]))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    assert manager._subs[3].refcount == 1  # Queued for d without holding c
+
+    manager.release_many([a, b, c])  # Idle lines let the queued request rotate one out
+    tickers = await asyncio.wait_for(waiter, 1)
+    assert [t.contract.conId for t in tickers] == [3, 4]
+    assert manager._subs[3].refcount == 1 and manager._subs[4].refcount == 1
+    assert server.governor.lines.in_use == 3
+
+
+# ---------------------------------------------------------------------------
+# Request coalescing
+# ---------------------------------------------------------------------------
+
+class _Calls:
+    """Counting factory whose calls stay in flight until `gate` is set"""
+
+    def __init__(self, result):
+        self.result = result
+        self.count = 0
+        self.gate = asyncio.Event()
+
+    async def __call__(self):
+        self.count += 1
+        await self.gate.wait()
+        return copy.deepcopy(self.result)
+
+
+@pytest.mark.asyncio
+async def test_coalescer_shares_one_in_flight_call():
+    coalescer = RequestCoalescer(ttl=0)
+    calls = _Calls({"quotes": [1, 2]})
+    tasks = [asyncio.create_task(coalescer.run("quotes", ("SPY",), calls)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert coalescer.inflight_count == 1
+    calls.gate.set()
+    results = await asyncio.gather(*tasks)
+    assert calls.count == 1
+    assert results == [{"quotes": [1, 2]}] * 3
+    assert (coalescer.misses, coalescer.coalesced) == (1, 2)
+    assert coalescer.inflight_count == 0
+
+
+@pytest.mark.asyncio
+async def test_coalescer_gives_each_caller_its_own_copy():
+    coalescer = RequestCoalescer(ttl=0)
+    calls = _Calls({"rows": [{"bid": 1.0}]})
+    calls.gate.set()
+    first, second = await asyncio.gather(
+        coalescer.run("chain", ("SPY",), calls), coalescer.run("chain", ("SPY",), calls)
+    )
+    first["rows"][0]["bid"] = 99.0
+    first["extra"] = True
+    assert second == {"rows": [{"bid": 1.0}]}
+
+
+@pytest.mark.asyncio
+async def test_coalescer_keys_on_normalized_arguments():
+    coalescer = RequestCoalescer(ttl=0)
+    calls = _Calls([])
+    calls.gate.set()
+    await asyncio.gather(
+        coalescer.run("m", ({"a": 1, "b": 2},), calls),
+        coalescer.run("m", ({"b": 2, "a": 1},), calls),
+        coalescer.run("m", ({"a": 1, "b": 3},), calls)
+    )
+    assert calls.count == 2
+
+
+@pytest.mark.asyncio
+async def test_coalescer_caller_cancel_does_not_cancel_shared_call():
+    coalescer = RequestCoalescer(ttl=0)
+    calls = _Calls("ok")
+    impatient = asyncio.create_task(coalescer.run("m", (), calls))
+    patient = asyncio.create_task(coalescer.run("m", (), calls))
+    await asyncio.sleep(0)
+    impatient.cancel()
+    calls.gate.set()
+    assert await patient == "ok"
+
+
+@pytest.mark.asyncio
+async def test_coalescer_reuses_results_within_ttl_then_expires():
+    coalescer = RequestCoalescer(ttl=0.1)
+    calls = _Calls({"price": 1})
+    calls.gate.set()
+    await coalescer.run("q", ("SPY",), calls)
+    cached = await coalescer.run("q", ("SPY",), calls)
+    cached["price"] = 2  # A cached hit is a copy too
+    assert await coalescer.run("q", ("SPY",), calls) == {"price": 1}
+    assert calls.count == 1 and coalescer.hits == 2
+    await asyncio.sleep(0.12)
+    await coalescer.run("q", ("SPY",), calls)
+    assert calls.count == 2
+
+
+@pytest.mark.asyncio
+async def test_coalescer_without_ttl_never_reuses_completed_results():
+    coalescer = RequestCoalescer(ttl=0)
+    calls = _Calls("ok")
+    calls.gate.set()
+    await coalescer.run("q", (), calls)
+    await coalescer.run("q", (), calls)
+    assert calls.count == 2 and coalescer.hits == 0
+
+
+@pytest.mark.asyncio
+async def test_coalescer_does_not_cache_errors_or_exceptions():
+    coalescer = RequestCoalescer(ttl=60)
+    calls = _Calls({"error": "Not connected to IB"})
+    calls.gate.set()
+    await coalescer.run("q", (), calls)
+    await coalescer.run("q", (), calls)
+    assert calls.count == 2
+
+    async def boom():
+        raise RuntimeError("IB went away")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await coalescer.run("x", (), boom)
+    assert coalescer.misses == 4 and coalescer.inflight_count == 0
+
+
+@pytest.mark.asyncio
+async def test_mcp_calls_do_not_cache_not_connected_results(monkeypatch):
+    monkeypatch.setattr(server, "coalescer", RequestCoalescer(ttl=60))
+    responses = [
+        {"jsonrpc": "2.0", "result": {"content": [{"type": "text", "text": "Not connected to IB"}]}},
+        {"jsonrpc": "2.0", "error": {"code": -32603, "message": "Timeout waiting for IB response"}},
+        {"jsonrpc": "2.0", "result": {"content": [{"type": "text", "text": "ok"}]}}
+    ]
+    sent = []
+
+    async def send(request_data):
+        sent.append(request_data["id"])
+        return copy.deepcopy(responses[len(sent) - 1])
+
+    monkeypatch.setattr(server, "_send_to_ib_mcp", send)
+    request = {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "get_positions", "arguments": {}}}
+    for i in range(4):
+        response = await server.send_to_ib_mcp({**request, "id": i})
+        assert response["id"] == i
+    assert sent == [0, 1, 2]  # Only the good answer was reused
+    assert response["result"]["content"][0]["text"] == "ok"
+
+
+# ---------------------------------------------------------------------------
+# Historical bar store coverage
+# ---------------------------------------------------------------------------
+
+def test_subtract_empty_coverage_is_one_gap():
+    assert _subtract([], 0, 100) == [[0, 100]]
+
+
+def test_subtract_fully_covered_has_no_gaps():
+    assert _subtract([[0, 100]], 10, 90) == []
+    assert _subtract([[0, 50], [50, 100]], 0, 100) == []
+
+
+def test_subtract_returns_gaps_between_and_around_ranges():
+    coverage = [[10, 20], [30, 40]]
+    assert _subtract(coverage, 0, 50) == [[0, 10], [20, 30], [40, 50]]
+    assert _subtract(coverage, 15, 35) == [[20, 30]]
+
+
+def test_subtract_ignores_ranges_outside_request():
+    coverage = [[0, 5], [60, 70]]
+    assert _subtract(coverage, 10, 50) == [[10, 50]]
+
+
+def test_union_merges_overlapping_and_touching_ranges():
+    assert _union([[0, 10], [20, 30]], 5, 25) == [[0, 30]]
+    assert _union([[0, 10]], 10, 20) == [[0, 20]]
+
+
+def test_union_keeps_disjoint_ranges_sorted():
+    assert _union([[20, 30]], 0, 10) == [[0, 10], [20, 30]]
+    assert _union([[0, 10], [40, 50]], 20, 30) == [[0, 10], [20, 30], [40, 50]]
+
+
+def test_union_does_not_mutate_input():
+    coverage = [[0, 10]]
+    _union(coverage, 5, 20)
+    assert coverage == [[0, 10]]
+
+
+def test_union_then_subtract_leaves_no_gap():
+    coverage = _union(_union([], 0, 10), 30, 40)
+    assert _subtract(coverage, 0, 40) == [[10, 30]]
+    assert _subtract(_union(coverage, 10, 30), 0, 40) == []
+
+
+# ---------------------------------------------------------------------------
+# Historical bar store
+# ---------------------------------------------------------------------------
+
+class _FakeEvent:
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self.handlers.remove(handler)
+        return self
+
+    def emit(self, *args):
+        for handler in list(self.handlers):
+            handler(*args)
+
+
+class _BarList(list):
+    reqId = 7
+
+
+class _FakeHistoryConn:
+    """reqHistoricalDataAsync that answers empty, optionally with an IB error event"""
+
+    def __init__(self, error=None):
+        self.errorEvent = _FakeEvent()
+        self.error = error
+        self.requests = 0
+
+    async def reqHistoricalDataAsync(self, contract, **kwargs):
+        self.requests += 1
+        if self.error:
+            self.errorEvent.emit(_BarList.reqId, *self.error, contract)
+        return _BarList()
+
+
+@pytest.fixture
+def stock():
+    contract = ib.Stock("SPY", "SMART", "USD")
+    contract.conId = 756733
+    return contract
+
+
+@pytest.fixture(autouse=True)
+def fresh_governor(monkeypatch):
+    monkeypatch.setattr(server, "governor", IBGovernor())
+
+
+def _market_ts(day, hour, minute=0):
+    return int(datetime(2026, 10, day, hour, minute, tzinfo=_MARKET_TZ).timestamp())
+
+
+START, END = _market_ts(5, 9, 30), _market_ts(5, 16)  # A past Monday session
+
+
+@pytest.mark.asyncio
+async def test_get_bars_marks_empty_answer_covered(stock):
+    store, conn = BarStore(path=""), _FakeHistoryConn()
+    await store.get_bars(conn, stock, "1 hour", START, END)
+    key = store.key_for(stock.conId, "1 hour", "TRADES", True)
+    assert store._series[key].coverage == [[START, END]]
+    await store.get_bars(conn, stock, "1 hour", START, END)
+    assert conn.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_fill_error_leaves_coverage_unchanged(stock):
+    store = BarStore(path="")
+    key = store.key_for(stock.conId, "1 hour", "TRADES", True)
+    await store.get_bars(_FakeHistoryConn(), stock, "1 hour", START, START + 3 * 3600)
+    conn = _FakeHistoryConn(error=(200, "No security definition has been found"))
+    with pytest.raises(HistoricalDataError):
+        await store.get_bars(conn, stock, "1 hour", START, END)
+    assert store._series[key].coverage == [[START, START + 3 * 3600]]
+    assert store.failed_fills == 1
+
+
+@pytest.mark.asyncio
+async def test_fill_timeout_leaves_coverage_unchanged(stock, monkeypatch):
+    monkeypatch.setattr(server, "HIST_REQUEST_TIMEOUT", 0)
+    store = BarStore(path="")
+    with pytest.raises(HistoricalDataError, match="timed out"):
+        await store.get_bars(_FakeHistoryConn(), stock, "1 hour", START, END)
+    assert store._series[store.key_for(stock.conId, "1 hour", "TRADES", True)].coverage == []
+
+
+@pytest.mark.asyncio
+async def test_no_data_warning_is_not_a_failure(stock):
+    store = BarStore(path="")
+    conn = _FakeHistoryConn(error=(162, "Historical Market Data Service error message:HMDS query returned no data"))
+    await store.get_bars(conn, stock, "1 hour", START, END)
+    assert store._series[store.key_for(stock.conId, "1 hour", "TRADES", True)].coverage == [[START, END]]
+
+
+def _session_bars(*days):
+    """Hourly RTH bars (09:30-15:30 ET) for the given October 2026 days"""
+    ts = np.array([_market_ts(day, hour, 30) for day in days for hour in range(9, 16)], dtype=np.int64)
+    return {c: ts if c == "ts" else np.ones(len(ts)) for c in server.BAR_COLUMNS}
+
+
+def _store_over(columns):
+    """BarStore whose get_bars slices fixed columns instead of asking IB"""
+    store = BarStore(path="")
+    lookbacks = []
+
+    async def get_bars(ib_conn, contract, bar_size, start, end, what_to_show="TRADES", use_rth=True):
+        lookbacks.append(end - start)
+        mask = (columns["ts"] >= start) & (columns["ts"] < end)
+        return {c: v[mask] for c, v in columns.items()}
+
+    store.get_bars = get_bars
+    return store, lookbacks
+
+
+def _days(columns):
+    return sorted({datetime.fromtimestamp(int(ts), _MARKET_TZ).day for ts in columns["ts"]})
+
+
+@pytest.mark.asyncio
+async def test_get_duration_days_are_sessions_over_a_weekend(stock):
+    store, lookbacks = _store_over(_session_bars(7, 8, 9, 12))
+    sunday = _market_ts(11, 12)
+    columns = await store.get_duration(None, stock, "1 hour", "1 D", sunday)
+    assert _days(columns) == [9]
+    assert len(columns["ts"]) == 7  # The whole session, not just the part inside the widened window
+    columns = await store.get_duration(None, stock, "1 hour", "2 D", sunday)
+    assert _days(columns) == [8, 9]
+    assert len(columns["ts"]) == 14
+    assert lookbacks[0] == 86400  # Started from the plain duration and widened
+
+
+@pytest.mark.asyncio
+async def test_get_duration_before_the_open_returns_previous_session(stock):
+    store, _ = _store_over(_session_bars(7, 8, 9, 12))
+    columns = await store.get_duration(None, stock, "1 hour", "1 D", _market_ts(12, 8))
+    assert _days(columns) == [9]
+    assert len(columns["ts"]) == 7
+
+
+@pytest.mark.asyncio
+async def test_get_duration_mid_session_returns_partial_current_session(stock):
+    store, lookbacks = _store_over(_session_bars(8, 9, 12))
+    columns = await store.get_duration(None, stock, "1 hour", "1 D", _market_ts(12, 12))
+    assert _days(columns) == [12]
+    assert len(columns["ts"]) == 3
+    assert lookbacks == [86400]
+
+
+@pytest.mark.asyncio
+async def test_get_duration_seconds_stay_trailing(stock):
+    store, _ = _store_over(_session_bars(9))
+    columns = await store.get_duration(None, stock, "1 hour", "3600 S", _market_ts(11, 12))
+    assert len(columns["ts"]) == 0
+
+
+class _FakeOptionsClient:
+    def __init__(self, contract):
+        self.contract = contract
+        self.connection = None
+
+    async def ensure_connected(self):
+        return True
+
+    async def get_stock_contract(self, symbol):
+        return self.contract
+
+
+@pytest.mark.asyncio
+async def test_native_history_falls_back_when_store_has_no_bars(stock, monkeypatch):
+    store, _ = _store_over(_session_bars())
+    monkeypatch.setattr(server, "bar_store", store)
+    tools = NativeTools(_FakeOptionsClient(stock))
+    assert await tools.call("get_historical_data", {"symbol": "SPY"}) is None
+    assert tools.fallbacks == 1 and tools.calls == {}
+
+
+@pytest.mark.asyncio
+async def test_native_history_serves_last_session(stock, monkeypatch):
+    store, _ = _store_over(_session_bars(9))
+    monkeypatch.setattr(server, "bar_store", store)
+    monkeypatch.setattr(server, "parse_end_time", lambda value: _market_ts(11, 12))
+    data = await NativeTools(_FakeOptionsClient(stock)).call("get_historical_data", {"symbol": "SPY", "bar_size": "1 hour"})
+    assert len(data["bars"]) == 7
+
+
+# ---------------------------------------------------------------------------
+# Black-Scholes IV and greeks
+# ---------------------------------------------------------------------------
+
+S, R, Q = 100.0, 0.04, 0.01
+
+
+def test_implied_vol_round_trips_model_prices():
+    strikes = np.array([80.0, 95.0, 100.0, 105.0, 120.0] * 2)
+    is_call = np.array([True] * 5 + [False] * 5)
+    t = np.full(strikes.shape, 0.5)
+    prices = bs_price(S, strikes, t, R, Q, 0.3, is_call)
+    iv = implied_vol(prices, S, strikes, t, R, Q, is_call)
+    np.testing.assert_allclose(iv, 0.3, atol=1e-5)
+
+
+def test_implied_vol_round_trips_across_vols_and_expiries():
+    sigma = np.array([0.08, 0.2, 0.6, 1.5])
+    t = np.array([7 / 365, 0.1, 1.0, 2.0])
+    prices = bs_price(S, 100.0, t, R, Q, sigma, True)
+    np.testing.assert_allclose(implied_vol(prices, S, 100.0, t, R, Q, True), sigma, atol=1e-5)
+
+
+def test_implied_vol_is_nan_for_unusable_prices():
+    # NaN, zero, below intrinsic, above the underlying, and expired
+    prices = np.array([np.nan, 0.0, 10.0, 150.0, 5.0])
+    t = np.array([0.5, 0.5, 0.5, 0.5, 0.0])
+    iv = implied_vol(prices, S, 80.0, t, R, Q, True)
+    assert np.isnan(iv).all()
+
+
+def test_implied_vol_keeps_valid_rows_next_to_invalid_ones():
+    good = float(bs_price(S, 100.0, 0.5, R, Q, 0.25, True))
+    iv = implied_vol(np.array([np.nan, good, 0.0]), S, 100.0, 0.5, R, Q, True)
+    assert np.isnan(iv[0]) and np.isnan(iv[2])
+    assert abs(iv[1] - 0.25) < 1e-5
+
+
+def test_bs_greeks_match_finite_differences():
+    k, t, sigma = 105.0, 0.5, 0.3
+    for is_call in (True, False):
+        greeks = bs_greeks(S, k, t, R, Q, sigma, is_call)
+        h = 0.01
+        up = bs_price(S + h, k, t, R, Q, sigma, is_call)
+        down = bs_price(S - h, k, t, R, Q, sigma, is_call)
+        mid = bs_price(S, k, t, R, Q, sigma, is_call)
+        assert abs(greeks["delta"] - (up - down) / (2 * h)) < 1e-4
+        assert abs(greeks["gamma"] - (up - 2 * mid + down) / (h * h)) < 1e-3
+        # Vega per vol point, theta per calendar day
+        vega = (bs_price(S, k, t, R, Q, sigma + 1e-4, is_call) - bs_price(S, k, t, R, Q, sigma - 1e-4, is_call)) / 2e-4
+        assert abs(greeks["vega"] - vega / 100) < 1e-4
+        theta = (bs_price(S, k, t - 1e-4, R, Q, sigma, is_call) - bs_price(S, k, t + 1e-4, R, Q, sigma, is_call)) / 2e-4
+        assert abs(greeks["theta"] - theta / 365) < 1e-4
+
+
+def test_bs_greeks_put_call_delta_parity():
+    calls = bs_greeks(S, 100.0, 0.5, R, Q, 0.3, True)
+    puts = bs_greeks(S, 100.0, 0.5, R, Q, 0.3, False)
+    assert abs(calls["delta"] - puts["delta"] - np.exp(-Q * 0.5)) < 1e-9
+    assert abs(calls["gamma"] - puts["gamma"]) < 1e-12
+
+
+# ---------------------------------------------------------------------------
+# Chain snapshots (since=<version> deltas)
+# ---------------------------------------------------------------------------
+
+KEY = ("SPY", "20261120")
+
+
+def _row(strike, bid, ask=None):
+    return {"strike": strike, "bid": bid, "ask": ask if ask is not None else bid + 0.1, "iv": float("nan")}
+
+
+def _chain(calls, puts=()):
+    return {"symbol": "SPY", "expiration": "20261120", "calls": list(calls), "puts": list(puts)}
+
+
+def _strikes(rows):
+    return [row["strike"] for row in rows]
+
+
+def test_first_poll_is_full_with_version_token():
+    snapshots = ChainSnapshots()
+    chain = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.5)]))
+    assert chain["version"]
+    assert _strikes(chain["calls"]) == [100, 105]
+    assert "full" not in chain
+
+
+def test_since_returns_only_changed_rows():
+    snapshots = ChainSnapshots()
+    token = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.5)], [_row(100, 2.0)]))["version"]
+    chain = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.6)], [_row(100, 2.0)]), since=token)
+    assert chain["full"] is False
+    assert _strikes(chain["calls"]) == [105]
+    assert chain["puts"] == []
+    assert chain["unchanged"] == 2
+    assert chain["removed"] == []
+    assert chain["version"] != token
+
+
+def test_unchanged_poll_keeps_version_and_sends_nothing():
+    snapshots = ChainSnapshots()
+    rows = [_row(100, 1.0), _row(105, 0.5)]
+    token = snapshots.apply(KEY, _chain(copy.deepcopy(rows)))["version"]
+    chain = snapshots.apply(KEY, _chain(copy.deepcopy(rows)), since=token)
+    assert chain["version"] == token
+    assert chain["calls"] == []
+    assert chain["unchanged"] == 2
+
+
+def test_nan_fields_do_not_count_as_changes():
+    snapshots = ChainSnapshots()
+    token = snapshots.apply(KEY, _chain([_row(100, 1.0)]))["version"]
+    chain = snapshots.apply(KEY, _chain([_row(100, 1.0)]), since=token)
+    assert chain["calls"] == []
+
+
+def test_removed_strikes_are_reported_once_per_token():
+    snapshots = ChainSnapshots()
+    token = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.5)], [_row(105, 3.0)]))["version"]
+    chain = snapshots.apply(KEY, _chain([_row(100, 1.0)]), since=token)
+    assert chain["removed"] == [{"strike": 105, "right": "C"}, {"strike": 105, "right": "P"}]
+    later = snapshots.apply(KEY, _chain([_row(100, 1.0)]), since=chain["version"])
+    assert later["removed"] == []
+
+
+def test_returning_strike_is_sent_and_no_longer_removed():
+    snapshots = ChainSnapshots()
+    first = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.5)]))["version"]
+    snapshots.apply(KEY, _chain([_row(100, 1.0)]))
+    chain = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.5)]), since=first)
+    assert _strikes(chain["calls"]) == [105]
+    assert chain["removed"] == []
+
+
+def test_old_token_gets_every_change_since_it():
+    snapshots = ChainSnapshots()
+    first = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.5), _row(110, 0.2)]))["version"]
+    snapshots.apply(KEY, _chain([_row(100, 1.1), _row(105, 0.5), _row(110, 0.2)]))
+    chain = snapshots.apply(KEY, _chain([_row(100, 1.1), _row(105, 0.6), _row(110, 0.2)]), since=first)
+    assert _strikes(chain["calls"]) == [100, 105]
+
+
+def test_foreign_and_stale_tokens_get_full_chain():
+    snapshots = ChainSnapshots()
+    other = snapshots.apply(("QQQ", "20261120"), _chain([_row(400, 1.0)]))["version"]
+    token = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.5)]))["version"]
+    boot, snapshot_id, version = token.split(".")
+    restarted = ChainSnapshots()
+    restarted._boot = boot + "0"
+    for since in (
+        other,                                            # another chain's token
+        f"{boot}.{snapshot_id}.{int(version) + 5}",       # a version that never existed
+        f"{boot}.{snapshot_id}.x",                        # malformed version
+        "garbage",
+    ):
+        chain = snapshots.apply(KEY, _chain([_row(100, 1.0), _row(105, 0.5)]), since=since)
+        assert chain["full"] is True
+        assert _strikes(chain["calls"]) == [100, 105]
+        assert "removed" not in chain
+    # A token from an earlier server run
+    chain = restarted.apply(KEY, _chain([_row(100, 1.0)]), since=token)
+    assert chain["full"] is True
+
+
+def test_evicted_snapshot_token_gets_full_chain():
+    snapshots = ChainSnapshots(max_entries=1)
+    token = snapshots.apply(KEY, _chain([_row(100, 1.0)]))["version"]
+    snapshots.apply(("QQQ", "20261120"), _chain([_row(400, 1.0)]))
+    chain = snapshots.apply(KEY, _chain([_row(100, 1.0)]), since=token)
+    assert chain["full"] is True
+    assert _strikes(chain["calls"]) == [100]
+
+
+# ---------------------------------------------------------------------------
+# Response formats
+# ---------------------------------------------------------------------------
+
+QUOTE = {"symbol": "SPY", "price": 501.5, "bid": 501.4, "ask": 501.6, "last": 501.5, "volume": 1000,
+         "source": "market_data"}
+
+
+@pytest.mark.asyncio
+async def test_single_quote_honours_format(monkeypatch):
+    async def stock_quote(symbol):
+        return dict(QUOTE)
+
+    monkeypatch.setattr(server, "_stock_quote", stock_quote)
+    assert await server.get_stock_quote("spy") == QUOTE
+    response = await server.get_stock_quote("spy", format="columnar")
+    payload = json.loads(response.body)
+    assert payload["format"] == "columnar"
+    assert payload["price"] == [501.5] and payload["source"] == ["market_data"]
+    assert payload["timestamp"] == [None]
+
+
+@pytest.mark.asyncio
+async def test_single_quote_rejects_unknown_format_and_keeps_errors_plain(monkeypatch):
+    async def stock_quote(symbol):
+        return {"error": "Not connected", "symbol": symbol}
+
+    monkeypatch.setattr(server, "_stock_quote", stock_quote)
+    assert "format must be one of" in (await server.get_stock_quote("SPY", format="csv"))["error"]
+    assert await server.get_stock_quote("SPY", format="columnar") == {"error": "Not connected", "symbol": "SPY"}